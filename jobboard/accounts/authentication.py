@@ -0,0 +1,173 @@
+"""
+JWT authentication without a user lookup per request.
+
+Tokens issued by ClaimsRefreshToken carry the user's role, can_post_ajob
+and token_version as claims. ClaimsJWTAuthentication turns such a token
+into a ClaimsUser: a User whose other fields are deferred and loaded, all
+at once, only when a view reads one. Permission checks cost no query.
+
+Changing a claimed field bumps User.token_version (see User.save). The
+current version of every user is cached, so access tokens issued before
+the change are refused and must be refreshed; refreshing re-reads the
+user. Tokens without claims are authenticated the usual way, with a
+lookup of the user.
+
+A version dropped from the cache must be dropped for every process, so
+claims are only trusted when AUTH_TOKEN_VERSION_CACHE_ALIAS is a cache
+shared between processes (Redis, Memcached, a database). With a
+per-process cache (the default local-memory one, or the dummy cache)
+every token is authenticated with a lookup of the user.
+AUTH_TOKEN_VERSION_CACHE_SHARED overrides the guess. Cached versions
+expire well within the access-token lifetime all the same.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import ClaimsUser, User
+
+CLAIMS = ('role', 'can_post_ajob')
+VERSION_CLAIM = 'token_version'
+CACHE_ALIAS = getattr(settings, 'AUTH_TOKEN_VERSION_CACHE_ALIAS', 'default')
+# never more than a tenth of the access-token lifetime
+CACHE_TIMEOUT = min(
+    getattr(settings, 'AUTH_TOKEN_VERSION_CACHE_TIMEOUT', 300),
+    int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) // 10,
+)
+
+
+def _key(user_id):
+    return f'jobboard:auth:token-version:{user_id}'
+
+
+def add_claims(token, user):
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = user.token_version
+
+
+def has_claims(token):
+    return all(claim in token for claim in (*CLAIMS, VERSION_CLAIM))
+
+
+def shares_token_versions():
+    """Whether every process reads token versions from the same cache."""
+    shared = getattr(settings, 'AUTH_TOKEN_VERSION_CACHE_SHARED', None)
+    if shared is None:
+        shared = not isinstance(caches[CACHE_ALIAS], (LocMemCache, DummyCache))
+    return shared
+
+
+def forget_token_version(user_id):
+    caches[CACHE_ALIAS].delete(_key(user_id))
+
+
+def token_version(user_id):
+    """Current token version of an active user; None for unknown or inactive users."""
+    cache = caches[CACHE_ALIAS]
+    version = cache.get(_key(user_id))
+    if version is None:
+        version = User.objects.filter(pk=user_id, is_active=True).values_list('token_version', flat=True).first()
+        if version is not None:
+            cache.add(_key(user_id), version, CACHE_TIMEOUT)
+    return version
+
+
+async def atoken_version(user_id):
+    cache = caches[CACHE_ALIAS]
+    version = await cache.aget(_key(user_id))
+    if version is None:
+        version = await User.objects.filter(pk=user_id, is_active=True)\
+                                    .values_list('token_version', flat=True).afirst()
+        if version is not None:
+            await cache.aadd(_key(user_id), version, CACHE_TIMEOUT)
+    return version
+
+
+def claims_user(token):
+    """The ClaimsUser of a token that has claims; only the claimed fields are loaded."""
+    values = {
+        'id': User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM]),
+        'is_active': True,
+        VERSION_CLAIM: token[VERSION_CLAIM],
+        **{claim: token[claim] for claim in CLAIMS},
+    }
+    # from_db takes the loaded fields in model order
+    names = [field.attname for field in ClaimsUser._meta.concrete_fields if field.attname in values]
+    return ClaimsUser.from_db('default', names, [values[name] for name in names])
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user's claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        add_claims(token, user)
+        return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication serving a ClaimsUser for tokens with claims.
+
+    A stale token fails like an expired one, so clients refresh it.
+    """
+    stale_message = _("Token claims are out of date; refresh the token.")
+
+    def uses_claims(self, validated_token):
+        # a password hash cannot be checked without the row
+        return has_claims(validated_token) and not api_settings.CHECK_REVOKE_TOKEN and shares_token_versions()
+
+    def get_user(self, validated_token):
+        if not self.uses_claims(validated_token):
+            return super().get_user(validated_token)
+        if token_version(validated_token[api_settings.USER_ID_CLAIM]) != validated_token[VERSION_CLAIM]:
+            raise InvalidToken({'detail': self.stale_message, 'code': 'token_not_valid'})
+        return claims_user(validated_token)
+
+    async def aget_claims_user(self, validated_token):
+        """`get_user` for async views, for tokens with claims (None otherwise)."""
+        if not self.uses_claims(validated_token):
+            return None
+        if await atoken_version(validated_token[api_settings.USER_ID_CLAIM]) != validated_token[VERSION_CLAIM]:
+            raise InvalidToken({'detail': self.stale_message, 'code': 'token_not_valid'})
+        return claims_user(validated_token)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer issuing access tokens with the user's current
+    claims, read from the user the refresh token belongs to.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        add_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # the blacklist app is not installed
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_token_version'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'first_name'], name='user_role_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationrequest',
+            index=models.Index(fields=['user', 'status'], name='verif_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationrequest',
+            index=models.Index(fields=['user', 'created_at'], name='verif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationrequest',
+            index=models.Index(fields=['created_at'], name='verif_created_idx'),
+        ),
+        # the new indexes are built before the ones they replace are dropped
+        migrations.AlterField(
+            model_name='verificationrequest',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='verification_requests', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
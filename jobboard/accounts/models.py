@@ -4,7 +4,7 @@ from django.contrib.auth.models import (
                                         BaseUserManager,
                                         PermissionsMixin
                                        )
-from django.db import models
+from django.db import models, transaction
 
 
 class CustomUserManager(BaseUserManager):
@@ -69,14 +69,57 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
+    # bumped whenever a field carried by access tokens changes (see accounts.authentication)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
     objects = CustomUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta:
+        indexes = [
+            # user and admin lists: one role, ordered by first name
+            models.Index(fields=['role', 'first_name'], name='user_role_first_name_idx'),
+        ]
+    # fields whose change makes issued access tokens stale
+    TOKEN_FIELDS = ('role', 'can_post_ajob', 'is_active')
+
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """Bump the token version when a field carried by access tokens changes."""
+        update_fields = kwargs.get('update_fields')
+        if not self._state.adding and (update_fields is None or set(self.TOKEN_FIELDS) & set(update_fields)):
+            stored = User.objects.filter(pk=self.pk).values(*self.TOKEN_FIELDS, 'token_version').first()
+            if stored and any(stored[field] != getattr(self, field) for field in self.TOKEN_FIELDS):
+                from .authentication import forget_token_version
+
+                self.token_version = stored['token_version'] + 1
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'token_version'}
+                forget_token_version(self.pk)
+                transaction.on_commit(lambda: forget_token_version(self.pk))
+        super().save(*args, **kwargs)
+
+
+class ClaimsUser(User):
+    """
+    A user built from the claims of an access token.
+
+    Only the claimed fields are set; reading any other field loads the
+    whole row, once.
+    """
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using, fields, from_queryset)
+
 class VerificationRequest(models.Model):
     """
     Represents a request submitted by a user to be verified by an admin.
@@ -88,10 +131,20 @@ class VerificationRequest(models.Model):
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="verification_requests")
+    # indexed by verif_user_status_idx and verif_user_created_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="verification_requests", db_index=False)
     reason = models.TextField(blank=True, null=True) 
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # a user's pending request, checked before a new one is accepted
+            models.Index(fields=['user', 'status'], name='verif_user_status_idx'),
+            # request lists, oldest first: a user's own, and all of them for admins
+            models.Index(fields=['user', 'created_at'], name='verif_user_created_idx'),
+            models.Index(fields=['created_at'], name='verif_created_idx'),
+        ]
+
     def __str__(self):
         return f"Verification request by {self.user.email} - {self.status}"
\ No newline at end of file
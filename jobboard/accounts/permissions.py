@@ -21,9 +21,9 @@ class IsJobOwner(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # obj here will be the Job instance
-        return obj.posted_by == request.user
+        return obj.posted_by_id == request.user.pk
 
 class IsJobOwnerOfApplication(BasePermission):
     def has_object_permission(self, request, view, obj):
-        # obj here will be the Job instance
-        return obj.job.posted_by == request.user
+        # obj here will be the Application instance
+        return obj.job.posted_by_id == request.user.pk
@@ -1,8 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from .models import VerificationRequest, User
 from business.models import Notifications
+from business import notifications
+from .authentication import forget_token_version
 
 @receiver(post_save, sender=VerificationRequest)
 def notify_admins_on_request(sender, instance, created, **kwargs):
@@ -11,15 +14,15 @@ def notify_admins_on_request(sender, instance, created, **kwargs):
 
     Behavior:
         - If a new request is created with status "pending":
-            - Notify all admins by creating a Notifications object for each admin.
+            - Notify all admins with one bulk insert after the request commits.
     """
     if created and instance.status == "pending":
-        admins = User.objects.filter(role='admin')
-        for admin in admins:
-            Notifications.objects.create(
-                recipient=admin,
-                message=f"{instance.user.email} requested verification."
-            )
+        message = f"{instance.user.email} requested verification."
+        admin_ids = User.objects.filter(role='admin').values_list('id', flat=True)
+        notifications.dispatch(
+            Notifications(recipient_id=admin_id, message=message)
+            for admin_id in admin_ids
+        )
 
 @receiver(post_save, sender=VerificationRequest)
 def notify_user_on_status_change(sender, instance, created, **kwargs):
@@ -33,7 +36,17 @@ def notify_user_on_status_change(sender, instance, created, **kwargs):
     """
     if not created:
         if instance.status in ["approved", "denied"]:
-            Notifications.objects.create(
-                recipient=instance.user,
-                message=f"Your verification request has been {instance.status}."
-            )
+            notifications.dispatch([
+                Notifications(
+                    recipient_id=instance.user_id,
+                    message=f"Your verification request has been {instance.status}."
+                )
+            ])
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user_token_version(sender, instance, **kwargs):
+    """Tokens of a deleted user must fail the version check, not hit a cached version."""
+    user_id = instance.pk
+    forget_token_version(user_id)
+    transaction.on_commit(lambda: forget_token_version(user_id))
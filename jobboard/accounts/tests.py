@@ -1,10 +1,14 @@
 from django.urls import reverse
-from django.test import TestCase
+from unittest import mock
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
+from . import authentication
+from .authentication import ClaimsRefreshToken, claims_user
 from .models import VerificationRequest
+from business.models import Notifications
 
 User = get_user_model()
 
@@ -208,4 +212,109 @@ class UserAPITests(TestCase):
         response = self.client.patch(url, {"status": "wrongstatus"}, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         req.refresh_from_db()
-        self.assertEqual(req.status, "pending")
\ No newline at end of file
+        self.assertEqual(req.status, "pending")
+
+    def test_verification_request_notifies_admins_in_one_insert(self):
+        for i in range(3):
+            User.objects.create_user(username=f"admin{i}", email=f"admin{i}@example.com", password="Adminpass@123", role="admin")
+        self.authenticate(self.user_tokens)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse("verification-requests-list"), {"reason": "verify me"}, format="json")
+        self.assertFalse(Notifications.objects.exists())
+
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(Notifications.objects.filter(recipient__role="admin").count(), 4)
+
+
+# one test process: the local-memory cache is shared by every "worker"
+@override_settings(AUTH_TOKEN_VERSION_CACHE_SHARED=True)
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="claimsuser", email="claims@example.com", password="Userpass@123", role="user"
+        )
+        self.admin = User.objects.create_superuser(
+            username="claimsadmin", email="claimsadmin@example.com", password="Adminpass@123", role="admin"
+        )
+
+    def login(self, email, password):
+        response = self.client.post(reverse("token_obtain_pair"), {"email": email, "password": password}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_permissions_are_checked_without_a_user_query(self):
+        tokens = self.login("claimsadmin@example.com", "Adminpass@123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        url = reverse("job-cache-stats")
+        # the first request caches the token version
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login('claims@example.com', 'Userpass@123')['access']}")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_toggling_permission_makes_tokens_stale_until_refreshed(self):
+        tokens = self.login("claims@example.com", "Userpass@123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(self.admin).access_token}")
+        self.client.patch(reverse("verify_user", args=[self.user.id]), {}, format="json")
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.client.get(reverse("retrieve_user", args=[self.user.id]))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data["code"], "token_not_valid")
+
+        refreshed = self.client.post(reverse("token_refresh"), {"refresh": tokens["refresh"]}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.data['access']}")
+        response = self.client.get(reverse("retrieve_user", args=[self.user.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["can_post_ajob"])
+
+    def test_deleted_user_tokens_are_refused(self):
+        access = self.login("claims@example.com", "Userpass@123")["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(self.client.get(reverse("retrieve_user", args=[self.user.id])).status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(id=self.user.id).delete()
+        response = self.client.get(reverse("verification-requests-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(
+        AUTH_TOKEN_VERSION_CACHE_SHARED=None,
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "process-a"},
+            "process-b": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "process-b"},
+        },
+    )
+    def test_per_process_caches_do_not_serve_stale_claims(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        # another worker cached the version before the change...
+        with mock.patch.object(authentication, "CACHE_ALIAS", "process-b"):
+            self.assertFalse(authentication.shares_token_versions())
+            self.assertEqual(authentication.token_version(self.user.pk), self.user.token_version)
+        # ...which only this worker's cache forgets
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.can_post_ajob = True
+            self.user.save()
+
+        with mock.patch.object(authentication, "CACHE_ALIAS", "process-b"):
+            user = authentication.ClaimsJWTAuthentication().get_user(access)
+        self.assertNotIsInstance(user, authentication.ClaimsUser)
+        self.assertTrue(user.can_post_ajob)
+
+    def test_token_versions_expire_within_the_access_token_lifetime(self):
+        lifetime = authentication.api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        self.assertLessEqual(authentication.CACHE_TIMEOUT, lifetime / 10)
+
+    def test_claims_user_loads_the_rest_of_the_row_once(self):
+        user = claims_user(ClaimsRefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.pk, user.role, user.can_post_ajob), (self.user.pk, "user", False))
+            self.assertEqual(user, self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual((user.username, user.email), ("claimsuser", "claims@example.com"))
+
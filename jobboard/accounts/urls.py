@@ -9,9 +9,13 @@ from .views import (
                         VerificationRequestViewSet
                     )
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import ClaimsRefreshToken, ClaimsTokenRefreshSerializer
 from rest_framework.routers import DefaultRouter
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # access tokens carry role and can_post_ajob (see accounts.authentication)
+    token_class = ClaimsRefreshToken
+
     def validate(self, attrs):
         data = super().validate(attrs)
         # Add custom data
@@ -26,13 +30,16 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = ClaimsTokenRefreshSerializer
+
 router = DefaultRouter()
 router.register(r'admins', AdminViewSets, basename='admins')
 router.register(r"verification-requests", VerificationRequestViewSet, basename="verification-requests")
 
 urlpatterns = [
     path('users/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('users/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('users/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
 
     path('users/register/', UserCreateView.as_view(), name='register'),
     path('users/<uuid:id>/retrieve/', UserRetrieveUpdateDestroyView.as_view(), name='retrieve_user'),
@@ -64,6 +64,9 @@ class UserVerifyView(generics.UpdateAPIView):
     """
     API view to toggle a user's permission to post a job.
 
+    The toggle bumps the user's token version (see User.save), so access
+    tokens still claiming the old permission are refused until refreshed.
+
     Permissions:
         - Only admins can access this endpoint.
     """
@@ -0,0 +1,433 @@
+"""
+Async read path for the hottest job board endpoints.
+
+These are plain `async def` Django views. Under an ASGI server they run on
+the event loop instead of queueing for the single thread that sync DRF
+views are handed to, so a worker can keep many slow clients connected at
+once. Rows are read with the async ORM (`aget`, `acount`, `aiterator`) and
+rendered with the existing DRF serializers, or their fast list plans (see
+business.fastlist). The querysets are shaped so that serialization never
+touches the database.
+
+Responses have the same JSON as the DRF endpoints they mirror, with
+page-number pagination. Filters are applied by hand: django-filter
+validates a category by querying the database synchronously, so its
+existence is checked here with the async ORM instead. `?ordering=` takes
+the fields OrderingFilter allows the DRF view, and unknown ones are
+dropped the same way.
+
+`notification_poll` (long-poll) and `notification_stream` (server-sent
+events) push new notifications as they are created, so clients no longer
+need to poll the notification list. Waiting for a notification costs no
+thread and no database query.
+"""
+import asyncio
+import json
+import math
+import uuid
+from types import SimpleNamespace
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from rest_framework import filters
+from rest_framework.exceptions import APIException
+from rest_framework.fields import DateTimeField
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from accounts.authentication import ClaimsJWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from accounts.models import User
+from .models import Categories, Jobs, Applications, Notifications
+from .serializers import JobSerializer, ApplicationSummarySerializer, NotificationSerializer
+from . import cache, fastlist, notifications, pubsub, search
+
+# longest wait of a long-poll request, in seconds
+POLL_TIMEOUT = getattr(settings, 'NOTIFICATIONS_POLL_TIMEOUT', 25)
+# seconds before a notification stream is closed; clients reconnect with Last-Event-ID
+STREAM_LIFETIME = getattr(settings, 'NOTIFICATIONS_STREAM_LIFETIME', 300)
+STREAM_HEARTBEAT = 15
+STREAM_RETRY_MS = 3000
+# most notifications sent to catch a reconnecting client up
+REPLAY_LIMIT = 100
+
+JOB_FILTERS = {
+    'working_area': dict(Jobs.WORKING_AREA_CHOICES),
+    'longevity': dict(Jobs.LONGEVITY_CHOICES),
+    'type': dict(Jobs.TYPE_CHOICES),
+}
+APPLICATION_STATUSES = dict(Applications.STATUS_CHOICE)
+INVALID_CATEGORY = 'Select a valid choice. That choice is not one of the available choices.'
+# what OrderingFilter reads of JobReadOnlyViewSet to know the fields a list may be ordered by
+JOB_ORDERING_VIEW = SimpleNamespace(serializer_class=JobSerializer)
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+
+class NotAuthenticated(Exception):
+    """No usable credentials; `response` is the 401 to send."""
+
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.response = JsonResponse(detail, status=401)
+        self.response['WWW-Authenticate'] = ClaimsJWTAuthentication().authenticate_header(None)
+
+
+async def authenticate(request):
+    """
+    The user of the request's JWT, with the same checks as JWTAuthentication.
+
+    Tokens are validated in-process; only tokens without claims need a user
+    lookup (see accounts.authentication).
+    """
+    authentication = ClaimsJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        raise NotAuthenticated({'detail': 'Authentication credentials were not provided.'})
+    try:
+        token = authentication.get_validated_token(raw_token)
+        user = await authentication.aget_claims_user(token)
+    except APIException as exc:
+        raise NotAuthenticated(exc.detail)
+    if user is not None:
+        return user
+
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]})
+    except (KeyError, User.DoesNotExist):
+        raise NotAuthenticated({'detail': 'User not found', 'code': 'user_not_found'})
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise NotAuthenticated({'detail': 'User is inactive', 'code': 'user_inactive'})
+    if jwt_settings.CHECK_REVOKE_TOKEN and \
+            token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+        raise NotAuthenticated({'detail': "The user's password has been changed.", 'code': 'password_changed'})
+    return user
+
+
+class BadRequest(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _choice(request, name, choices, errors):
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return None
+    if value not in choices:
+        errors[name] = [f'Select a valid choice. {value} is not one of the available choices.']
+    return value
+
+
+def _boolean(request, name, errors):
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return None
+    if value.lower() not in BOOLEAN_VALUES:
+        errors[name] = ['Enter a valid boolean.']
+        return None
+    return BOOLEAN_VALUES[value.lower()]
+
+
+async def filter_jobs(request, queryset):
+    """The job list filters, search and ordering of JobReadOnlyViewSet."""
+    errors = {}
+    for name, choices in JOB_FILTERS.items():
+        value = _choice(request, name, choices, errors)
+        if value is not None:
+            queryset = queryset.filter(**{name: value})
+
+    is_active = _boolean(request, 'is_active', errors)
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+
+    category = request.GET.get('category')
+    if category:
+        try:
+            category = uuid.UUID(category)
+        except ValueError:
+            errors['category'] = [Categories._meta.pk.error_messages['invalid'] % {'value': category}]
+        else:
+            if not await Categories.objects.filter(pk=category).aexists():
+                errors['category'] = [INVALID_CATEGORY]
+            queryset = queryset.filter(category_id=category)
+
+    if errors:
+        raise BadRequest(errors)
+
+    terms = request.GET.get(drf_settings.SEARCH_PARAM, '').replace('\x00', '').replace(',', ' ').split()
+    if terms:
+        queryset = search.search_jobs(queryset, terms)
+    return order_jobs(request, queryset)
+
+
+def order_jobs(request, queryset):
+    """`queryset` in the order of ?ordering=, as OrderingFilter sorts JobReadOnlyViewSet."""
+    ordering = filters.OrderingFilter()
+    params = request.GET.get(ordering.ordering_param)
+    if not params:
+        return queryset
+    fields = [param.strip() for param in params.split(',')]
+    fields = ordering.remove_invalid_fields(queryset, fields, JOB_ORDERING_VIEW, request)
+    return queryset.order_by(*fields) if fields else queryset
+
+
+async def paginate(request, queryset, serializer_class):
+    """
+    One page of `queryset` in PageNumberPagination's format, rendered in
+    fast list mode when the serializer allows it (see business.fastlist).
+
+    Raises LookupError for a page that does not exist.
+    """
+    page_size = drf_settings.PAGE_SIZE
+    count = await queryset.acount()
+    pages = max(1, math.ceil(count / page_size))
+    page = request.GET.get('page', 1)
+    try:
+        page = pages if page == 'last' else int(page)
+    except ValueError:
+        raise LookupError(page)
+    if not 1 <= page <= pages:
+        raise LookupError(page)
+
+    offset = (page - 1) * page_size
+    plan = fastlist.get_plan(serializer_class, queryset)
+    if plan is not None:
+        queryset = plan.values(queryset)
+    rows = [row async for row in queryset[offset:offset + page_size].aiterator()]
+    url = request.build_absolute_uri()
+    if page == 1:
+        previous = None
+    elif page == 2:
+        previous = remove_query_param(url, 'page')
+    else:
+        previous = replace_query_param(url, 'page', page - 1)
+    return {
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if page < pages else None,
+        'previous': previous,
+        'results': plan.represent(rows) if plan is not None else
+                   serializer_class(rows, many=True, context={'request': request}).data,
+    }
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+
+async def _list(request, queryset, serializer_class):
+    try:
+        return _json(await paginate(request, queryset, serializer_class))
+    except LookupError:
+        return _json({'detail': 'Invalid page.'}, status=404)
+
+
+@require_GET
+async def job_list(request):
+    """
+    Async counterpart of the public job list (jobs-list), served through the board cache.
+
+    Filters are validated when the page is produced, so a cached page costs
+    no category lookup.
+    """
+    async def produce():
+        queryset = await filter_jobs(request, Jobs.objects.with_applications_count().order_by('-posted_at', '-id'))
+        return await paginate(request, queryset, JobSerializer)
+
+    try:
+        data = await cache.aread_through(await cache.amake_key('jobs:async-list', request), produce)
+    except BadRequest as exc:
+        return _json(exc.errors, status=400)
+    except LookupError:
+        return _json({'detail': 'Invalid page.'}, status=404)
+    return _json(data)
+
+
+@require_GET
+async def job_detail(request, id):
+    """Async counterpart of the public job detail (jobs-detail), served through the board cache."""
+    async def produce():
+        job = await Jobs.objects.with_applications_count().aget(id=id)
+        return JobSerializer(job, context={'request': request}).data
+
+    try:
+        data = await cache.aread_through(await cache.amake_key('jobs:async-retrieve', request), produce)
+    except Jobs.DoesNotExist:
+        return _json({'detail': 'No Jobs matches the given query.'}, status=404)
+    return _json(data)
+
+
+@require_GET
+async def notification_list(request):
+    """Async counterpart of list-notifications: the user's feed, unread first."""
+    try:
+        user = await authenticate(request)
+    except NotAuthenticated as exc:
+        return exc.response
+
+    queryset = Notifications.objects.filter(recipient=user).order_by('is_read', '-created_at')
+    errors = {}
+    is_read = _boolean(request, 'is_read', errors)
+    if errors:
+        return _json(errors, status=400)
+    if is_read is not None:
+        queryset = queryset.filter(is_read=is_read)
+    return await _list(request, queryset, NotificationSerializer)
+
+
+@require_GET
+async def my_application_list(request):
+    """Async counterpart of user-applications-list: the user's applications, newest first."""
+    try:
+        user = await authenticate(request)
+    except NotAuthenticated as exc:
+        return exc.response
+
+    queryset = Applications.objects.filter(user=user).summaries().order_by('-applied_at')
+    errors = {}
+    application_status = _choice(request, 'status', APPLICATION_STATUSES, errors)
+    if errors:
+        return _json(errors, status=400)
+    if application_status is not None:
+        queryset = queryset.filter(status=application_status)
+    return await _list(request, queryset, ApplicationSummarySerializer)
+
+
+def _cursor(request, errors):
+    """The `after` timestamp of a poll or stream: the query parameter or Last-Event-ID."""
+    value = request.GET.get('after') or request.headers.get('Last-Event-ID')
+    if not value:
+        return None
+    try:
+        after = parse_datetime(value)
+    except ValueError:
+        after = None
+    if after is None:
+        errors['after'] = ['Datetime has wrong format.']
+    elif timezone.is_naive(after):
+        after = timezone.make_aware(after)
+    return after
+
+
+async def _replay(user, after):
+    """Notifications of `user` created after `after`, oldest first."""
+    queryset = Notifications.objects.filter(recipient=user, created_at__gt=after).order_by('created_at')
+    rows = [row async for row in queryset[:REPLAY_LIMIT].aiterator()]
+    return NotificationSerializer(rows, many=True).data
+
+
+def _new(messages, seen):
+    """Decoded published notifications, skipping those already sent."""
+    fresh = []
+    for message in messages:
+        notification = json.loads(message)
+        if notification['id'] not in seen:
+            seen.add(notification['id'])
+            fresh.append(notification)
+    return fresh
+
+
+@require_GET
+async def notification_poll(request):
+    """
+    Long-poll for new notifications.
+
+    Returns at once with the notifications created after `after` (an ISO
+    timestamp, normally the `cursor` of the previous response), otherwise
+    waits up to `timeout` seconds for one to be created.
+    """
+    try:
+        user = await authenticate(request)
+    except NotAuthenticated as exc:
+        return exc.response
+
+    errors = {}
+    after = _cursor(request, errors)
+    try:
+        timeout = float(request.GET.get('timeout', POLL_TIMEOUT))
+    except ValueError:
+        errors['timeout'] = ['A valid number is required.']
+    else:
+        if not 0 <= timeout <= POLL_TIMEOUT:
+            errors['timeout'] = [f'Ensure this value is between 0 and {POLL_TIMEOUT}.']
+    if errors:
+        return _json(errors, status=400)
+
+    # subscribe before reading the table so nothing created in between is missed
+    with pubsub.subscribe(notifications.channel(user.pk)) as subscription:
+        results = list(await _replay(user, after)) if after else []
+        if not results:
+            results = _new(await subscription.aget(timeout), set())
+
+    if results:
+        cursor = results[-1]['created_at']
+    else:
+        cursor = DateTimeField().to_representation(after or timezone.now())
+    return _json({
+        'results': results,
+        'unread_count': await notifications.aunread_count(user.pk),
+        'cursor': cursor,
+    })
+
+
+def _event(name, data, event_id=None):
+    lines = [f'event: {name}']
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _events(user, after):
+    subscription = pubsub.subscribe(notifications.channel(user.pk))
+    try:
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+        seen = set()
+        if after:
+            for notification in await _replay(user, after):
+                seen.add(str(notification['id']))
+                yield _event('notification', notification, notification['created_at'])
+        yield _event('unread_count', {'unread_count': await notifications.aunread_count(user.pk)})
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STREAM_LIFETIME
+        while (remaining := deadline - loop.time()) > 0:
+            fresh = _new(await subscription.aget(min(STREAM_HEARTBEAT, remaining)), seen)
+            if not fresh:
+                yield ': keep-alive\n\n'
+                continue
+            for notification in fresh:
+                yield _event('notification', notification, notification['created_at'])
+            yield _event('unread_count', {'unread_count': await notifications.aunread_count(user.pk)})
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def notification_stream(request):
+    """
+    Server-sent events of the user's new notifications.
+
+    Starts with an `unread_count` event, then sends a `notification` event
+    per new notification (followed by the updated `unread_count`). Event ids
+    are creation timestamps, so a client reconnecting with Last-Event-ID is
+    sent what it missed.
+    """
+    try:
+        user = await authenticate(request)
+    except NotAuthenticated as exc:
+        return exc.response
+
+    errors = {}
+    after = _cursor(request, errors)
+    if errors:
+        return _json(errors, status=400)
+
+    response = StreamingHttpResponse(_events(user, after), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # keep reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,755 @@
+"""
+Benchmark harness for the REST API.
+
+`seed` fills the database with generated users, categories, jobs,
+applications and notifications using bulk inserts. `run` requests every
+route of business.urls and accounts.urls as a realistic actor, recording
+latency percentiles and SQL query counts. `compare` reports query-count
+regressions against a previously saved run. `run_concurrency` compares the
+WSGI path with the async read path under concurrent load, and
+`run_list_modes` the serializer path with fast list mode per page size.
+`run_query_plans` explains the queries of the list routes, to check that
+indexes serve them.
+
+Used by the seed_benchmark_data and run_benchmarks management commands.
+"""
+import asyncio
+import datetime
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from accounts.authentication import ClaimsRefreshToken
+from accounts.models import User, VerificationRequest
+from .models import Categories, Jobs, Applications, Notifications
+from . import cache as job_cache, facets, poster_stats, queryplans, search
+
+PASSWORD = 'Benchpass@123'
+EMAIL_DOMAIN = 'bench.example.com'
+OWNER_EMAIL = f'owner@{EMAIL_DOMAIN}'
+APPLICANT_EMAIL = f'applicant@{EMAIL_DOMAIN}'
+ADMIN_EMAIL = f'admin@{EMAIL_DOMAIN}'
+
+SCALES = {
+    'small': {'users': 200, 'categories': 20, 'jobs': 2000, 'applications': 20000, 'notifications': 20000},
+    'medium': {'users': 10000, 'categories': 100, 'jobs': 100000, 'applications': 1000000, 'notifications': 1000000},
+    'full': {'users': 100000, 'categories': 200, 'jobs': 1000000, 'applications': 10000000, 'notifications': 10000000},
+}
+
+# jobs posted by the benchmark owner, and how many applications they receive
+OWNER_JOBS = 50
+OWNER_SHARE = 0.05
+# applications sent by the benchmark applicant
+APPLICANT_APPLICATIONS = 100
+# application ids kept in memory to attach notifications to
+SAMPLE_SIZE = 100000
+
+TITLE_LEVELS = ['Junior', 'Senior', 'Lead', 'Principal', 'Staff', 'Intern']
+TITLE_ROLES = [
+    'Python Developer', 'Data Engineer', 'Product Designer', 'Accountant', 'Nurse',
+    'Sales Manager', 'DevOps Engineer', 'Teacher', 'Copywriter', 'Support Agent',
+]
+WORDS = (
+    'team product customers remote growth platform reliable build design ship data '
+    'support manage learn mentor scale quality security travel budget report client'
+).split()
+LOCATIONS = ['Addis Ababa', 'Nairobi', 'Berlin', 'Lagos', 'London', 'Toronto']
+
+
+def seed(volumes, batch_size=5000, random_seed=0, progress=None):
+    """
+    Insert generated rows in bulk and return the number created per model.
+
+    Signals are bypassed, so the search index, the facet rollup and the
+    poster statistics are filled explicitly. Three known actors are created
+    for `run`: an owner, an applicant and an admin.
+    """
+    rng = random.Random(random_seed)
+    progress = progress or (lambda message: None)
+    password = make_password(PASSWORD)
+    created = {}
+
+    actors = [
+        User(email=OWNER_EMAIL, username='bench-owner', password=password, role='user', can_post_ajob=True),
+        User(email=APPLICANT_EMAIL, username='bench-applicant', password=password, role='user'),
+        User(email=ADMIN_EMAIL, username='bench-admin', password=password, role='admin',
+             can_post_ajob=True, is_staff=True, is_superuser=True),
+    ]
+    owner, applicant, admin = User.objects.bulk_create(actors)
+    user_ids = []
+    for start in range(0, volumes['users'], batch_size):
+        users = [
+            User(
+                email=f'user{i}@{EMAIL_DOMAIN}', username=f'bench-user-{i}', password=password,
+                role='user', gender=rng.choice(['male', 'female']), can_post_ajob=i % 10 == 0,
+            )
+            for i in range(start, min(start + batch_size, volumes['users']))
+        ]
+        user_ids.extend(user.id for user in User.objects.bulk_create(users))
+    created['users'] = len(user_ids) + len(actors)
+    poster_ids = user_ids[::10] or [owner.id]
+    progress(f"users: {created['users']}")
+
+    categories = Categories.objects.bulk_create(
+        Categories(name=f'Bench category {i}', description=f'Generated category {i}')
+        for i in range(volumes['categories'])
+    )
+    category_ids = [category.id for category in categories]
+    created['categories'] = len(category_ids)
+
+    job_ids, owner_job_ids = [], []
+    for start in range(0, volumes['jobs'], batch_size):
+        jobs = []
+        for i in range(start, min(start + batch_size, volumes['jobs'])):
+            working_area = rng.choice(['onsite', 'remote', 'hybrid'])
+            jobs.append(Jobs(
+                id=uuid.uuid4(),
+                title=f'{rng.choice(TITLE_LEVELS)} {rng.choice(TITLE_ROLES)}',
+                description=' '.join(rng.choices(WORDS, k=40)),
+                location=None if working_area == 'remote' else rng.choice(LOCATIONS),
+                working_area=working_area,
+                longevity=rng.choice(['contractual', 'permanent']),
+                type=rng.choice(['full-time', 'part-time']),
+                category_id=rng.choice(category_ids) if category_ids else None,
+                posted_by_id=owner.id if i < OWNER_JOBS else rng.choice(poster_ids),
+                is_active=rng.random() < 0.9,
+            ))
+        Jobs.objects.bulk_create(jobs)
+        batch_ids = [job.id for job in jobs]
+        search.index_jobs(batch_ids)
+        job_ids.extend(batch_ids)
+        owner_job_ids.extend(job.id for job in jobs if job.posted_by_id == owner.id)
+        progress(f'jobs: {len(job_ids)}')
+    facets.rebuild()
+    created['jobs'] = len(job_ids)
+
+    sample, total = [], 0
+    applicant_jobs = job_ids[OWNER_JOBS:OWNER_JOBS + APPLICANT_APPLICATIONS]
+    applicant_user_ids = user_ids or [applicant.id]
+    statuses = ['pending'] * 7 + ['accepted'] + ['rejected'] * 2
+    # one resume per applicant, stored once however many jobs they apply to
+    resumes = {}
+    while job_ids and total < volumes['applications']:
+        applications = []
+        for i in range(total, min(total + batch_size, volumes['applications'])):
+            if i < len(applicant_jobs):
+                user_id, job_id = applicant.id, applicant_jobs[i]
+            elif owner_job_ids and rng.random() < OWNER_SHARE:
+                user_id, job_id = rng.choice(applicant_user_ids), rng.choice(owner_job_ids)
+            else:
+                user_id, job_id = rng.choice(applicant_user_ids), rng.choice(job_ids)
+            if user_id not in resumes:
+                resumes[user_id] = Applications.resume_fields(' '.join(rng.choices(WORDS, k=30)))
+            applications.append(Applications(
+                id=uuid.uuid4(), job_id=job_id, user_id=user_id, status=rng.choice(statuses),
+                cover_letter=' '.join(rng.choices(WORDS, k=20)), **resumes[user_id],
+            ))
+        Applications.objects.bulk_create(applications)
+        for application in applications:
+            total += 1
+            # reservoir sample, so memory stays flat at any volume
+            if len(sample) < SAMPLE_SIZE:
+                sample.append(application.id)
+            elif (slot := rng.randrange(total)) < SAMPLE_SIZE:
+                sample[slot] = application.id
+        progress(f'applications: {total}')
+    created['applications'] = total
+
+    recipients = [owner.id, applicant.id, *user_ids]
+    total = 0
+    while total < volumes['notifications']:
+        notifications = [
+            Notifications(
+                application_id=rng.choice(sample) if sample else None,
+                recipient_id=recipients[i % 10] if i % 10 < 2 else rng.choice(recipients),
+                message=' '.join(rng.choices(WORDS, k=12)),
+                is_read=rng.random() < 0.6,
+            )
+            for i in range(total, min(total + batch_size, volumes['notifications']))
+        ]
+        Notifications.objects.bulk_create(notifications)
+        total += len(notifications)
+        progress(f'notifications: {total}')
+    created['notifications'] = total
+
+    VerificationRequest.objects.create(user=applicant, reason='Benchmark request', status='denied')
+    poster_stats.reconcile()
+    return created
+
+
+def is_seeded():
+    return User.objects.filter(email=OWNER_EMAIL).exists()
+
+
+@dataclass
+class Scenario:
+    """
+    One request against a named route.
+
+    `kwargs`, `data` and `query` may be callables receiving the Fixtures, so
+    ids are resolved against the seeded database. Requests that are not GETs
+    run in a transaction that is rolled back, leaving the data untouched;
+    their `data` is sent as JSON, or as the raw body if `content_type` is set.
+    """
+    name: str
+    url_name: str
+    actor: str = None
+    method: str = 'get'
+    kwargs: object = None
+    data: object = None
+    query: object = None
+    expect: int = 200
+    content_type: str = None
+
+    def resolve(self, value, fixtures):
+        return value(fixtures) if callable(value) else value
+
+    def path(self, fixtures):
+        return reverse(self.url_name, kwargs=self.resolve(self.kwargs, fixtures))
+
+
+class Fixtures:
+    """Ids of seeded rows that the scenarios request."""
+
+    def __init__(self):
+        self.owner = User.objects.get(email=OWNER_EMAIL)
+        self.applicant = User.objects.get(email=APPLICANT_EMAIL)
+        self.admin = User.objects.get(email=ADMIN_EMAIL)
+        self.users = {'owner': self.owner, 'applicant': self.applicant, 'admin': self.admin}
+        self.refresh = {name: ClaimsRefreshToken.for_user(user) for name, user in self.users.items()}
+
+        self.owner_job = Jobs.objects.filter(posted_by=self.owner).order_by('-posted_at', '-id').first()
+        self.job = Jobs.objects.exclude(posted_by=self.owner).order_by('-posted_at', '-id').first()
+        self.category = Categories.objects.order_by('created_at').first()
+        self.owner_application = Applications.objects.filter(job__posted_by=self.owner)\
+                                                     .order_by('-applied_at', '-id').first()
+        self.owner_job_application_ids = list(
+            Applications.objects.filter(job=self.owner_job).values_list('id', flat=True)[:50]
+        )
+        self.application = Applications.objects.filter(user=self.applicant, status='pending')\
+                                               .order_by('-applied_at', '-id').first()
+        self.notification = Notifications.objects.filter(recipient=self.applicant)\
+                                                 .order_by('-created_at', '-id').first()
+        self.verification_request = VerificationRequest.objects.filter(user=self.applicant).first()
+
+    def access_token(self, actor):
+        return str(self.refresh[actor].access_token)
+
+
+def _id(attribute):
+    return lambda fixtures: {'id': getattr(fixtures, attribute).id}
+
+
+SCENARIOS = [
+    # public job board
+    Scenario('jobs.list', 'jobs-list'),
+    Scenario('jobs.list.search', 'jobs-list', query={'search': 'python developer'}),
+    Scenario('jobs.list.filtered', 'jobs-list', query={'working_area': 'remote', 'type': 'full-time'}),
+    Scenario('jobs.list.cursor', 'jobs-list', query={'pagination': 'cursor'}),
+    Scenario('jobs.list.deep_page', 'jobs-list', query={'page': 50}),
+    Scenario('jobs.facets', 'jobs-facets'),
+    Scenario('jobs.facets.filtered', 'jobs-facets', query={'working_area': 'remote', 'search': 'python developer'}),
+    Scenario('jobs.recommended', 'recommended-jobs', 'applicant'),
+    Scenario('jobs.similar', 'similar-jobs', kwargs=_id('job')),
+    Scenario('jobs.detail', 'jobs-detail', kwargs=_id('job')),
+    # admin
+    Scenario('admin.jobs.delete', 'job-destroy', 'admin', 'delete', kwargs=_id('job'), expect=204),
+    Scenario('admin.categories.list', 'category-list', 'admin'),
+    Scenario('admin.categories.create', 'category-list', 'admin', 'post',
+             data={'name': 'Benchmark created category', 'description': 'Created by run_benchmarks'}, expect=201),
+    Scenario('admin.categories.detail', 'category-detail', 'admin', kwargs=_id('category')),
+    Scenario('admin.cache.stats', 'job-cache-stats', 'admin'),
+    # job owners
+    Scenario('my_jobs.create', 'user-crate-jobs', 'owner', 'post', expect=201, data={
+        'title': 'Benchmark Engineer', 'description': 'Created by run_benchmarks',
+        'working_area': 'remote', 'longevity': 'permanent', 'type': 'full-time',
+    }),
+    Scenario('my_jobs.import', 'user-import-jobs', 'owner', 'post', expect=201,
+             content_type='application/x-ndjson', data=''.join(
+                 json.dumps({'title': f'Imported Engineer {i}', 'description': 'Created by run_benchmarks',
+                             'working_area': 'remote', 'longevity': 'permanent', 'type': 'full-time'}) + '\n'
+                 for i in range(100)
+             )),
+    Scenario('my_jobs.list', 'user-jobs-list', 'owner'),
+    Scenario('my_jobs.detail', 'user-jobs-detail', 'owner', kwargs=_id('owner_job')),
+    Scenario('my_jobs.update', 'user-jobs-update', 'owner', 'patch', kwargs=_id('owner_job'),
+             data={'title': 'Benchmark Engineer (updated)'}),
+    Scenario('my_jobs.delete', 'user-jobs-delete', 'owner', 'delete', kwargs=_id('owner_job'), expect=204),
+    Scenario('job_applications.list', 'job-applications-list', 'owner',
+             kwargs=lambda fixtures: {'job_id': fixtures.owner_job.id}),
+    Scenario('job_applications.detail', 'job-application-detail', 'owner',
+             kwargs=lambda fixtures: {'job_id': fixtures.owner_application.job_id, 'id': fixtures.owner_application.id}),
+    Scenario('job_applications.export', 'job-applications-export', 'owner',
+             kwargs=lambda fixtures: {'job_id': fixtures.owner_job.id}),
+    Scenario('job_applications.update_status', 'application-update-status', 'owner', 'patch',
+             kwargs=_id('owner_application'), data={'status': 'Accepted'}),
+    Scenario('job_applications.bulk_status', 'job-applications-bulk-status', 'owner', 'post',
+             kwargs=lambda fixtures: {'job_id': fixtures.owner_job.id},
+             data=lambda fixtures: {'status': 'Rejected', 'application_ids': fixtures.owner_job_application_ids}),
+    # applicants
+    Scenario('my_applications.list', 'user-applications-list', 'applicant'),
+    Scenario('my_applications.create', 'user-applications-create', 'applicant', 'post', kwargs=_id('job'),
+             data={'resume': 'Benchmark resume', 'cover_letter': 'Benchmark cover letter'}, expect=201),
+    Scenario('my_applications.detail', 'user-applications-retrieve', 'applicant', kwargs=_id('application')),
+    Scenario('applications.resume', 'application-resume', 'applicant', kwargs=_id('application')),
+    Scenario('my_applications.update', 'user-applications-update', 'applicant', 'patch',
+             kwargs=_id('application'), data={'cover_letter': 'Updated cover letter'}),
+    Scenario('my_applications.delete', 'user-applications-delete', 'applicant', 'delete',
+             kwargs=_id('application'), expect=204),
+    # notifications
+    Scenario('notifications.list', 'list-notifications', 'applicant'),
+    Scenario('notifications.detail', 'retrieve-notification', 'applicant', kwargs=_id('notification')),
+    Scenario('notifications.delete', 'delete-notification', 'applicant', 'delete',
+             kwargs=_id('notification'), expect=204),
+    Scenario('notifications.mark_read', 'mark-notifications-read', 'applicant', 'post', data={'all': True}),
+    Scenario('notifications.unread_count', 'unread-notification-count', 'applicant'),
+    Scenario('notifications.poll', 'poll-notifications', 'applicant', query={'timeout': 0}),
+    Scenario('notifications.poll.catch_up', 'poll-notifications', 'applicant',
+             query={'timeout': 0, 'after': '2000-01-01T00:00:00Z'}),
+    # accounts
+    Scenario('users.login', 'token_obtain_pair', method='post',
+             data={'email': APPLICANT_EMAIL, 'password': PASSWORD}),
+    Scenario('users.refresh', 'token_refresh', method='post',
+             data=lambda fixtures: {'refresh': str(fixtures.refresh['applicant'])}),
+    Scenario('users.register', 'register', method='post', expect=201, data={
+        'username': 'bench-registered', 'email': f'registered@{EMAIL_DOMAIN}', 'password': PASSWORD,
+        'gender': 'female',
+    }),
+    Scenario('users.retrieve', 'retrieve_user', 'applicant', kwargs=_id('applicant')),
+    Scenario('users.list', 'list_users', 'admin'),
+    Scenario('users.verify', 'verify_user', 'admin', 'patch', kwargs=_id('applicant')),
+    Scenario('admins.list', 'admins-list', 'admin'),
+    Scenario('admins.detail', 'admins-detail', 'admin', kwargs=_id('admin')),
+    Scenario('verification_requests.list', 'verification-requests-list', 'admin'),
+    Scenario('verification_requests.create', 'verification-requests-list', 'applicant', 'post',
+             data={'reason': 'Benchmark'}, expect=201),
+    Scenario('verification_requests.detail', 'verification-requests-detail', 'applicant',
+             kwargs=lambda fixtures: {'pk': fixtures.verification_request.pk}),
+    Scenario('verification_requests.update', 'verification-requests-detail', 'admin', 'patch',
+             kwargs=lambda fixtures: {'pk': fixtures.verification_request.pk}, data={'status': 'approved'}),
+    # async read path
+    Scenario('async.jobs.list', 'async-jobs-list'),
+    Scenario('async.jobs.detail', 'async-jobs-detail', kwargs=_id('job')),
+    Scenario('async.notifications.list', 'async-list-notifications', 'applicant'),
+    Scenario('async.my_applications.list', 'async-user-applications-list', 'applicant'),
+]
+
+# sync scenario -> its async counterpart, compared by run_concurrency
+ASYNC_COUNTERPARTS = {
+    'jobs.list': 'async.jobs.list',
+    'jobs.detail': 'async.jobs.detail',
+    'notifications.list': 'async.notifications.list',
+    'my_applications.list': 'async.my_applications.list',
+}
+CONCURRENCY_MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+# list scenarios compared in and out of fast list mode by run_list_modes
+LIST_MODE_SCENARIOS = ('jobs.list', 'my_jobs.list', 'job_applications.list', 'my_applications.list',
+                       'notifications.list')
+LIST_PAGE_SIZES = (10, 50, 100, 500)
+# list scenarios whose queries must be served by indexes, checked by run_query_plans; filtered
+# and searched variants are left out, as filters on a few-valued column read the rows they match
+QUERY_PLAN_SCENARIOS = (
+    'jobs.list', 'jobs.list.cursor', 'jobs.list.deep_page', 'jobs.recommended', 'jobs.similar',
+    'admin.categories.list', 'my_jobs.list', 'job_applications.list', 'job_applications.export',
+    'my_applications.list', 'notifications.list', 'users.list', 'admins.list', 'verification_requests.list',
+    'async.jobs.list', 'async.notifications.list', 'async.my_applications.list',
+)
+# streams that stay open until the client leaves; their latency is not meaningful
+LONG_LIVED_ROUTES = {'stream-notifications'}
+
+
+def _route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+def uncovered_routes(scenarios=SCENARIOS):
+    """Named routes of business.urls and accounts.urls no scenario requests."""
+    from accounts import urls as accounts_urls
+    from business import urls as business_urls
+
+    names = set(_route_names(business_urls.urlpatterns)) | set(_route_names(accounts_urls.urlpatterns))
+    names -= {'api-root'} | LONG_LIVED_ROUTES
+    return sorted(names - {scenario.url_name for scenario in scenarios})
+
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of sorted `values`."""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    low, high = math.floor(position), math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _host():
+    return next(
+        (host for host in settings.ALLOWED_HOSTS if host and '*' not in host and not host.startswith('.')),
+        'localhost',
+    )
+
+
+def run(scenarios=SCENARIOS, iterations=20, warmup=2, warm_cache=False, progress=None):
+    """
+    Request each scenario `warmup + iterations` times.
+
+    Returns a JSON-serializable report with latency percentiles (ms) and the
+    largest SQL query count seen per scenario. Unless `warm_cache` is set,
+    the job board cache is retired before every request, so query counts
+    reflect the work done on a miss.
+    """
+    progress = progress or (lambda message: None)
+    fixtures = Fixtures()
+    client = APIClient(SERVER_NAME=_host())
+    results = {}
+    for scenario in scenarios:
+        path = scenario.path(fixtures)
+        data = scenario.resolve(scenario.data, fixtures)
+        query = scenario.resolve(scenario.query, fixtures)
+        if scenario.actor:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {fixtures.access_token(scenario.actor)}')
+        else:
+            client.credentials()
+
+        timings, queries, statuses = [], [], set()
+        for iteration in range(warmup + iterations):
+            if not warm_cache:
+                job_cache.bump_version()
+            elapsed, count, status_code = _request(client, scenario, path, data, query)
+            if iteration >= warmup:
+                timings.append(elapsed)
+                queries.append(count)
+                statuses.add(status_code)
+
+        timings.sort()
+        results[scenario.name] = {
+            'method': scenario.method.upper(),
+            'path': path,
+            'status': sorted(statuses),
+            'expected_status': scenario.expect,
+            'queries': max(queries),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p90_ms': round(percentile(timings, 0.90), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'max_ms': round(timings[-1], 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+        }
+        progress(f"{scenario.name}: p95 {results[scenario.name]['p95_ms']}ms, "
+                 f"{results[scenario.name]['queries']} queries")
+
+    return {
+        'meta': {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+            'iterations': iterations,
+            'warmup': warmup,
+            'warm_cache': warm_cache,
+            'volumes': {
+                'users': User.objects.count(),
+                'jobs': Jobs.objects.count(),
+                'applications': Applications.objects.count(),
+                'notifications': Notifications.objects.count(),
+            },
+        },
+        'scenarios': results,
+    }
+
+
+def _request(client, scenario, path, data, query):
+    send = getattr(client, scenario.method)
+    if scenario.method == 'get':
+        args, kwargs = (path, query), {}
+    else:
+        args = (path, data)
+        kwargs = {'content_type': scenario.content_type} if scenario.content_type else {'format': 'json'}
+
+    # mutations are rolled back so every iteration sees the same data
+    mutation = scenario.method != 'get'
+    with transaction.atomic() if mutation else nullcontext():
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send(*args, **kwargs)
+            if response.streaming:
+                # streamed bodies are produced, and queried, while being read
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        if mutation:
+            transaction.set_rollback(True)
+    return elapsed, len(captured), response.status_code
+
+
+def run_concurrency(names=tuple(ASYNC_COUNTERPARTS), concurrency=50, requests=500,
+                    modes=CONCURRENCY_MODES, warm_cache=True, progress=None):
+    """
+    Compare the WSGI path with the ASGI paths under concurrent load.
+
+    For each sync scenario in `names`, `requests` GETs are sent with
+    `concurrency` in flight:
+
+        - wsgi: the sync view, one thread per in-flight request
+        - asgi-sync: the sync view through the ASGI handler
+        - asgi-async: the async counterpart through the ASGI handler
+
+    Returns throughput and latency percentiles per scenario and mode.
+    """
+    progress = progress or (lambda message: None)
+    scenarios = {scenario.name: scenario for scenario in SCENARIOS}
+    fixtures = Fixtures()
+    results = {}
+    # the test clients address the app as 'testserver', like Django's test runner does
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for name in names:
+            results[name] = _compare_modes(
+                scenarios[name], scenarios[ASYNC_COUNTERPARTS[name]], fixtures,
+                concurrency, requests, modes, warm_cache, progress,
+            )
+
+    return {
+        'meta': {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+            'concurrency': concurrency,
+            'requests': requests,
+            'warm_cache': warm_cache,
+        },
+        'scenarios': results,
+    }
+
+
+def _compare_modes(scenario, async_scenario, fixtures, concurrency, requests, modes, warm_cache, progress):
+    results = {}
+    for mode in modes:
+        current = async_scenario if mode == 'asgi-async' else scenario
+        path = current.path(fixtures)
+        headers = {}
+        if current.actor:
+            headers['Authorization'] = f'Bearer {fixtures.access_token(current.actor)}'
+        if mode == 'wsgi':
+            timings, statuses, elapsed = _load_threads(path, headers, concurrency, requests, warm_cache)
+        else:
+            timings, statuses, elapsed = asyncio.run(_load_asgi(path, headers, concurrency, requests, warm_cache))
+        timings.sort()
+        results[mode] = {
+            'path': path,
+            'requests': requests,
+            'concurrency': concurrency,
+            'errors': sum(1 for code in statuses if code != current.expect),
+            'seconds': round(elapsed, 3),
+            'throughput_rps': round(requests / elapsed, 1),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+        }
+        progress(f"{scenario.name} [{mode}]: {results[mode]['throughput_rps']} req/s")
+    return results
+
+
+def _load_threads(path, headers, concurrency, requests, warm_cache):
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    results = []
+
+    def worker():
+        client = Client()
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                if not warm_cache:
+                    job_cache.bump_version()
+                started = time.perf_counter()
+                response = client.get(path, headers=headers)
+                timing = (time.perf_counter() - started) * 1000
+                with lock:
+                    results.append((timing, response.status_code))
+        finally:
+            # each worker opened its own database connection
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(min(concurrency, requests))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return [timing for timing, _ in results], [code for _, code in results], elapsed
+
+
+async def _load_asgi(path, headers, concurrency, requests, warm_cache):
+    client = AsyncClient()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send():
+        async with slots:
+            if not warm_cache:
+                job_cache.bump_version()
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(send() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return [timing for timing, _ in results], [code for _, code in results], elapsed
+
+
+@contextmanager
+def _page_size(page_size):
+    """Serve pages of `page_size` rows from every page-number paginator."""
+    previous = PageNumberPagination.page_size
+    PageNumberPagination.page_size = page_size
+    try:
+        yield
+    finally:
+        PageNumberPagination.page_size = previous
+
+
+def run_list_modes(names=LIST_MODE_SCENARIOS, page_sizes=LIST_PAGE_SIZES, iterations=20, warmup=2, progress=None):
+    """
+    Compare the serializer path with fast list mode (see business.fastlist).
+
+    Each list scenario is requested with pages of every size in `page_sizes`,
+    with FAST_LIST_ENABLED off then on and the job board cache retired
+    before every request. Returns latency percentiles per mode, the speedup
+    of the median and whether both modes answered the same bytes.
+    """
+    progress = progress or (lambda message: None)
+    scenarios = {scenario.name: scenario for scenario in SCENARIOS}
+    fixtures = Fixtures()
+    client = APIClient(SERVER_NAME=_host())
+    results = {}
+    for name in names:
+        scenario = scenarios[name]
+        path, query = scenario.path(fixtures), scenario.resolve(scenario.query, fixtures)
+        if scenario.actor:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {fixtures.access_token(scenario.actor)}')
+        else:
+            client.credentials()
+
+        results[name] = {}
+        for page_size in page_sizes:
+            modes, bodies = {}, {}
+            with _page_size(page_size):
+                for mode, fast in (('serializer', False), ('fast', True)):
+                    with override_settings(FAST_LIST_ENABLED=fast):
+                        job_cache.bump_version()
+                        bodies[mode] = client.get(path, query).content
+                        timings = []
+                        for iteration in range(warmup + iterations):
+                            job_cache.bump_version()
+                            elapsed, _, _ = _request(client, scenario, path, None, query)
+                            if iteration >= warmup:
+                                timings.append(elapsed)
+                    timings.sort()
+                    modes[mode] = {
+                        'p50_ms': round(percentile(timings, 0.50), 3),
+                        'p95_ms': round(percentile(timings, 0.95), 3),
+                    }
+            results[name][page_size] = {
+                **modes,
+                'speedup': round(modes['serializer']['p50_ms'] / modes['fast']['p50_ms'], 2),
+                'identical': bodies['serializer'] == bodies['fast'],
+            }
+            progress(f"{name} [{page_size}]: {results[name][page_size]['speedup']}x")
+
+    return {
+        'meta': {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+            'iterations': iterations,
+            'warmup': warmup,
+        },
+        'scenarios': results,
+    }
+
+
+def run_query_plans(names=QUERY_PLAN_SCENARIOS, progress=None):
+    """
+    EXPLAIN every SELECT the scenarios run (see business.queryplans).
+
+    The job board cache is retired before each request, so list queries
+    reach the database. Returns, per scenario, each query with its plan
+    and the plan lines showing a full table scan or a sort.
+    """
+    progress = progress or (lambda message: None)
+    scenarios = {scenario.name: scenario for scenario in SCENARIOS}
+    fixtures = Fixtures()
+    client = APIClient(SERVER_NAME=_host())
+    results = {}
+    for name in names:
+        scenario = scenarios[name]
+        path, query = scenario.path(fixtures), scenario.resolve(scenario.query, fixtures)
+        if scenario.actor:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {fixtures.access_token(scenario.actor)}')
+        else:
+            client.credentials()
+
+        job_cache.bump_version()
+        with CaptureQueriesContext(connection) as captured:
+            _request(client, scenario, path, None, query)
+        results[name] = []
+        for executed in captured.captured_queries:
+            if not queryplans.is_explainable(executed['sql']):
+                continue
+            plan = queryplans.explain(executed['sql'])
+            results[name].append({'sql': executed['sql'], 'plan': plan, 'problems': queryplans.problems(plan)})
+        progress(f"{name}: {sum(bool(result['problems']) for result in results[name])} "
+                 f"of {len(results[name])} queries not served by an index")
+
+    return {
+        'meta': {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+        },
+        'scenarios': results,
+    }
+
+
+def plan_problems(report):
+    """(name, sql, problem lines) of every query of a run_query_plans report not served by an index."""
+    return [
+        (name, result['sql'], result['problems'])
+        for name, results in report['scenarios'].items() for result in results if result['problems']
+    ]
+
+
+def failures(report):
+    """Scenarios that answered with an unexpected status code."""
+    return sorted(
+        name for name, result in report['scenarios'].items()
+        if result['status'] != [result['expected_status']]
+    )
+
+
+def compare(baseline, report, tolerance=0):
+    """
+    Query-count regressions of `report` against `baseline`.
+
+    Returns (name, baseline_queries, queries) for every scenario now running
+    more than `tolerance` extra queries. Scenarios missing from the baseline
+    are not compared.
+    """
+    regressions = []
+    for name, result in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is not None and result['queries'] > previous['queries'] + tolerance:
+            regressions.append((name, previous['queries'], result['queries']))
+    return regressions
@@ -0,0 +1,221 @@
+"""
+Content-addressed blob storage for application documents.
+
+A blob is stored under the SHA-256 digest of its bytes, so a document
+submitted with many applications is stored once, and a digest never
+changes meaning: blobs are immutable and responses built from one can be
+cached by their digest.
+
+The backend is chosen with BLOB_STORAGE_BACKEND:
+
+    - business.blobs.FileSystemBackend (default): files under
+      BLOB_STORAGE_DIR, sharded by the first two byte pairs of the digest
+      (ab/cd/abcd...) so no directory grows too large. Blobs are written
+      to a temporary file and renamed into place, so readers never see a
+      partial one, and read through a memory map.
+    - business.blobs.S3Backend: objects in BLOB_STORAGE_BUCKET of any
+      S3-compatible service (BLOB_STORAGE_ENDPOINT_URL for a non-AWS one),
+      through boto3, with the same key layout under BLOB_STORAGE_PREFIX.
+
+Blobs are never deleted by the application. One written for a transaction
+that rolls back is left behind, harmless, and reused by the next upload of
+the same content.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager, suppress
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BlobNotFound(LookupError):
+    pass
+
+
+def digest_of(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _shard(digest):
+    return f'{digest[:2]}/{digest[2:4]}/{digest}'
+
+
+class FileSystemBackend:
+    """Blobs as files of a local (or shared) directory."""
+
+    def __init__(self, root=None):
+        self.root = str(root or settings.BLOB_STORAGE_DIR)
+
+    def path(self, digest):
+        return os.path.join(self.root, *_shard(digest).split('/'))
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, digest, data):
+        path = self.path(digest)
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(descriptor, 'wb') as handle:
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+            # a concurrent writer of the same digest wrote the same bytes
+            os.replace(temporary, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temporary)
+            raise
+
+    def open(self, digest):
+        """A read-only memory map of the blob, valid inside the block."""
+        try:
+            handle = open(self.path(digest), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+        return _mapped(handle)
+
+    def read(self, digest):
+        with self.open(digest) as data:
+            return data[:]
+
+    def chunks(self, digest, chunk_size=CHUNK_SIZE):
+        return _mapped_chunks(self.open(digest), chunk_size)
+
+
+@contextmanager
+def _mapped(handle):
+    with handle:
+        if not os.fstat(handle.fileno()).st_size:
+            # empty files cannot be mapped
+            yield b''
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _mapped_chunks(blob, chunk_size):
+    with blob as data:
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+
+class S3Backend:
+    """Blobs as objects of an S3-compatible bucket; requires boto3."""
+
+    def __init__(self, bucket=None, endpoint_url=None, prefix=None):
+        import boto3
+
+        self.client = boto3.client('s3', endpoint_url=endpoint_url or getattr(settings, 'BLOB_STORAGE_ENDPOINT_URL', None))
+        self.bucket = bucket or settings.BLOB_STORAGE_BUCKET
+        self.prefix = getattr(settings, 'BLOB_STORAGE_PREFIX', 'blobs/') if prefix is None else prefix
+
+    def key(self, digest):
+        return self.prefix + _shard(digest)
+
+    @staticmethod
+    def _missing(exc):
+        return exc.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def exists(self, digest):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(digest))
+        except ClientError as exc:
+            if self._missing(exc):
+                return False
+            raise
+        return True
+
+    def put(self, digest, data):
+        if not self.exists(digest):
+            self.client.put_object(Bucket=self.bucket, Key=self.key(digest), Body=data)
+
+    def _body(self, digest):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.key(digest))['Body']
+        except ClientError as exc:
+            if self._missing(exc):
+                raise BlobNotFound(digest)
+            raise
+
+    def read(self, digest):
+        body = self._body(digest)
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    def chunks(self, digest, chunk_size=CHUNK_SIZE):
+        return _body_chunks(self._body(digest), chunk_size)
+
+
+def _body_chunks(body, chunk_size):
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'BLOB_STORAGE_BACKEND', 'business.blobs.FileSystemBackend')
+                _backend = import_string(path)()
+    return _backend
+
+
+@receiver(setting_changed)
+def _reset_backend(setting, **kwargs):
+    global _backend
+    if setting.startswith('BLOB_STORAGE_'):
+        _backend = None
+
+
+def put(data):
+    """Store `data`, unless a blob with the same content exists; returns its digest."""
+    digest = digest_of(data)
+    get_backend().put(digest, data)
+    return digest
+
+
+def read(digest):
+    return get_backend().read(digest)
+
+
+def chunks(digest, chunk_size=CHUNK_SIZE):
+    """
+    The blob's bytes in chunks of up to `chunk_size`, read as they are consumed.
+
+    The blob is opened right away, so a missing one raises BlobNotFound
+    here rather than once a response streaming the chunks has started.
+    """
+    return get_backend().chunks(digest, chunk_size)
+
+
+def put_text(text):
+    return put(text.encode('utf-8'))
+
+
+def read_text(digest):
+    return read(digest).decode('utf-8')
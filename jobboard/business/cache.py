@@ -0,0 +1,213 @@
+"""
+Versioned read-through cache for the public job board.
+
+Every cache key embeds a board-wide version number. Saving or deleting a
+job, category or application bumps the version, so entries written before
+the change are never read again and simply expire.
+
+Cold keys are protected against stampedes: the first request takes a short
+lock and fills the entry while concurrent requests wait for it.
+
+`amake_key` and `aread_through` are the same operations for async views.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+CACHE_ALIAS = getattr(settings, 'JOB_BOARD_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'JOB_BOARD_CACHE_TIMEOUT', 300)
+LOCK_TIMEOUT = getattr(settings, 'JOB_BOARD_CACHE_LOCK_TIMEOUT', 10)
+LOCK_WAIT = getattr(settings, 'JOB_BOARD_CACHE_LOCK_WAIT', 2.0)
+LOCK_POLL_INTERVAL = 0.05
+
+KEY_PREFIX = 'jobboard:jobs'
+VERSION_KEY = f'{KEY_PREFIX}:version'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def get_stats():
+    """Hit/miss counters of this process plus the current board version."""
+    with _stats_lock:
+        stats = {event: _stats[event] for event in ('hits', 'misses', 'lock_waits')}
+    stats['version'] = current_version()
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def current_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so an evicted version never re-reads old entries.
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acurrent_version():
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        current_version()
+
+
+def invalidate():
+    """
+    Retire every cached board entry.
+
+    Bumps now, so the writing process never reads its own stale entries, and
+    again after commit, so readers that refilled the cache from the
+    not-yet-committed state are discarded too.
+    """
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def make_key(namespace, request):
+    """
+    Cache key for a request, normalized over its query parameters.
+
+    Parameter order and empty values do not create separate entries. The host
+    is included because paginated responses embed absolute links.
+    """
+    return _key(namespace, request, current_version())
+
+
+async def amake_key(namespace, request):
+    return _key(namespace, request, await acurrent_version())
+
+
+def _key(namespace, request, version):
+    params = sorted(
+        (name, value)
+        for name in request.GET
+        for value in request.GET.getlist(name)
+        if value != ''
+    )
+    raw = f'{request.get_host()}|{request.path}|{urlencode(params)}'
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f'{KEY_PREFIX}:v{version}:{namespace}:{digest}'
+
+
+def read_through(key, producer):
+    """
+    Return the cached value for `key`, computing it with `producer` on a miss.
+
+    Only one caller per key runs the producer; the others wait up to
+    LOCK_WAIT seconds for the entry before computing it themselves.
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        _record('hits')
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = producer()
+            cache.set(key, value, CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        _record('misses')
+        return value
+
+    _record('lock_waits')
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            _record('hits')
+            return value
+    _record('misses')
+    return producer()
+
+
+async def aread_through(key, producer):
+    """`read_through` for async callers; `producer` is a coroutine function."""
+    cache = get_cache()
+    value = await cache.aget(key)
+    if value is not None:
+        _record('hits')
+        return value
+
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = await producer()
+            await cache.aset(key, value, CACHE_TIMEOUT)
+        finally:
+            await cache.adelete(lock_key)
+        _record('misses')
+        return value
+
+    _record('lock_waits')
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value = await cache.aget(key)
+        if value is not None:
+            _record('hits')
+            return value
+    _record('misses')
+    return await producer()
+
+
+class CachedReadMixin:
+    """
+    Serve list and retrieve responses of a public read-only viewset from the
+    job board cache.
+
+    Responses must not depend on the requesting user. The status code and
+    the headers set by the handler (e.g. pagination links) are cached
+    with the data.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response('list', request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response('retrieve', request, super().retrieve, *args, **kwargs)
+
+    def _cached_response(self, action, request, handler, *args, **kwargs):
+        def produce():
+            response = handler(request, *args, **kwargs)
+            return {'status': response.status_code, 'headers': dict(response.items()), 'data': response.data}
+
+        key = make_key(f'{self.cache_namespace}:{action}:response', request)
+        cached = read_through(key, produce)
+        return Response(cached['data'], status=cached['status'], headers=cached['headers'])
@@ -0,0 +1,136 @@
+"""
+Duplicate job postings.
+
+Every saved job carries a fingerprint of its normalised title and
+description (Jobs.compute_fingerprint). The (posted_by, fingerprint) unique
+constraint makes finding a poster's earlier copy of a job a single index
+lookup, and stops two concurrent submissions from both being stored.
+
+JOB_DUPLICATE_POLICY decides what a duplicate submission does:
+    - 'reject' (default): the request fails, naming the existing job.
+    - 'merge': the existing job takes the submitted details and is
+      reactivated; no row is added.
+
+`dedupe` backfills the fingerprint of older rows in streaming batches,
+merging the duplicates it finds into the poster's oldest copy.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import serializers
+from .models import Jobs, Applications
+from . import cache
+
+POLICIES = ('reject', 'merge')
+
+
+def policy():
+    value = getattr(settings, 'JOB_DUPLICATE_POLICY', 'reject')
+    if value not in POLICIES:
+        raise ImproperlyConfigured(f"JOB_DUPLICATE_POLICY must be one of {POLICIES}, not {value!r}.")
+    return value
+
+
+def find(posted_by, title, description, exclude=None):
+    """The poster's job with the same fingerprint, if any."""
+    queryset = Jobs.objects.filter(posted_by=posted_by, fingerprint=Jobs.compute_fingerprint(title, description))
+    if exclude is not None:
+        queryset = queryset.exclude(pk=exclude)
+    return queryset.first()
+
+
+def reject(duplicate):
+    raise serializers.ValidationError({
+        'non_field_errors': ["You have already posted this job."],
+        'duplicate_of': [str(duplicate.pk)],
+    })
+
+
+def resolve(duplicate, validated_data):
+    """Apply JOB_DUPLICATE_POLICY to a submission matching `duplicate`."""
+    if policy() != 'merge':
+        reject(duplicate)
+    for attr, value in validated_data.items():
+        setattr(duplicate, attr, value)
+    duplicate.save()
+    duplicate.merged = True
+    return duplicate
+
+
+def merge_into(original_id, duplicate_ids):
+    """
+    Move applications from duplicate jobs to the original and delete the duplicates.
+
+    Applicants who also applied to the original keep only that application.
+    Returns the number of applications moved.
+    """
+    moved = 0
+    for duplicate_id in duplicate_ids:
+        # one copy at a time, so an applicant of several copies keeps a single application
+        applied = Applications.objects.filter(job_id=original_id).values('user_id')
+        moved += Applications.objects.filter(job_id=duplicate_id).exclude(user_id__in=applied)\
+                                     .update(job_id=original_id)
+    if Jobs.objects.filter(id__in=duplicate_ids, is_active=True).exists():
+        original = Jobs.objects.get(id=original_id)
+        if not original.is_active:
+            # saved, not updated, so the facet rollup follows
+            original.is_active = True
+            original.save(update_fields=['is_active'])
+    Jobs.objects.filter(id__in=duplicate_ids).delete()
+    if moved:
+        # a queryset update sends no post_save
+        cache.invalidate()
+    return moved
+
+
+def dedupe(batch_size=2000, dry_run=False, progress=None):
+    """
+    Fingerprint jobs saved before duplicate detection, merging duplicates.
+
+    Rows are read oldest first in keyset-paginated batches, so the oldest
+    copy of a posting is the one kept, memory stays flat, and each batch
+    commits on its own. With `dry_run` nothing is written.
+
+    Returns counts of fingerprinted, merged and moved-application rows.
+    """
+    summary = {'fingerprinted': 0, 'merged': 0, 'applications_moved': 0}
+    pending = Jobs.objects.filter(fingerprint__isnull=True).order_by('posted_at', 'id')
+    last = None
+    while True:
+        batch = pending
+        if last is not None:
+            batch = batch.filter(Q(posted_at__gt=last[0]) | Q(posted_at=last[0], id__gt=last[1]))
+        rows = list(batch.values_list('id', 'posted_by_id', 'title', 'description', 'posted_at')[:batch_size])
+        if not rows:
+            return summary
+        last = (rows[-1][4], rows[-1][0])
+
+        fingerprints = {job_id: Jobs.compute_fingerprint(title, description) for job_id, _, title, description, _ in rows}
+        kept = {
+            (posted_by, fingerprint): job_id
+            for job_id, posted_by, fingerprint in Jobs.objects.filter(
+                posted_by_id__in={row[1] for row in rows}, fingerprint__in=set(fingerprints.values()),
+            ).values_list('id', 'posted_by_id', 'fingerprint')
+        }
+        fingerprinted, duplicates = [], {}
+        for job_id, posted_by, *_ in rows:
+            key = (posted_by, fingerprints[job_id])
+            if key in kept:
+                duplicates.setdefault(kept[key], []).append(job_id)
+            else:
+                kept[key] = job_id
+                fingerprinted.append(job_id)
+
+        summary['fingerprinted'] += len(fingerprinted)
+        summary['merged'] += sum(len(ids) for ids in duplicates.values())
+        if not dry_run:
+            with transaction.atomic():
+                Jobs.objects.bulk_update(
+                    [Jobs(id=job_id, fingerprint=fingerprints[job_id]) for job_id in fingerprinted],
+                    ['fingerprint'], batch_size=500,
+                )
+                for original_id, duplicate_ids in duplicates.items():
+                    summary['applications_moved'] += merge_into(original_id, duplicate_ids)
+        if progress:
+            progress(summary)
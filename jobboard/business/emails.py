@@ -0,0 +1,168 @@
+"""
+Batched email delivery.
+
+Emails are queued as OutgoingEmails rows and sent by the flush_email_outbox
+Celery task. The task sends a batch over one reused backend connection
+instead of opening a new SMTP/TLS session per message.
+
+A flush is triggered after EMAIL_BATCH_MAX_WAIT seconds, or right away once
+EMAIL_BATCH_SIZE emails are waiting. A periodic beat flush also picks up
+retries. Each message is retried with exponential backoff until it has
+failed EMAIL_MAX_ATTEMPTS times.
+
+A batch is claimed (status 'sending') in a short transaction and sent
+outside of it, so no row stays locked during SMTP round trips; outcomes
+are recorded in a second transaction. A claim expires after
+EMAIL_SEND_LEASE seconds: if the sending process dies, the batch is
+picked up again and at most that batch is sent twice.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutgoingEmails
+
+BATCH_SIZE = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+BATCH_MAX_WAIT = getattr(settings, 'EMAIL_BATCH_MAX_WAIT', 10)
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_MAX_ATTEMPTS', 5)
+RETRY_BACKOFF = getattr(settings, 'EMAIL_RETRY_BACKOFF', 60)
+SEND_LEASE = getattr(settings, 'EMAIL_SEND_LEASE', 300)
+
+QUEUED_KEY = 'jobboard:outbox:queued'
+FLUSH_SCHEDULED_KEY = 'jobboard:outbox:flush-scheduled'
+
+
+def queue_emails(emails):
+    """
+    Add (subject, message, recipient_list) tuples to the outbox.
+
+    Emails without recipients are dropped. The flush is scheduled once the
+    current transaction commits.
+    """
+    rows = [
+        OutgoingEmails(subject=subject, message=message, recipients=list(recipients))
+        for subject, message, recipients in emails
+        if recipients
+    ]
+    if not rows:
+        return []
+    OutgoingEmails.objects.bulk_create(rows)
+    transaction.on_commit(lambda: schedule_flush(len(rows)))
+    return rows
+
+
+def queue_email(subject, message, recipient_list):
+    return queue_emails([(subject, message, recipient_list)])
+
+
+def schedule_flush(queued):
+    """Start a flush now if the batch is full, otherwise once per wait window."""
+    from .tasks import flush_email_outbox
+
+    cache.add(QUEUED_KEY, 0, timeout=None)
+    if cache.incr(QUEUED_KEY, queued) >= BATCH_SIZE:
+        cache.set(QUEUED_KEY, 0, timeout=None)
+        flush_email_outbox.delay()
+    elif cache.add(FLUSH_SCHEDULED_KEY, 1, BATCH_MAX_WAIT):
+        flush_email_outbox.apply_async(countdown=BATCH_MAX_WAIT)
+
+
+def backoff(attempts):
+    return timedelta(seconds=RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def flush_outbox(batch_size=BATCH_SIZE):
+    """
+    Send every due pending email, batch by batch.
+
+    Returns a {'sent': n, 'failed': n, 'retrying': n} summary.
+    """
+    cache.set(QUEUED_KEY, 0, timeout=None)
+    summary = {'sent': 0, 'failed': 0, 'retrying': 0}
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            break
+        for key, value in send_batch(batch).items():
+            summary[key] += value
+        with transaction.atomic():
+            OutgoingEmails.objects.bulk_update(
+                batch, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+            )
+        if len(batch) < batch_size:
+            break
+    return summary
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Mark up to `batch_size` due emails as being sent, and return them.
+
+    Due emails are pending ones whose next attempt has come, and ones whose
+    claim has expired. Claimed emails are skipped by concurrent flushes.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmails.objects.select_for_update(skip_locked=True)
+                                  .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+                                  .order_by('next_attempt_at')[:batch_size]
+        )
+        OutgoingEmails.objects.filter(pk__in=[email.pk for email in batch])\
+                              .update(status='sending', next_attempt_at=now + timedelta(seconds=SEND_LEASE))
+    return batch
+
+
+def send_batch(batch):
+    """Send a batch over a single connection, recording each message's outcome."""
+    summary = {'sent': 0, 'failed': 0, 'retrying': 0}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in batch:
+            summary[record_failure(email, exc)] += 1
+        return summary
+
+    handled = set()
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.message, settings.DEFAULT_FROM_EMAIL,
+                email.recipients, connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                summary[record_failure(email, exc)] += 1
+                handled.add(email.pk)
+                # the session may be unusable after an error; start a fresh one
+                connection.close()
+                connection.open()
+            else:
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                summary['sent'] += 1
+                handled.add(email.pk)
+    except Exception as exc:
+        # reconnecting failed: the rest of the batch waits for a retry
+        for email in batch:
+            if email.pk not in handled:
+                summary[record_failure(email, exc)] += 1
+    finally:
+        connection.close()
+    return summary
+
+
+def record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = str(exc)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+        return 'failed'
+    email.status = 'pending'
+    email.next_attempt_at = timezone.now() + backoff(email.attempts)
+    return 'retrying'
@@ -0,0 +1,57 @@
+"""
+Streaming CSV and NDJSON writers.
+
+Rows are encoded one at a time as the response is consumed, so memory use
+does not depend on how many rows are exported.
+"""
+import csv
+import json
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.fields import DateTimeField
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+_datetime_field = DateTimeField()
+
+
+def _value(value):
+    # same datetime representation as the JSON API
+    if isinstance(value, datetime):
+        return _datetime_field.to_representation(value)
+    return value
+
+
+class _Echo:
+    """File-like object whose write returns the data instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(names, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow([_value(value) for value in row])
+
+
+def stream_ndjson(names, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, map(_value, row)))) + '\n'
+
+
+def convert(rows, converters):
+    """`rows` with each value passed through the converter of its column (None keeps it)."""
+    for row in rows:
+        yield tuple(value if convert is None else convert(value) for value, convert in zip(row, converters))
+
+
+def stream(export_format, names, rows):
+    """Encoded chunks of `rows` (tuples ordered like `names`)."""
+    writer = stream_csv if export_format == 'csv' else stream_ndjson
+    return writer(names, rows)
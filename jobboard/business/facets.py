@@ -0,0 +1,102 @@
+"""
+Facet counts for the job board filters.
+
+The facets are the `filterset_fields` of the public job list. Counts for
+the unfiltered board come from JobFacetCounts, a rollup holding the number
+of jobs for every combination of facet values; it is kept in step by the
+job signals (a create adds one, a delete removes one, an edit that changes
+a facet moves one between combinations), so reading it never touches the
+jobs table. Filtered or searched requests count the matching jobs with a
+single GROUP BY over the same combinations.
+
+Bulk writes that bypass the signals (bulk_create, queryset updates) must
+call `rebuild`, or adjust the rollup themselves.
+"""
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from .models import Jobs, JobFacetCounts
+
+FACETS = ('working_area', 'longevity', 'type', 'category', 'is_active')
+CHOICES = {
+    'working_area': [value for value, _ in Jobs.WORKING_AREA_CHOICES],
+    'longevity': [value for value, _ in Jobs.LONGEVITY_CHOICES],
+    'type': [value for value, _ in Jobs.TYPE_CHOICES],
+}
+# the category facet lists the foreign key value
+COLUMNS = tuple('category_id' if facet == 'category' else facet for facet in FACETS)
+
+
+def key_of(job):
+    """The facet values of a job, as (working_area, longevity, type, category_id, is_active)."""
+    return tuple(getattr(job, column) for column in COLUMNS)
+
+
+def adjust(key, delta):
+    """Add `delta` jobs to the rollup row of a combination of facet values."""
+    lookup = dict(zip(COLUMNS, key))
+    if JobFacetCounts.objects.filter(**lookup).update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            JobFacetCounts.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # created by a concurrent transaction
+        JobFacetCounts.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def move(previous, current):
+    """Move one job from one combination of facet values to another."""
+    if previous != current:
+        adjust(previous, -1)
+        adjust(current, 1)
+
+
+def uncategorize(category_id):
+    """Count the jobs of a category being deleted as uncategorized."""
+    for row in JobFacetCounts.objects.filter(category_id=category_id, count__gt=0)\
+                                     .values_list(*COLUMNS, 'count'):
+        adjust((*row[:3], None, row[4]), row[5])
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute the rollup from the jobs table; returns the number of rows written."""
+    JobFacetCounts.objects.all().delete()
+    rows = Jobs.objects.order_by().values(*COLUMNS).annotate(count=Count('pk'))
+    return len(JobFacetCounts.objects.bulk_create(
+        [JobFacetCounts(**row) for row in rows.iterator()], batch_size=1000,
+    ))
+
+
+def _fold(rows):
+    """Per-facet counts from (facet values..., count) rows."""
+    facets = {facet: defaultdict(int) for facet in FACETS}
+    for facet, values in CHOICES.items():
+        for value in values:
+            facets[facet][value] = 0
+    facets['is_active'].update({'true': 0, 'false': 0})
+    total = 0
+    for *values, count in rows:
+        if not count:
+            continue
+        total += count
+        for facet, value in zip(FACETS, values):
+            if facet == 'category':
+                if value is None:
+                    continue
+                value = str(value)
+            elif facet == 'is_active':
+                value = 'true' if value else 'false'
+            facets[facet][value] += count
+    return {'count': total, 'facets': {facet: dict(counts) for facet, counts in facets.items()}}
+
+
+def board_counts():
+    """Facet counts of the whole board, read from the rollup."""
+    return _fold(JobFacetCounts.objects.filter(count__gt=0).values_list(*COLUMNS, 'count'))
+
+
+def counts(queryset):
+    """Facet counts of the jobs in `queryset`, in one grouped query."""
+    return _fold(queryset.order_by().values_list(*COLUMNS).annotate(count=Count('pk')))
@@ -0,0 +1,230 @@
+"""
+Fast list mode for the high-volume list endpoints.
+
+A list page is normally rendered by building a model instance per row and
+running every serializer field's `to_representation` on it. In fast mode
+the page is read with `.values()` on the columns the serializer declares,
+and a ListPlan turns each row into the response dict: one converter per
+field, chosen once per serializer class from the field's type, with UUIDs
+and datetimes formatted the way the DRF fields format them. No model
+instance or serializer is built per row, and FastJSONRenderer encodes the
+response with orjson.
+
+Responses are the same, byte for byte, as the serializer's. Serializers
+with a field a plan cannot reproduce (nested serializers, dotted sources,
+fields needing the serializer context, method fields without a queryset
+annotation of the same name) keep the normal path. FAST_LIST_ENABLED =
+False turns the mode off.
+"""
+import datetime
+from functools import lru_cache
+import orjson
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+# fields whose representation of a column value is the value itself
+PLAIN_FIELDS = (
+    serializers.CharField, serializers.ChoiceField, serializers.BooleanField,
+    serializers.IntegerField, serializers.ReadOnlyField,
+)
+
+
+def enabled():
+    return getattr(settings, 'FAST_LIST_ENABLED', True)
+
+
+def _bound(convert):
+    """A converter that needs nothing from the request."""
+    return lambda: convert
+
+
+def _datetime(field):
+    """DateTimeField.to_representation, with the time zone resolved once per page."""
+    if (getattr(field, 'format', api_settings.DATETIME_FORMAT) or '').lower() != ISO_8601:
+        return lambda: field.to_representation
+
+    def bind():
+        zone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if zone is None:
+            return field.to_representation
+
+        def convert(value):
+            if not isinstance(value, datetime.datetime) or value.tzinfo is None:
+                return field.to_representation(value)
+            text = value.astimezone(zone).isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+        return convert
+    return bind
+
+
+def _model_column(model, name):
+    """The column of a concrete model field, or None if `name` is not one."""
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    return model_field.attname
+
+
+def _converter(model, field):
+    """A function returning the column converter of a field for one page, or None."""
+    if isinstance(field, serializers.SerializerMethodField):
+        # served from the annotation the method would have returned
+        return _bound(None)
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            return _bound(field.pk_field.to_representation)
+        try:
+            target = model._meta.get_field(field.source).target_field
+        except (FieldDoesNotExist, AttributeError):
+            return None
+        # the renderer writes a UUID primary key as str()
+        return _bound(str if isinstance(target, models.UUIDField) else None)
+    if isinstance(field, serializers.UUIDField):
+        return _bound(str if field.uuid_format == 'hex_verbose' else field.to_representation)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime(field)
+    if isinstance(field, serializers.FloatField):
+        return _bound(float)
+    if isinstance(field, PLAIN_FIELDS):
+        return _bound(None)
+    return None
+
+
+class ListPlan:
+    """
+    How to render the rows of one serializer from `values()` dicts.
+
+    `fields` holds (name, column, converter factory) per readable field, in
+    the serializer's order. Fields read from annotations (method fields
+    included) need them on the queryset, which `supports` checks.
+    """
+
+    def __init__(self, fields, annotations):
+        self.fields = fields
+        self.annotations = annotations
+
+    @classmethod
+    def build(cls, serializer_class):
+        """The plan of a ModelSerializer class, or None if it cannot have one."""
+        meta = getattr(serializer_class, 'Meta', None)
+        model = getattr(meta, 'model', None)
+        if model is None:
+            return None
+        fields, annotations = [], []
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                column = None
+            elif '.' in field.source or field.source == '*':
+                return None
+            else:
+                column = _model_column(model, field.source)
+            if column is None:
+                # an annotation, checked against the queryset
+                column = field.field_name if isinstance(field, serializers.SerializerMethodField) else field.source
+                annotations.append(column)
+            factory = _converter(model, field)
+            if factory is None:
+                return None
+            fields.append((field.field_name, column, factory))
+        return cls(fields, annotations)
+
+    def supports(self, queryset):
+        annotations = queryset.query.annotations
+        return all(column in annotations for column in self.annotations)
+
+    def values(self, queryset, *extra):
+        """The queryset reading the plan's columns, plus `extra` ones, as dicts."""
+        # related objects are read as key columns, so prefetches would only cost queries
+        return queryset.prefetch_related(None).values(*dict.fromkeys([*(column for _, column, _ in self.fields), *extra]))
+
+    def represent(self, rows):
+        """The serializer's representation of `values()` rows."""
+        plan = [(name, column, factory()) for name, column, factory in self.fields]
+        results = []
+        for row in rows:
+            item = {}
+            for name, column, convert in plan:
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            results.append(item)
+        return results
+
+
+@lru_cache(maxsize=None)
+def _plan(serializer_class):
+    return ListPlan.build(serializer_class)
+
+
+def get_plan(serializer_class, queryset):
+    """The plan rendering `queryset` with `serializer_class`, or None for the normal path."""
+    if not enabled():
+        return None
+    plan = _plan(serializer_class)
+    return plan if plan is not None and plan.supports(queryset) else None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, with the same output.
+
+    Values orjson does not write natively (datetimes, lazy strings...) go
+    through DRF's encoder; data orjson refuses (non-string keys, integers
+    beyond 64 bits), indented output and non-default JSON settings are
+    rendered by JSONRenderer. orjson writes some floats differently from
+    json ('1e16', not '1e+16'), so views using it must not return floats.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # escaped like JSONRenderer, so the output is a strict javascript subset
+        return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastListMixin:
+    """
+    Serve `list` in fast list mode when the serializer has a plan, and
+    render JSON with FastJSONRenderer.
+
+    Keyset pagination reads its position columns from the same rows.
+    """
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not enabled():
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = get_plan(self.get_serializer_class(), queryset)
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        keyset = [field.lstrip('-') for field in getattr(self.paginator, 'keyset', ())]
+        queryset = plan.values(queryset, *keyset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.represent(page))
+        return Response(plan.represent(queryset))
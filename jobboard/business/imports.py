@@ -0,0 +1,234 @@
+"""
+Bulk job import from CSV or NDJSON streams.
+
+Rows are read lazily and handled in batches of `batch_size`:
+
+    - every row is validated by one JobImportSerializer instance, so field
+      set-up is paid once per import rather than once per row;
+    - category names are resolved with one query per batch, and duplicates
+      of the poster's jobs (see business.duplicates) with another;
+    - valid rows are inserted with one bulk_create, and the poster's
+      jobs_posted counter is incremented once.
+
+bulk_create sends no signals, so each batch feeds the search index, the
+facet rollup, the job board cache and the similar-jobs index itself; new
+jobs reach recommendations through the periodic fold-in. Each batch
+commits on its own and invalid rows are reported, not fatal: an import
+stops only when the stream cannot be read (bytes that are not UTF-8, a
+malformed CSV record). The rows read until then are still imported, and
+the report names the row the stream broke at.
+"""
+import codecs
+import csv
+import json
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from rest_framework import serializers
+from rest_framework.parsers import BaseParser
+from .models import Categories, Jobs
+from . import cache, facets, poster_stats, search, similarity
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+BATCH_SIZE = 500
+# row errors kept in the report; later ones are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_csv(lines):
+    """(row number, row) pairs of CSV lines with a header line; empty cells are omitted."""
+    reader = csv.DictReader(lines)
+    for number, row in enumerate(reader, start=2):
+        yield number, {name: value for name, value in row.items() if name and value not in ('', None)}
+
+
+def read_ndjson(lines):
+    """(row number, row) pairs of NDJSON lines; blank lines are skipped."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = exc
+        yield number, row
+
+
+def guess_format(name):
+    """Import format of a file name, from its extension."""
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    return {'jsonl': 'ndjson'}.get(extension, extension) if extension in (*FORMATS, 'jsonl') else None
+
+
+class StreamParser(BaseParser):
+    """
+    Hands the request body of an import to the view unread, as the 'file'
+    item of request.data, so rows are consumed as they arrive.
+    """
+    import_format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {'file': stream, 'import_format': self.import_format}
+
+
+class CSVStreamParser(StreamParser):
+    media_type = FORMATS['csv']
+    import_format = 'csv'
+
+
+class NDJSONStreamParser(StreamParser):
+    media_type = FORMATS['ndjson']
+    import_format = 'ndjson'
+
+
+def decode_lines(stream):
+    """
+    Lines of a UTF-8 encoded binary stream, decoded one at a time, so that
+    bytes that are not UTF-8 stop the stream at their own line.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    for line in stream:
+        yield decoder.decode(line)
+    decoder.decode(b'', final=True)
+
+
+def read(stream, import_format):
+    """Rows of a UTF-8 encoded binary stream in the given format."""
+    if import_format not in FORMATS:
+        raise ValueError(f"import_format must be one of {sorted(FORMATS)}.")
+    lines = decode_lines(stream)
+    return read_csv(lines) if import_format == 'csv' else read_ndjson(lines)
+
+
+class JobImporter:
+    def __init__(self, user, batch_size=BATCH_SIZE):
+        from .serializers import JobImportSerializer
+
+        self.user = user
+        self.batch_size = batch_size
+        self.serializer = JobImportSerializer()
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, rows):
+        """Import (row number, row) pairs; returns the report."""
+        batch = []
+        last = 0
+        try:
+            for row in rows:
+                last = row[0]
+                batch.append(row)
+                if len(batch) == self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+        except (UnicodeDecodeError, csv.Error) as exc:
+            # reported even past MAX_REPORTED_ERRORS: it explains why the import stopped
+            self.error_count += 1
+            self.errors.append({'row': last + 1, 'errors': {
+                'non_field_errors': [f"The file cannot be read from this row on: {exc}"],
+            }})
+        if batch:
+            self.import_batch(batch)
+        return self.report()
+
+    def report(self):
+        return {'created': self.created, 'failed': self.error_count, 'errors': self.errors}
+
+    def error(self, number, detail):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': detail})
+
+    def validate(self, batch):
+        """(row number, validated data) of the valid rows; the others are reported."""
+        valid = []
+        for number, row in batch:
+            if isinstance(row, ValueError):
+                self.error(number, {'non_field_errors': [f"Invalid JSON: {row}"]})
+                continue
+            if not isinstance(row, dict):
+                self.error(number, {'non_field_errors': ["Row is not a JSON object."]})
+                continue
+            try:
+                valid.append((number, self.serializer.run_validation(row)))
+            except serializers.ValidationError as exc:
+                self.error(number, exc.detail)
+        return valid
+
+    def resolve_categories(self, valid):
+        names = {data['category'].lower() for _, data in valid if data.get('category')}
+        if not names:
+            return valid
+        categories = dict(Categories.objects.annotate(key=Lower('name')).filter(key__in=names)
+                                            .values_list('key', 'id'))
+        resolved = []
+        for number, data in valid:
+            name = data.pop('category', None)
+            if name:
+                if name.lower() not in categories:
+                    self.error(number, {'category': [f"Unknown category '{name}'."]})
+                    continue
+                data['category_id'] = categories[name.lower()]
+            resolved.append((number, data))
+        return resolved
+
+    def drop_duplicates(self, valid):
+        """Rows that are not a copy of another job of the poster, fingerprinted."""
+        for _, data in valid:
+            data['fingerprint'] = Jobs.compute_fingerprint(data['title'], data['description'])
+        posted = dict(Jobs.objects.filter(posted_by=self.user, fingerprint__in={data['fingerprint'] for _, data in valid})
+                                  .values_list('fingerprint', 'id'))
+        seen, unique = {}, []
+        for number, data in valid:
+            if data['fingerprint'] in posted:
+                self.error(number, {
+                    'non_field_errors': ["You have already posted this job."],
+                    'duplicate_of': [str(posted[data['fingerprint']])],
+                })
+            elif data['fingerprint'] in seen:
+                self.error(number, {'non_field_errors': [f"Duplicate of row {seen[data['fingerprint']]}."]})
+            else:
+                seen[data['fingerprint']] = number
+                unique.append((number, data))
+        return unique
+
+    def import_batch(self, batch):
+        valid = self.drop_duplicates(self.resolve_categories(self.validate(batch)))
+        if not valid:
+            return
+        jobs = [Jobs(posted_by=self.user, **data) for _, data in valid]
+        try:
+            with transaction.atomic():
+                Jobs.objects.bulk_create(jobs)
+                self.inserted(jobs)
+        except IntegrityError:
+            # a concurrent request posted one of these jobs; fall back to one insert per row
+            for (number, _), job in zip(valid, jobs):
+                try:
+                    with transaction.atomic():
+                        job.save(force_insert=True)
+                except IntegrityError:
+                    self.error(number, {'non_field_errors': ["You have already posted this job."]})
+                else:
+                    self.created += 1
+            return
+        self.created += len(jobs)
+
+    def inserted(self, jobs):
+        """What the Jobs signals would have done for each job, once for the batch."""
+        job_ids = [job.id for job in jobs]
+        search.index_jobs(job_ids)
+        for key, count in Counter(facets.key_of(job) for job in jobs).items():
+            facets.adjust(key, count)
+        cache.invalidate()
+        transaction.on_commit(lambda: similarity.index_jobs(job_ids), robust=True)
+        poster_stats.add_jobs_posted(self.user.pk, len(jobs))
+
+
+def import_jobs(user, stream, import_format, batch_size=BATCH_SIZE):
+    """Import the jobs of a CSV or NDJSON stream as posted by `user`; returns the report."""
+    return JobImporter(user, batch_size).run(read(stream, import_format))
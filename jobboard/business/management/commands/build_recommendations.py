@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from business import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's recommended jobs, or fold newly posted jobs into them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fold-in', action='store_true',
+                            help="Only add jobs posted since the last run to the existing recommendations.")
+
+    def handle(self, *args, **options):
+        if options['fold_in']:
+            summary = recommendations.fold_in()
+            self.stdout.write(self.style.SUCCESS(
+                f"Folded in {summary['jobs']} jobs, updating {summary['users']} users."
+            ))
+            return
+
+        summary = recommendations.rebuild(
+            progress=lambda users: self.stdout.write(f"{users} users") if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {summary['recommendations']} recommendations for {summary['users']} users "
+            f"from {summary['jobs']} jobs."
+        ))
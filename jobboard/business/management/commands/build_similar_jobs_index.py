@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from business import similarity
+
+
+class Command(BaseCommand):
+    help = "Rebuild the similar-jobs index from every job, or compact the existing one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compact', action='store_true',
+                            help="Only drop stale records and re-sort recently added jobs.")
+
+    def handle(self, *args, **options):
+        index = similarity.get_index()
+        if options['compact']:
+            index.compact()
+        else:
+            similarity.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Similar-jobs index holds {index.size()} jobs."))
@@ -0,0 +1,39 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from business import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the queries of every list route against the benchmark data and fail if one "
+        "needs a full table scan or a sort that an index should have avoided."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', action='append', choices=benchmarks.QUERY_PLAN_SCENARIOS,
+                            help="Only check these scenarios (repeatable).")
+        parser.add_argument('--output', help="Write the JSON report, with every plan, to this file.")
+
+    def handle(self, *args, **options):
+        if not benchmarks.is_seeded():
+            raise CommandError("No benchmark data found; run seed_benchmark_data first.")
+
+        report = benchmarks.run_query_plans(
+            options['only'] or benchmarks.QUERY_PLAN_SCENARIOS,
+            progress=lambda message: self.stdout.write(message) if options['verbosity'] > 1 else None,
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        problems = benchmarks.plan_problems(report)
+        for name, sql, lines in problems:
+            self.stdout.write(f"{name}: {sql}")
+            for line in lines:
+                self.stdout.write(f"    {line}")
+        if problems:
+            raise CommandError("Queries not served by an index: "
+                               + ', '.join(sorted({name for name, _, _ in problems})))
+        self.stdout.write(f"All queries of {len(report['scenarios'])} list routes are served by indexes.")
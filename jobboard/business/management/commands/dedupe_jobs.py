@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from business import duplicates
+
+
+class Command(BaseCommand):
+    help = "Fingerprint existing jobs and merge each poster's duplicate postings into the oldest copy."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing.")
+
+    def handle(self, *args, **options):
+        summary = duplicates.dedupe(
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+            progress=lambda summary: self.stdout.write(str(summary)) if options['verbosity'] > 1 else None,
+        )
+        if options['dry_run']:
+            self.stdout.write(
+                f"Would fingerprint {summary['fingerprinted']} jobs and merge {summary['merged']} duplicates."
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Fingerprinted {summary['fingerprinted']} jobs and merged {summary['merged']} duplicates "
+            f"({summary['applications_moved']} applications moved)."
+        ))
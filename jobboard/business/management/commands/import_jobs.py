@@ -0,0 +1,36 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from business import imports
+
+
+class Command(BaseCommand):
+    help = "Import jobs from a CSV or NDJSON file as posted by the given user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for standard input.")
+        parser.add_argument('--user', required=True, help="Email of the poster.")
+        parser.add_argument('--format', dest='import_format', choices=sorted(imports.FORMATS),
+                            help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}.")
+        if not user.can_post_ajob:
+            raise CommandError(f"{user} is not allowed to post jobs.")
+        import_format = options['import_format'] or imports.guess_format(options['path'])
+        if import_format is None:
+            raise CommandError("Cannot tell the format of the file; pass --format.")
+
+        if options['path'] == '-':
+            report = imports.import_jobs(user, sys.stdin.buffer, import_format, options['batch_size'])
+        else:
+            with open(options['path'], 'rb') as stream:
+                report = imports.import_jobs(user, stream, import_format, options['batch_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Created {report['created']} jobs, {report['failed']} rows failed."))
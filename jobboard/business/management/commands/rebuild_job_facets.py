@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from business import facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the job facet rollup from the jobs table (after bulk writes that bypass signals)."
+
+    def handle(self, *args, **options):
+        rows = facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Job facet rollup holds {rows} combinations."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from business import poster_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's jobs_posted and number_of_hires from the jobs and applications tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        summary = poster_stats.reconcile(
+            batch_size=options['batch_size'],
+            progress=lambda summary: self.stdout.write(str(summary)) if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {summary['users']} users, corrected {summary['corrected']}."
+        ))
@@ -0,0 +1,45 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from business import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI path with the async read path: send concurrent requests to the "
+        "public job and per-user feed endpoints and report throughput and latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--mode', action='append', choices=benchmarks.CONCURRENCY_MODES,
+                            help="Only run these modes (repeatable).")
+        parser.add_argument('--only', action='append', choices=sorted(benchmarks.ASYNC_COUNTERPARTS),
+                            help="Only run these scenarios (repeatable).")
+        parser.add_argument('--cold-cache', action='store_true',
+                            help="Retire the job board cache before every request.")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if not benchmarks.is_seeded():
+            raise CommandError("No benchmark data found; run seed_benchmark_data first.")
+
+        report = benchmarks.run_concurrency(
+            options['only'] or tuple(benchmarks.ASYNC_COUNTERPARTS),
+            concurrency=options['concurrency'], requests=options['requests'],
+            modes=options['mode'] or benchmarks.CONCURRENCY_MODES, warm_cache=not options['cold_cache'],
+            progress=lambda message: self.stdout.write(message) if options['verbosity'] > 1 else None,
+        )
+
+        self.stdout.write(f"{'scenario':<24} {'mode':<11} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>6}")
+        for name, modes in report['scenarios'].items():
+            for mode, result in modes.items():
+                self.stdout.write(
+                    f"{name:<24} {mode:<11} {result['throughput_rps']:>9.1f} {result['p50_ms']:>9.2f} "
+                    f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>6}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
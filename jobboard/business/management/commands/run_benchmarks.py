@@ -0,0 +1,65 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from business import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every API route against the seeded benchmark data, reporting latency "
+        "percentiles and SQL query counts. Fails on query-count regressions against --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', action='append', default=[],
+                            help="Run scenarios whose name starts with this prefix (repeatable).")
+        parser.add_argument('--warm-cache', action='store_true',
+                            help="Let the job board cache serve repeated reads instead of missing every time.")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--baseline', help="JSON report to compare query counts against.")
+        parser.add_argument('--tolerance', type=int, default=0,
+                            help="Extra queries per scenario allowed before failing.")
+
+    def handle(self, *args, **options):
+        if not benchmarks.is_seeded():
+            raise CommandError("No benchmark data found; run seed_benchmark_data first.")
+
+        scenarios = benchmarks.SCENARIOS
+        if options['only']:
+            scenarios = [s for s in scenarios if s.name.startswith(tuple(options['only']))]
+
+        report = benchmarks.run(
+            scenarios, iterations=options['iterations'], warmup=options['warmup'],
+            warm_cache=options['warm_cache'],
+            progress=lambda message: self.stdout.write(message) if options['verbosity'] > 1 else None,
+        )
+        self.print_report(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        errors = []
+        failed = benchmarks.failures(report)
+        if failed:
+            errors.append("Unexpected status codes: " + ', '.join(failed))
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = benchmarks.compare(json.load(baseline), report, options['tolerance'])
+            errors.extend(
+                f"{name}: {current} queries (baseline {previous})" for name, previous, current in regressions
+            )
+        if errors:
+            raise CommandError("Benchmark failed:\n" + '\n'.join(errors))
+
+    def print_report(self, report):
+        header = f"{'scenario':<36} {'status':>6} {'queries':>7} {'p50':>9} {'p95':>9} {'p99':>9}"
+        self.stdout.write(header)
+        for name, result in report['scenarios'].items():
+            status = ','.join(str(code) for code in result['status'])
+            self.stdout.write(
+                f"{name:<36} {status:>6} {result['queries']:>7} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+            )
@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from business import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the serializer path with fast list mode on the high-volume list endpoints, "
+        "per page size, reporting latency percentiles and whether the responses are identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--page-size', type=int, action='append',
+                            help="Page sizes to compare (repeatable).")
+        parser.add_argument('--only', action='append', choices=benchmarks.LIST_MODE_SCENARIOS,
+                            help="Only run these scenarios (repeatable).")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if not benchmarks.is_seeded():
+            raise CommandError("No benchmark data found; run seed_benchmark_data first.")
+
+        report = benchmarks.run_list_modes(
+            options['only'] or benchmarks.LIST_MODE_SCENARIOS,
+            page_sizes=options['page_size'] or benchmarks.LIST_PAGE_SIZES,
+            iterations=options['iterations'], warmup=options['warmup'],
+            progress=lambda message: self.stdout.write(message) if options['verbosity'] > 1 else None,
+        )
+
+        self.stdout.write(f"{'scenario':<24} {'page':>5} {'serializer':>11} {'fast':>9} {'speedup':>8} {'identical':>9}")
+        for name, page_sizes in report['scenarios'].items():
+            for page_size, result in page_sizes.items():
+                self.stdout.write(
+                    f"{name:<24} {page_size:>5} {result['serializer']['p50_ms']:>11.2f} "
+                    f"{result['fast']['p50_ms']:>9.2f} {result['speedup']:>7.2f}x {str(result['identical']):>9}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        different = sorted(name for name, page_sizes in report['scenarios'].items()
+                           if not all(result['identical'] for result in page_sizes.values()))
+        if different:
+            raise CommandError("Fast list responses differ: " + ', '.join(different))
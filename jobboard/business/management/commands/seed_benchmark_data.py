@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from business import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Fill the database with generated job board data for run_benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(benchmarks.SCALES), default='small',
+                            help="Preset volumes; 'full' seeds 1M jobs and 10M applications.")
+        for name in ('users', 'categories', 'jobs', 'applications', 'notifications'):
+            parser.add_argument(f'--{name}', type=int, help=f"Override the number of {name}.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable data.")
+
+    def handle(self, *args, **options):
+        if benchmarks.is_seeded():
+            raise CommandError("Benchmark data is already present; seed a fresh database.")
+
+        volumes = dict(benchmarks.SCALES[options['scale']])
+        for name in volumes:
+            if options[name] is not None:
+                volumes[name] = options[name]
+
+        with transaction.atomic():
+            created = benchmarks.seed(
+                volumes, batch_size=options['batch_size'], random_seed=options['seed'],
+                progress=lambda message: self.stdout.write(message) if options['verbosity'] > 1 else None,
+            )
+        summary = ', '.join(f'{count} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:03
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Build the full-text index for the current backend and fill it
+    with existing jobs.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX business_jobs_search_gin ON business_jobs USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE business_jobs SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE business_jobs_fts USING fts5("
+            "job_id UNINDEXED, title, description, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO business_jobs_fts (job_id, title, description) "
+            "SELECT id, title, description FROM business_jobs"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS business_jobs_search_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS business_jobs_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0004_alter_jobs_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobs',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='description',
+            field=models.TextField(),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0005_jobs_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applications',
+            index=models.Index(fields=['job', '-applied_at', '-id'], name='app_job_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applications',
+            index=models.Index(fields=['user', '-applied_at', '-id'], name='app_user_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobs',
+            index=models.Index(fields=['-posted_at', '-id'], name='jobs_posted_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notifications',
+            index=models.Index(fields=['recipient', 'is_read', '-created_at', '-id'], name='notif_recipient_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_verificationrequest'),
+        ('business', '0008_notifications_retention_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationProfiles',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation_profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('features', models.BinaryField()),
+                ('threshold', models.FloatField(default=0)),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecommendationState',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('idf', models.BinaryField()),
+                ('jobs_count', models.PositiveIntegerField(default=0)),
+                ('built_at', models.DateTimeField()),
+                ('folded_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobRecommendations',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('built_at', models.DateTimeField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='business.jobs')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['built_at'], name='jobrec_built_at_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'rank'), name='jobrec_user_rank_uniq')],
+            },
+        ),
+    ]
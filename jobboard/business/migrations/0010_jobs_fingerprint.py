@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0009_job_recommendations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobs',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='jobs',
+            constraint=models.UniqueConstraint(fields=('posted_by', 'fingerprint'), name='jobs_poster_fingerprint_uniq'),
+        ),
+    ]
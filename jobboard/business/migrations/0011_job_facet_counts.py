@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facet_counts(apps, schema_editor):
+    """Roll up the existing jobs (see business.facets.rebuild)."""
+    Jobs = apps.get_model('business', 'Jobs')
+    JobFacetCounts = apps.get_model('business', 'JobFacetCounts')
+    db = schema_editor.connection.alias
+    rows = Jobs.objects.using(db).order_by()\
+               .values('working_area', 'longevity', 'type', 'category_id', 'is_active').annotate(count=Count('pk'))
+    JobFacetCounts.objects.using(db).bulk_create([JobFacetCounts(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0010_jobs_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFacetCounts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('working_area', models.CharField(choices=[('onsite', 'Onsite'), ('remote', 'Remote'), ('hybrid', 'Hybrid')], max_length=20)),
+                ('longevity', models.CharField(choices=[('contractual', 'Contractual'), ('permanent', 'Permanent')], max_length=15)),
+                ('type', models.CharField(choices=[('full-time', 'Full-Time'), ('part-time', 'Part-Time')], max_length=15)),
+                ('is_active', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='business.categories')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('working_area', 'longevity', 'type', 'category', 'is_active'), name='jobfacet_key_uniq'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('working_area', 'longevity', 'type', 'is_active'), name='jobfacet_uncategorized_key_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_facet_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:03
+
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 1000
+PREVIEW_LENGTH = 300
+
+
+def _batches(queryset, fields):
+    """Rows of `queryset` in primary key order, BATCH_SIZE at a time."""
+    last = None
+    while True:
+        rows = queryset.order_by('pk')
+        if last is not None:
+            rows = rows.filter(pk__gt=last)
+        rows = list(rows.only('pk', *fields)[:BATCH_SIZE])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1].pk
+
+
+def move_resumes(apps, schema_editor):
+    """
+    Store the resume of every application as a blob (see business.blobs).
+
+    Each batch commits on its own and moved rows are skipped, so an
+    interrupted run carries on where it stopped.
+    """
+    from business import blobs
+
+    Applications = apps.get_model('business', 'Applications')
+    db = schema_editor.connection.alias
+    pending = Applications.objects.using(db).filter(resume_digest__isnull=True)
+    for batch in _batches(pending, ['resume']):
+        for application in batch:
+            application.resume_digest = blobs.put_text(application.resume)
+            application.resume_preview = application.resume[:PREVIEW_LENGTH]
+            application.resume_length = len(application.resume)
+        with transaction.atomic(using=db):
+            Applications.objects.using(db).bulk_update(batch, ['resume_digest', 'resume_preview', 'resume_length'])
+
+
+def restore_resumes(apps, schema_editor):
+    from business import blobs
+
+    Applications = apps.get_model('business', 'Applications')
+    db = schema_editor.connection.alias
+    pending = Applications.objects.using(db).filter(resume='', resume_digest__isnull=False)
+    for batch in _batches(pending, ['resume_digest']):
+        for application in batch:
+            application.resume = blobs.read_text(application.resume_digest)
+        with transaction.atomic(using=db):
+            Applications.objects.using(db).bulk_update(batch, ['resume'])
+
+
+class Migration(migrations.Migration):
+    # resumes are moved in batches that commit on their own
+    atomic = False
+
+    dependencies = [
+        ('business', '0011_job_facet_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applications',
+            name='resume_digest',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='applications',
+            name='resume_length',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='applications',
+            name='resume_preview',
+            field=models.CharField(blank=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(move_resumes, restore_resumes),
+        migrations.AlterField(
+            model_name='applications',
+            name='resume_digest',
+            field=models.CharField(editable=False, max_length=64),
+        ),
+        # lets the column be added back, empty, when migrating backwards
+        migrations.AlterField(
+            model_name='applications',
+            name='resume',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RemoveField(
+            model_name='applications',
+            name='resume',
+        ),
+    ]
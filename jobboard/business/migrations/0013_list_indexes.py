@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0012_applications_resume_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='categories',
+            index=models.Index(fields=['created_at'], name='category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobs',
+            index=models.Index(fields=['posted_by', '-posted_at', '-id'], name='jobs_poster_posted_idx'),
+        ),
+        # the new indexes are built before the ones they replace are dropped
+        migrations.AlterField(
+            model_name='applications',
+            name='job',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='business.jobs'),
+        ),
+        migrations.AlterField(
+            model_name='applications',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='pending', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='applications',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='user_applications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='longevity',
+            field=models.CharField(choices=[('contractual', 'Contractual'), ('permanent', 'Permanent')], max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='posted_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='posted_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='posted_jobs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='title',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='type',
+            field=models.CharField(choices=[('full-time', 'Full-Time'), ('part-time', 'Part-Time')], max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='jobs',
+            name='working_area',
+            field=models.CharField(choices=[('onsite', 'Onsite'), ('remote', 'Remote'), ('hybrid', 'Hybrid')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='notifications',
+            name='recipient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
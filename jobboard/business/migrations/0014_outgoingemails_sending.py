@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0013_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outgoingemails',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
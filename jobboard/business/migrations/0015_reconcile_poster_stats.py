@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:40
+
+from django.db import migrations, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 5000
+
+
+def _count(queryset, field):
+    """Correlated COUNT of `queryset` rows whose `field` is the outer user."""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by()\
+                     .values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_poster_stats(apps, schema_editor):
+    """
+    Fill jobs_posted and number_of_hires, which nothing kept up to date
+    before business.poster_stats, from the jobs and applications tables
+    (see poster_stats.reconcile).
+
+    Users are walked in primary key order, each batch one UPDATE committed
+    on its own.
+    """
+    User = apps.get_model('accounts', 'User')
+    Jobs = apps.get_model('business', 'Jobs')
+    Applications = apps.get_model('business', 'Applications')
+    db = schema_editor.connection.alias
+    jobs_posted = _count(Jobs.objects.using(db), 'posted_by')
+    hires = _count(Applications.objects.using(db).filter(status__iexact='accepted'), 'job__posted_by')
+    last = None
+    while True:
+        users = User.objects.using(db).order_by('pk')
+        if last is not None:
+            users = users.filter(pk__gt=last)
+        batch = list(users.values_list('pk', flat=True)[:BATCH_SIZE])
+        if not batch:
+            return
+        last = batch[-1]
+        with transaction.atomic(using=db):
+            stale = User.objects.using(db).filter(pk__in=batch)\
+                                .annotate(actual_jobs_posted=jobs_posted, actual_hires=hires)\
+                                .exclude(jobs_posted=F('actual_jobs_posted'), number_of_hires=F('actual_hires'))\
+                                .values_list('pk', flat=True)
+            User.objects.using(db).filter(pk__in=list(stale)).update(jobs_posted=jobs_posted, number_of_hires=hires)
+
+
+class Migration(migrations.Migration):
+    # users are corrected in batches that commit on their own
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0007_list_indexes'),
+        ('business', '0014_outgoingemails_sending'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconcile_poster_stats, migrations.RunPython.noop),
+    ]
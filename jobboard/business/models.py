@@ -1,8 +1,65 @@
+import hashlib
+import re
+import unicodedata
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Length, Substr
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
 from accounts.models import User
+from . import blobs
 # Create your models here.
 
+def _count_subquery(queryset, field):
+    """
+    Correlated COUNT over `queryset` grouped by `field`, for use in annotations.
+
+    Evaluated per returned row, so a paginated page never counts more than
+    the rows it shows.
+    """
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by()\
+                     .values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+FINGERPRINT_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class CategoriesQuerySet(models.QuerySet):
+    def with_jobs_count(self):
+        """Annotate each category with its number of jobs ('jobs_count')."""
+        return self.annotate(jobs_count=_count_subquery(Jobs.objects.all(), 'category'))
+
+
+class JobsQuerySet(models.QuerySet):
+    def with_applications_count(self):
+        """Annotate each job with its number of applications ('applications_count')."""
+        return self.annotate(applications_count=_count_subquery(Applications.objects.all(), 'job'))
+
+
+# characters of the resume and cover letter shown in application lists
+PREVIEW_LENGTH = 300
+
+
+class ApplicationsQuerySet(models.QuerySet):
+    def summaries(self):
+        """
+        Defer the cover letter, annotating its first PREVIEW_LENGTH characters
+        ('cover_letter_preview'), and whether the resume and cover letter are
+        longer than their previews ('resume_truncated', 'cover_letter_truncated').
+
+        The text is cut by the database, so rows stay small however long
+        the documents are; the resume preview is a column of its own.
+        """
+        return self.defer('cover_letter').annotate(
+            resume_truncated=GreaterThan(F('resume_length'), PREVIEW_LENGTH),
+            cover_letter_preview=Substr('cover_letter', 1, PREVIEW_LENGTH),
+            cover_letter_truncated=GreaterThan(Length('cover_letter'), PREVIEW_LENGTH),
+        )
+
+
 class Categories(models.Model):
     """
     Represents a job category/industry.
@@ -13,6 +70,14 @@ class Categories(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CategoriesQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # the category list is ordered by creation
+            models.Index(fields=['created_at'], name='category_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -34,24 +99,79 @@ class Jobs(models.Model):
         ('part-time', 'Part-Time')
     ]
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    title = models.CharField(max_length=100, blank=False, null=False, db_index=True)
-    description = models.TextField(blank=False, null=False, db_index=True)
+    title = models.CharField(max_length=100, blank=False, null=False)
+    description = models.TextField(blank=False, null=False)
     location =  models.CharField(max_length=100, blank=True, null=True)
-    working_area = models.CharField(max_length=20, choices=WORKING_AREA_CHOICES, db_index=True)
-    longevity = models.CharField(max_length=15, choices=LONGEVITY_CHOICES, db_index=True)
-    type = models.CharField(max_length=15, choices=TYPE_CHOICES, db_index=True)
+    working_area = models.CharField(max_length=20, choices=WORKING_AREA_CHOICES)
+    longevity = models.CharField(max_length=15, choices=LONGEVITY_CHOICES)
+    type = models.CharField(max_length=15, choices=TYPE_CHOICES)
     category = models.ForeignKey(Categories, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
-    posted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posted_jobs')
-    posted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # indexed by jobs_poster_posted_idx
+    posted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posted_jobs', db_index=False)
+    posted_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    is_active = models.BooleanField(default=True, db_index=True)
-    
+    is_active = models.BooleanField(default=True)
+    # full-text search document, maintained by business.search (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # normalised title + description digest, for duplicate detection (see business.duplicates)
+    fingerprint = models.CharField(max_length=32, null=True, blank=True, editable=False)
+
+    objects = JobsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the public job feed
+            models.Index(fields=['-posted_at', '-id'], name='jobs_posted_at_id_idx'),
+            # a poster's jobs, newest first
+            models.Index(fields=['posted_by', '-posted_at', '-id'], name='jobs_poster_posted_idx'),
+        ]
+        constraints = [
+            # one copy of a posting per poster; also the index duplicate lookups use
+            models.UniqueConstraint(fields=['posted_by', 'fingerprint'], name='jobs_poster_fingerprint_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.id})" 
 
+    @staticmethod
+    def compute_fingerprint(title, description):
+        """Digest of the title and description, ignoring case, punctuation and spacing."""
+        text = unicodedata.normalize('NFKC', f'{title}\n{description}').casefold()
+        normalised = ' '.join(FINGERPRINT_WORD_RE.findall(text))
+        return hashlib.blake2b(normalised.encode(), digest_size=16).hexdigest()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_text = (instance.__dict__.get('title'), instance.__dict__.get('description'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the fingerprint in step with the title and description.
+
+        It is only recomputed when the text changed since the row was
+        loaded: saving other fields of a job posted before fingerprints
+        existed leaves it unset (see duplicates.dedupe) rather than
+        colliding with a copy that already holds it.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'title', 'description'} & set(update_fields):
+            if self._state.adding or (self.title, self.description) != getattr(self, '_loaded_text', None):
+                self.fingerprint = self.compute_fingerprint(self.title, self.description)
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'fingerprint'}
+        super().save(*args, **kwargs)
+        self._loaded_text = (self.title, self.description)
+
 class Applications(models.Model):
     """
     Represents a job application submitted by a user.
+
+    The resume text is kept in blob storage (business.blobs) and referenced
+    by its digest, so an applicant's resume is stored once however many
+    jobs they apply to. `resume` reads it on first access; assigning it
+    stores it on save, along with the preview and length kept on the row.
     """
     STATUS_CHOICE = [
         ('pending', 'Pending'),
@@ -59,16 +179,63 @@ class Applications(models.Model):
         ('rejected', 'Rejected'),
     ]
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    job = models.ForeignKey(Jobs, on_delete=models.CASCADE, related_name='applications')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_applications')
-    status = models.CharField(max_length=10, choices=STATUS_CHOICE, default='pending', db_index=True)
-    resume = models.TextField(null=False, blank=False)
+    # indexed by app_job_applied_idx and app_user_applied_idx
+    job = models.ForeignKey(Jobs, on_delete=models.CASCADE, related_name='applications', db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_applications', db_index=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICE, default='pending')
+    resume_digest = models.CharField(max_length=64, editable=False)
+    resume_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default='', editable=False)
+    resume_length = models.PositiveIntegerField(default=0, editable=False)
     cover_letter = models.TextField(null=False, blank=False)
     applied_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ApplicationsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination of a job's applicants and of a user's applications
+            models.Index(fields=['job', '-applied_at', '-id'], name='app_job_applied_idx'),
+            models.Index(fields=['user', '-applied_at', '-id'], name='app_user_applied_idx'),
+        ]
+
     def __str__(self):
         return f"{self.id} - {self.job} -> {self.user}"
+
+    @staticmethod
+    def resume_fields(text):
+        """Column values referencing a resume, after storing it as a blob."""
+        return {'resume_digest': blobs.put_text(text), 'resume_preview': text[:PREVIEW_LENGTH], 'resume_length': len(text)}
+
+    @property
+    def resume(self):
+        if '_unstored_resume' in self.__dict__:
+            return self._unstored_resume
+        digest, text = self.__dict__.get('_resume', (None, None))
+        if digest != self.resume_digest:
+            text = blobs.read_text(self.resume_digest) if self.resume_digest else ''
+            self._resume = (self.resume_digest, text)
+        return text
+
+    @resume.setter
+    def resume(self, text):
+        self._unstored_resume = text
+
+    def store_resume(self):
+        """Store a resume assigned since the last save; needed before bulk_create."""
+        text = self.__dict__.pop('_unstored_resume', None)
+        if text is None:
+            return False
+        for name, value in self.resume_fields(text).items():
+            setattr(self, name, value)
+        self._resume = (self.resume_digest, text)
+        return True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.store_resume() and update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'resume_digest', 'resume_preview', 'resume_length'} - {'resume'}
+        super().save(*args, **kwargs)
     
 class Notifications(models.Model):
     """
@@ -77,11 +244,145 @@ class Notifications(models.Model):
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     application = models.ForeignKey(Applications, on_delete=models.CASCADE, null=True, blank=True, related_name='application')
-    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    # indexed by notif_recipient_feed_idx
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # per-recipient feed: unread first, newest first
+            models.Index(fields=['recipient', 'is_read', '-created_at', '-id'], name='notif_recipient_feed_idx'),
+            # retention: oldest read notifications first (see notifications.purge_read)
+            models.Index(fields=['created_at'], name='notif_read_created_idx', condition=models.Q(is_read=True)),
+        ]
+
     def __str__(self):
         return f"{self.id} - {self.message}"
-    
\ No newline at end of file
+
+
+class OutgoingEmails(models.Model):
+    """
+    Represents an email waiting in the outbox.
+
+    Rows are written in the same transaction as the change that triggered
+    them and delivered in batches by the flush_email_outbox task.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the flusher picks due pending emails, oldest first
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} - {self.subject} ({self.status})"
+
+
+class JobRecommendations(models.Model):
+    """
+    Represents one of a user's top recommended jobs.
+
+    Rows are precomputed in batch by business.recommendations; serving a
+    user's list is one lookup on (user, rank).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_recommendations')
+    job = models.ForeignKey(Jobs, on_delete=models.CASCADE, related_name='recommendations')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    built_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rank'], name='jobrec_user_rank_uniq'),
+        ]
+        indexes = [
+            # a rebuild drops the rows it did not rewrite
+            models.Index(fields=['built_at'], name='jobrec_built_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} #{self.rank} -> {self.job_id}"
+
+
+class RecommendationProfiles(models.Model):
+    """
+    Represents the interest vector of a user, as of the last rebuild.
+
+    Kept so new jobs can be scored against users between rebuilds.
+    `features` packs the hashed feature ids (int32) followed by their
+    weights (float32); `threshold` is the score of the user's lowest
+    ranked recommendation when the list is full.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='recommendation_profile')
+    features = models.BinaryField()
+    threshold = models.FloatField(default=0)
+    built_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id} ({self.built_at})"
+
+
+class RecommendationState(models.Model):
+    """
+    Represents the recommender's model: a single row written by each rebuild.
+
+    `idf` holds the inverse document frequency of every hashed feature
+    (float32); `folded_until` is the posting time up to which new jobs have
+    been folded into the recommendations.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1, editable=False)
+    idf = models.BinaryField()
+    jobs_count = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField()
+    folded_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"recommendations built at {self.built_at}"
+
+
+class JobFacetCounts(models.Model):
+    """
+    Represents the number of jobs sharing one combination of filter values.
+
+    A rollup of the jobs table maintained incrementally by
+    business.facets; the unfiltered facet counts are read from it alone.
+    """
+    working_area = models.CharField(max_length=20, choices=Jobs.WORKING_AREA_CHOICES)
+    longevity = models.CharField(max_length=15, choices=Jobs.LONGEVITY_CHOICES)
+    type = models.CharField(max_length=15, choices=Jobs.TYPE_CHOICES)
+    category = models.ForeignKey(Categories, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    is_active = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['working_area', 'longevity', 'type', 'category', 'is_active'], name='jobfacet_key_uniq',
+            ),
+            # NULLs are distinct in the constraint above
+            models.UniqueConstraint(
+                fields=['working_area', 'longevity', 'type', 'is_active'], name='jobfacet_uncategorized_key_uniq',
+                condition=models.Q(category__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.working_area}/{self.longevity}/{self.type}/{self.category_id}/{self.is_active}: {self.count}"
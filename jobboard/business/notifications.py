@@ -0,0 +1,311 @@
+"""
+Notification dispatch.
+
+Signal handlers build unsaved Notifications and hand them to `dispatch`,
+which inserts them with a single bulk_create once the surrounding
+transaction commits. With NOTIFICATIONS_DEFER_TO_CELERY enabled the insert
+is handed to the `create_notifications` Celery task instead.
+
+Every created notification bumps its recipient's unread counter and is
+published on the recipient's pub/sub channel (business.pubsub), which
+feeds the notification stream and long-poll endpoints. Publishing is best
+effort: a failure is logged and never fails the request that created the
+notification, whose clients still get it from the database (the stream and
+long-poll endpoints replay what they missed).
+
+Unread counters are cached under a per-user version. A change that finds no
+counter to adjust bumps the version, so a count taken concurrently from
+rows read before that change is written under a version nobody reads.
+"""
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from .cache import get_cache
+from .models import Notifications
+from . import pubsub
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+UNREAD_COUNT_TIMEOUT = getattr(settings, 'NOTIFICATIONS_UNREAD_COUNT_TIMEOUT', 3600)
+RETENTION_DAYS = getattr(settings, 'NOTIFICATIONS_RETENTION_DAYS', 90)
+RETENTION_BATCH_SIZE = getattr(settings, 'NOTIFICATIONS_RETENTION_BATCH_SIZE', 5000)
+RETENTION_MAX_BATCHES = getattr(settings, 'NOTIFICATIONS_RETENTION_MAX_BATCHES', 100)
+
+
+def dispatch(notifications):
+    """
+    Queue notifications for creation after the current transaction commits.
+
+    Outside a transaction they are created right away. Nothing is written if
+    the transaction rolls back.
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return
+
+    if getattr(settings, 'NOTIFICATIONS_DEFER_TO_CELERY', False):
+        from .tasks import create_notifications
+
+        payload = [serialize(notification) for notification in notifications]
+        transaction.on_commit(lambda: create_notifications.delay(payload), robust=True)
+    else:
+        transaction.on_commit(lambda: create(notifications), robust=True)
+
+
+def create(notifications):
+    """Insert notifications in bulk."""
+    created_notifications = Notifications.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    announce(created_notifications)
+    return created_notifications
+
+
+def announce(notifications):
+    """Count new notifications as unread and publish them to their recipients."""
+    from .serializers import NotificationSerializer
+
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    per_recipient = {}
+    for notification in notifications:
+        if not notification.is_read:
+            per_recipient[notification.recipient_id] = per_recipient.get(notification.recipient_id, 0) + 1
+    # count first, so a subscriber that reads the counter on delivery sees the new rows
+    for recipient_id, count in per_recipient.items():
+        adjust_unread_count(recipient_id, count)
+    for notification in notifications:
+        try:
+            pubsub.publish(channel(notification.recipient_id), encoder.encode(NotificationSerializer(notification).data))
+        except Exception:
+            logger.exception('Could not publish notification %s', notification.pk)
+
+
+def mark_read(recipient_id, ids=None):
+    """
+    Mark a user's unread notifications as read with a single UPDATE.
+
+    Only the notifications in `ids` are marked when given, all of them
+    otherwise. Returns how many changed.
+    """
+    queryset = Notifications.objects.filter(recipient_id=recipient_id, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    updated = queryset.update(is_read=True)
+    if updated:
+        # a queryset update sends no post_save
+        transaction.on_commit(lambda: adjust_unread_count(recipient_id, -updated), robust=True)
+    return updated
+
+
+def purge_read(older_than=None, batch_size=RETENTION_BATCH_SIZE, max_batches=RETENTION_MAX_BATCHES):
+    """
+    Delete read notifications created more than `older_than` ago.
+
+    Rows go in batches of `batch_size`, oldest first, each found through
+    notif_read_created_idx and deleted in its own short statement so the
+    table is never locked for long. At most `max_batches` batches run per
+    call; anything left is picked up by the next run.
+
+    Returns {'deleted': n, 'complete': whether nothing is left}.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else timedelta(days=RETENTION_DAYS))
+    expired = Notifications.objects.filter(is_read=True, created_at__lt=cutoff).order_by('created_at')
+    deleted = 0
+    for _ in range(max_batches):
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if ids:
+            deleted += Notifications.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            return {'deleted': deleted, 'complete': True}
+    return {'deleted': deleted, 'complete': False}
+
+
+def channel(recipient_id):
+    """Pub/sub channel carrying a user's new notifications."""
+    return f'notifications:{recipient_id}'
+
+
+def _unread_version_key(recipient_id):
+    return f'jobboard:notifications:unread:{recipient_id}:version'
+
+
+def _unread_key(recipient_id, version):
+    return f'jobboard:notifications:unread:{recipient_id}:v{version}'
+
+
+def _unread_version(cache, recipient_id):
+    key = _unread_version_key(recipient_id)
+    version = cache.get(key)
+    if version is None:
+        # start from the clock so an evicted version never re-reads old counters
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def _aunread_version(cache, recipient_id):
+    key = _unread_version_key(recipient_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def unread_count(recipient_id):
+    """
+    Number of unread notifications of a user.
+
+    Served from the cache; a miss counts the rows once (an index-only scan
+    of notif_recipient_feed_idx) and caches the result under the version
+    read before counting.
+    """
+    cache = get_cache()
+    key = _unread_key(recipient_id, _unread_version(cache, recipient_id))
+    count = cache.get(key)
+    if count is None:
+        count = Notifications.objects.filter(recipient_id=recipient_id, is_read=False).count()
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+async def aunread_count(recipient_id):
+    """`unread_count` for async views."""
+    cache = get_cache()
+    key = _unread_key(recipient_id, await _aunread_version(cache, recipient_id))
+    count = await cache.aget(key)
+    if count is None:
+        count = await Notifications.objects.filter(recipient_id=recipient_id, is_read=False).acount()
+        await cache.aadd(key, count, UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+def adjust_unread_count(recipient_id, delta):
+    """
+    Add `delta` to a cached unread counter.
+
+    A counter that is not cached is not created: the version is bumped
+    instead, retiring any count being taken right now, and the next read
+    counts the rows.
+    """
+    cache = get_cache()
+    try:
+        cache.incr(_unread_key(recipient_id, _unread_version(cache, recipient_id)), delta)
+    except ValueError:
+        forget_unread_count(recipient_id)
+
+
+def forget_unread_count(recipient_id):
+    """Retire a cached counter whose change cannot be tracked incrementally."""
+    cache = get_cache()
+    try:
+        cache.incr(_unread_version_key(recipient_id))
+    except ValueError:
+        _unread_version(cache, recipient_id)
+
+
+def application_submitted(application):
+    """In-app notification telling the job owner about a new application."""
+    return Notifications(
+        application=application,
+        recipient_id=application.job.posted_by_id,
+        message=f"{application.user} applied to your job: {application.job.title}",
+    )
+
+
+def application_reviewed(application):
+    """
+    In-app notifications and emails for a reviewed application.
+
+    Returns (notifications, emails), where emails are
+    (subject, message, recipient_list) tuples for emails.queue_emails.
+    Both lists are empty unless the status is "Accepted" or "Rejected".
+    """
+    if application.status not in ("Accepted", "Rejected"):
+        return [], []
+
+    user = application.user
+    job = application.job
+    username = getattr(user, 'username', user)
+
+    if application.status == "Accepted":
+        notification = Notifications(
+            application=application,
+            recipient_id=application.user_id,
+            message=(
+                f"Your application for the job: {job.title} has been reviewed. "
+                "The job owner accepted your application. Please wait for an email with further details. "
+                "Thank you!"
+            ),
+        )
+        emails = [
+            # email for the applicant
+            (
+                "Job Application Result",
+                (
+                    f"Dear {username},\n\n"
+                    f"🎉 Congratulations! You have been accepted for the job "
+                    f"**{job.title}** you applied for on {application.applied_at}.\n\n"
+                    "Please wait patiently for the job owner to contact you.\n\n"
+                    "Thanks for choosing our platform!"
+                ),
+                [user.email] if user.email else [],
+            ),
+            # email for the job owner
+            (
+                f"You accepted the application of {username} for the your job {job} post.",
+                (
+                    f"Hello {getattr(job.posted_by, 'username', job.posted_by)},\n\n"
+                    f"You have accepted the application of {username} "
+                    f"for your job: **{job.title}**.\n\n"
+                    f"Applicant details:\n"
+                    f"- Name: {username}\n"
+                    f"- Email: {user.email}\n"
+                    f"- Applied at: {application.applied_at}\n\n"
+                    "Please reach out to the applicant to proceed further.\n\n"
+                    "Thank you for using our platform!"
+                ),
+                [job.posted_by.email] if job.posted_by.email else [],
+            ),
+        ]
+        return [notification], emails
+
+    notification = Notifications(
+        application=application,
+        recipient_id=application.user_id,
+        message=(
+            f"Your application for the job: {job.title} has been reviewed. "
+            "The job owner rejected your application. We encourage you to explore other jobs. "
+            "Thank you for using our platform!"
+        ),
+    )
+    emails = [
+        (
+            "Job Application Result: Rejected",
+            (
+                f"Dear {username},\n\n"
+                f"Unfortunately, your application for the job **{job.title}** "
+                f"submitted on {application.applied_at} was not accepted.\n\n"
+                "We encourage you to explore other opportunities on our platform.\n\n"
+                "Thank you for using our platform!"
+            ),
+            [user.email] if user.email else [],
+        ),
+    ]
+    return [notification], emails
+
+
+def serialize(notification):
+    return {
+        'recipient_id': str(notification.recipient_id),
+        'application_id': str(notification.application_id) if notification.application_id else None,
+        'message': notification.message,
+    }
+
+
+def deserialize(rows):
+    return [Notifications(**row) for row in rows]
@@ -0,0 +1,27 @@
+"""
+Ownership checks folded into querysets.
+
+Instead of fetching an object only to check who owns it and then running
+the query the view needs, OwnedQuerysetMixin adds the ownership predicate
+(e.g. job__posted_by=request.user) to that query: rows of other users are
+never read, and the view answers in the round trips it needs anyway.
+"""
+from accounts.permissions import IsAdmin
+
+
+class OwnedQuerysetMixin:
+    """
+    `owned(queryset)` keeps the rows whose `owner_field` is the request's
+    user. Users passing one of `owner_bypass_permissions` (admins, by
+    default) keep every row.
+    """
+    owner_field = None
+    owner_bypass_permissions = [IsAdmin]
+
+    def bypasses_ownership(self):
+        return any(permission().has_permission(self.request, self) for permission in self.owner_bypass_permissions)
+
+    def owned(self, queryset):
+        if self.bypasses_ownership():
+            return queryset
+        return queryset.filter(**{self.owner_field: self.request.user})
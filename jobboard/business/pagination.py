@@ -0,0 +1,154 @@
+import base64
+import binascii
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Clients switch to the keyset mode with ?pagination=cursor, or by following
+    a next/previous link carrying ?cursor=. Pages are then located with a WHERE
+    on the `keyset` columns instead of an OFFSET, so deep pages cost the same
+    as the first one. The total is only counted when ?count=true is passed.
+
+    Subclasses define `keyset`, a unique ordering backed by a composite index,
+    e.g. ('-posted_at', '-id'). In keyset mode it replaces any other ordering.
+    """
+    keyset = ()
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset_mode = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.display_page_controls = False
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*self.get_ordering(reverse))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_position_filter(position, reverse))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first_position = self.get_position(rows[0]) if rows else None
+        self.last_position = self.get_position(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset_mode:
+            return super().get_paginated_response(data)
+
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.keyset_mode:
+            return super().get_next_link()
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset_mode:
+            return super().get_previous_link()
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return list(self.keyset)
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.keyset]
+
+    def get_position(self, row):
+        """Keyset values of a row; rows may be model instances or dicts."""
+        names = [field.lstrip('-') for field in self.keyset]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def get_position_filter(self, position, reverse=False):
+        """
+        Rows strictly after `position` in keyset order (before it when reversed).
+
+        Expands the row comparison into (a < x) OR (a = x AND b < y) ...
+        so mixed ascending/descending keysets are supported.
+        """
+        condition = Q()
+        for index, field in enumerate(self.keyset):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            term = Q(**{f"{name}__{'lt' if descending else 'gt'}": position[index]})
+            for previous_field, previous_value in zip(self.keyset[:index], position[:index]):
+                term &= Q(**{previous_field.lstrip('-'): previous_value})
+            condition |= term
+        return condition
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': reverse}, cls=JSONEncoder, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position, reverse = payload['p'], bool(payload.get('r'))
+            if not isinstance(position, list) or len(position) != len(self.keyset):
+                raise ValueError(position)
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class JobPagination(KeysetPagination):
+    keyset = ('-posted_at', '-id')
+
+
+class ApplicationPagination(KeysetPagination):
+    keyset = ('-applied_at', '-id')
+
+
+class NotificationPagination(KeysetPagination):
+    keyset = ('is_read', '-created_at', '-id')
@@ -0,0 +1,76 @@
+"""
+Denormalized poster statistics on accounts.User.
+
+    - jobs_posted: number of jobs the user has posted.
+    - number_of_hires: number of accepted applications to the user's jobs.
+
+Both are adjusted with F() expressions in the transaction of the change
+(job and application signals, plus the bulk paths that bypass signals),
+so concurrent writers never lose an update and reading them costs no
+aggregate query. `reconcile` recomputes them from the source tables, in
+batches of users, for rows written outside these paths.
+"""
+from django.db import transaction
+from django.db.models import F
+from accounts.models import User
+from .models import Applications, Jobs, _count_subquery
+
+ACCEPTED = 'Accepted'
+
+
+def is_accepted(status):
+    # the API writes 'Accepted', the model's choices say 'accepted'
+    return (status or '').lower() == ACCEPTED.lower()
+
+
+def add_jobs_posted(user_id, delta):
+    if delta:
+        User.objects.filter(pk=user_id).update(jobs_posted=F('jobs_posted') + delta)
+
+
+def add_hires(user_id, delta):
+    if delta:
+        User.objects.filter(pk=user_id).update(number_of_hires=F('number_of_hires') + delta)
+
+
+def add_hires_for_job(job_id, delta):
+    """Adjust the hires of a job's poster without loading the job."""
+    if delta:
+        User.objects.filter(posted_jobs=job_id).update(number_of_hires=F('number_of_hires') + delta)
+
+
+def hires_delta(previous_status, status):
+    """Change in the poster's hires when an application moves between statuses."""
+    return is_accepted(status) - is_accepted(previous_status)
+
+
+def reconcile(batch_size=5000, progress=None):
+    """
+    Recompute the counters of every user from the jobs and applications tables.
+
+    Users are walked in primary-key order and each batch is one UPDATE with
+    correlated counts, committed on its own; only users whose counters are
+    wrong are written. Returns the number of users seen and corrected.
+    """
+    jobs_posted = _count_subquery(Jobs.objects.all(), 'posted_by')
+    hires = _count_subquery(Applications.objects.filter(status__iexact=ACCEPTED), 'job__posted_by')
+    summary = {'users': 0, 'corrected': 0}
+    last = None
+    while True:
+        users = User.objects.order_by('pk')
+        if last is not None:
+            users = users.filter(pk__gt=last)
+        batch = list(users.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return summary
+        last = batch[-1]
+        with transaction.atomic():
+            stale = User.objects.filter(pk__in=batch)\
+                                .annotate(actual_jobs_posted=jobs_posted, actual_hires=hires)\
+                                .exclude(jobs_posted=F('actual_jobs_posted'), number_of_hires=F('actual_hires'))\
+                                .values_list('pk', flat=True)
+            corrected = User.objects.filter(pk__in=list(stale)).update(jobs_posted=jobs_posted, number_of_hires=hires)
+        summary['users'] += len(batch)
+        summary['corrected'] += corrected
+        if progress:
+            progress(summary)
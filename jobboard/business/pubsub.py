@@ -0,0 +1,206 @@
+"""
+Publish/subscribe for pushing notifications to connected clients.
+
+Channels are plain strings and messages are JSON text. The backend is
+chosen with NOTIFICATIONS_PUBSUB_BACKEND:
+
+    - business.pubsub.LocalBackend (default): delivers to subscribers in
+      this process only. Enough for a single web process with notifications
+      created in-request.
+    - business.pubsub.RedisBackend: publishes through Redis
+      (NOTIFICATIONS_PUBSUB_URL), so messages reach every web process,
+      including those created by the Celery worker.
+
+Subscriptions can be waited on from sync code (long-poll) or async code
+(server-sent events) without holding a thread in the async case.
+
+The Redis listener reconnects after a lost connection, backing off
+exponentially. Messages published while it is away are not replayed here;
+the endpoints catch up from the database.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict, deque
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Messages published to one channel since subscribing."""
+
+    def __init__(self, backend, channel):
+        self.backend = backend
+        self.channel = channel
+        self._messages = deque()
+        self._event = threading.Event()
+        self._waiters = set()
+        self._lock = threading.Lock()
+
+    def deliver(self, message):
+        with self._lock:
+            self._messages.append(message)
+            waiters = list(self._waiters)
+        self._event.set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def drain(self):
+        """Every message received so far."""
+        with self._lock:
+            messages = list(self._messages)
+            self._messages.clear()
+            self._event.clear()
+        return messages
+
+    def get(self, timeout):
+        """Wait up to `timeout` seconds for messages; returns them (maybe none)."""
+        if not self._messages:
+            self._event.wait(timeout)
+        return self.drain()
+
+    async def aget(self, timeout):
+        """`get` for async callers."""
+        if not self._messages:
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            with self._lock:
+                self._waiters.add(waiter)
+            try:
+                if not self._messages:
+                    await asyncio.wait_for(waiter[1], timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    self._waiters.discard(waiter)
+        return self.drain()
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LocalBackend:
+    """Fan-out to subscriptions of this process."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+class RedisBackend(LocalBackend):
+    """
+    Publish through Redis; one listener thread per process fans messages
+    out to the local subscriptions.
+    """
+    PREFIX = 'jobboard:pubsub:'
+    # seconds to wait before reconnecting, doubled after every failed attempt
+    RECONNECT_DELAY = 0.5
+    RECONNECT_MAX_DELAY = 30.0
+
+    def __init__(self, url=None):
+        super().__init__()
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.NOTIFICATIONS_PUBSUB_URL)
+        self._listener = None
+        self._stopping = threading.Event()
+
+    def publish(self, channel, message):
+        self.client.publish(self.PREFIX + channel, message)
+
+    def subscribe(self, channel):
+        self._start_listener()
+        return super().subscribe(channel)
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name='pubsub-listener', daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        """Stop the listener once it next wakes up."""
+        self._stopping.set()
+
+    def _listen(self):
+        try:
+            delay = self.RECONNECT_DELAY
+            while not self._stopping.is_set():
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                try:
+                    pubsub.psubscribe(self.PREFIX + '*')
+                    delay = self.RECONNECT_DELAY
+                    for item in pubsub.listen():
+                        if self._stopping.is_set():
+                            return
+                        channel = item['channel'].decode()[len(self.PREFIX):]
+                        self.deliver(channel, item['data'].decode())
+                except Exception:
+                    logger.warning('Pub/sub listener lost its connection, reconnecting in %.1fs', delay, exc_info=True)
+                finally:
+                    pubsub.close()
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+        finally:
+            with self._lock:
+                self._listener = None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'NOTIFICATIONS_PUBSUB_BACKEND', 'business.pubsub.LocalBackend')
+                _backend = import_string(path)()
+    return _backend
+
+
+def publish(channel, message):
+    get_backend().publish(channel, message)
+
+
+def subscribe(channel):
+    return get_backend().subscribe(channel)
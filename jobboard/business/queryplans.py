@@ -0,0 +1,50 @@
+"""
+Query plan checks.
+
+`explain` returns the plan of a SQL statement as text lines, and
+`problems` the lines of a plan showing that no index served the query:
+
+    - a full table scan: 'SCAN <table>' without an index on SQLite,
+      'Seq Scan' on PostgreSQL;
+    - a sort of the rows read: 'USE TEMP B-TREE' on SQLite, a 'Sort' node
+      on PostgreSQL.
+
+PostgreSQL plans are computed with sequential scans and sorts disabled, so
+that the planner picks an index whenever one can serve the query, as it
+would at scale, rather than scanning a small test table; a scan or sort
+left in the plan means no index could.
+"""
+import re
+from django.db import connection as default_connection, transaction
+
+SQLITE_PROBLEMS = [
+    # a scan of a whole table; scans of an index, of a subquery or of a virtual table are fine
+    re.compile(r'^SCAN (?!CONSTANT ROW$)[^\s(]+$'),
+    re.compile(r'USE TEMP B-TREE'),
+]
+POSTGRESQL_PROBLEMS = [
+    re.compile(r'\bSeq Scan on\b'),
+    re.compile(r'(^|->)\s*Sort\s+\('),
+]
+
+
+def explain(sql, connection=default_connection):
+    """The plan of `sql` (with its parameters inlined), one line per step."""
+    prefix = connection.ops.explain_query_prefix()
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+        cursor.execute(f'{prefix} {sql}')
+        # SQLite answers (id, parent, notused, detail) rows, PostgreSQL one text column
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def problems(plan, vendor=None):
+    """Lines of `plan` showing a full table scan or a sort."""
+    patterns = POSTGRESQL_PROBLEMS if (vendor or default_connection.vendor) == 'postgresql' else SQLITE_PROBLEMS
+    return [line for line in plan if any(pattern.search(line.strip()) for pattern in patterns)]
+
+
+def is_explainable(sql):
+    return sql.lstrip().upper().startswith('SELECT')
@@ -0,0 +1,345 @@
+"""
+Precomputed job recommendations.
+
+Jobs and users live in one hashed feature space:
+    - a job is the words of its title (weighted up) and description, its
+      category and its working area/type/longevity combination, weighted by
+      inverse document frequency and L2-normalised;
+    - a user is the sum of the jobs they applied to most recently, pruned
+      to its strongest features.
+
+`rebuild` (periodic Celery task) scores every active job for every user
+with vectorised NumPy operations over a column-major sparse job matrix and
+stores each user's top jobs in JobRecommendations. `fold_in` scores only
+the jobs posted since the last run against the stored user profiles and
+merges them into the affected lists, so new postings show up between
+rebuilds.
+
+Serving reads JobRecommendations with one indexed query; nothing is
+computed per request.
+"""
+import re
+import zlib
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Applications, Jobs, JobRecommendations, RecommendationProfiles, RecommendationState
+
+DIMENSIONS = 2 ** 18
+TOP_K = getattr(settings, 'RECOMMENDATIONS_TOP_K', 20)
+# strongest features kept in a user profile
+PROFILE_FEATURES = 64
+# most recent applications that shape a profile
+PROFILE_APPLICATIONS = 50
+TITLE_WEIGHT = 2.0
+ATTRIBUTE_WEIGHT = 1.5
+# features found in more than this share of jobs carry no signal and are dropped
+MAX_DOCUMENT_FREQUENCY = 0.2
+USER_BATCH_SIZE = 1000
+# most new jobs folded in per run; the rest wait for the next one
+FOLD_IN_LIMIT = 5000
+
+JOB_FIELDS = ('id', 'title', 'description', 'category_id', 'working_area', 'type', 'longevity', 'is_active', 'posted_at')
+WORD_RE = re.compile(r'\w\w+', re.UNICODE)
+
+
+def _bucket(feature):
+    # crc32 rather than hash(): buckets must agree across processes
+    return zlib.crc32(feature.encode()) & (DIMENSIONS - 1)
+
+
+def job_features(title, description, category_id, working_area, type, longevity):
+    """Raw weight of each hashed feature of a job."""
+    weights = {}
+
+    def add(feature, weight):
+        bucket = _bucket(feature)
+        weights[bucket] = weights.get(bucket, 0.0) + weight
+
+    for word in WORD_RE.findall(title.lower()):
+        add(f'word:{word}', TITLE_WEIGHT)
+    for word in WORD_RE.findall(description.lower()):
+        add(f'word:{word}', 1.0)
+    if category_id:
+        add(f'category:{category_id}', ATTRIBUTE_WEIGHT)
+    add(f'terms:{working_area}:{type}:{longevity}', ATTRIBUTE_WEIGHT)
+    return weights
+
+
+class SparseRows:
+    """Rows of sparse vectors in compressed (indptr, indices, data) form."""
+
+    def __init__(self, indptr, indices, data):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def from_maps(cls, maps):
+        indptr, indices, data = [0], [], []
+        for weights in maps:
+            indices.extend(weights)
+            data.extend(weights.values())
+            indptr.append(len(indices))
+        return cls(np.asarray(indptr, np.int64), np.asarray(indices, np.int32), np.asarray(data, np.float32))
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def row_of_entries(self):
+        return np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.indptr))
+
+    def weighted(self, idf):
+        """IDF-weighted, L2-normalised copy."""
+        data = self.data * idf[self.indices]
+        rows = self.row_of_entries()
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(self))).astype(np.float32)
+        norms[norms == 0] = 1
+        return SparseRows(self.indptr, self.indices, data / norms[rows])
+
+    def combine(self, rows, limit):
+        """
+        Normalised sum of the given rows, pruned to its `limit` strongest features.
+
+        Returns (features, weights).
+        """
+        offsets = _segments(self.indptr[rows], self.indptr[np.asarray(rows) + 1])
+        features, inverse = np.unique(self.indices[offsets], return_inverse=True)
+        weights = np.bincount(inverse, weights=self.data[offsets]).astype(np.float32)
+        if len(features) > limit:
+            strongest = np.argpartition(-weights, limit - 1)[:limit]
+            features, weights = features[strongest], weights[strongest]
+        norm = np.sqrt(np.dot(weights, weights))
+        return features.astype(np.int32), weights / norm if norm else weights
+
+
+class SparseColumns:
+    """
+    The same matrix stored column-major: for each feature, the rows holding it.
+
+    `dot` scores every row against one sparse vector by gathering only the
+    columns of that vector's features.
+    """
+
+    def __init__(self, rows):
+        order = np.argsort(rows.indices, kind='stable')
+        self.size = len(rows)
+        self.rows = rows.row_of_entries()[order]
+        self.values = rows.data[order]
+        self.start = np.zeros(DIMENSIONS + 1, np.int64)
+        np.cumsum(np.bincount(rows.indices, minlength=DIMENSIONS), out=self.start[1:])
+
+    def dot(self, features, weights):
+        starts, ends = self.start[features], self.start[features + 1]
+        offsets = _segments(starts, ends)
+        return np.bincount(
+            self.rows[offsets],
+            weights=self.values[offsets] * np.repeat(weights, ends - starts),
+            minlength=self.size,
+        )
+
+
+def _segments(starts, ends):
+    """Concatenated ranges start..end as one index array."""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, np.int64)
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+
+
+def inverse_document_frequencies(indices, documents):
+    df = np.bincount(indices, minlength=DIMENSIONS)
+    idf = (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+    idf[df > max(1, MAX_DOCUMENT_FREQUENCY * documents)] = 0
+    return idf
+
+
+def top(scores, k=TOP_K):
+    """Indices of the k best positive scores, best first."""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def pack(features, weights):
+    return features.astype('<i4').tobytes() + weights.astype('<f4').tobytes()
+
+
+def unpack(blob):
+    blob = bytes(blob)
+    count = len(blob) // 8
+    return np.frombuffer(blob, '<i4', count), np.frombuffer(blob, '<f4', count, offset=count * 4)
+
+
+def _histories(position):
+    """(user_id, job rows) of every applicant, most recent applications first, in batches."""
+    applications = Applications.objects.order_by('user_id', '-applied_at').values_list('user_id', 'job_id')
+    batch, user_id, rows = [], None, []
+    for applicant, job_id in applications.iterator(chunk_size=USER_BATCH_SIZE * 10):
+        if applicant != user_id:
+            if rows:
+                batch.append((user_id, rows))
+                if len(batch) == USER_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            user_id, rows = applicant, []
+        if len(rows) < PROFILE_APPLICATIONS and job_id in position:
+            rows.append(position[job_id])
+    if rows:
+        batch.append((user_id, rows))
+    if batch:
+        yield batch
+
+
+def _store(user_ids, recommendations, profiles):
+    with transaction.atomic():
+        JobRecommendations.objects.filter(user_id__in=user_ids).delete()
+        JobRecommendations.objects.bulk_create(recommendations, batch_size=5000)
+        RecommendationProfiles.objects.filter(user_id__in=user_ids).delete()
+        RecommendationProfiles.objects.bulk_create(profiles, batch_size=5000)
+
+
+def _rank(user_id, job_ids, scores, built_at):
+    return [
+        JobRecommendations(user_id=user_id, job_id=job_id, rank=rank, score=float(score), built_at=built_at)
+        for rank, (job_id, score) in enumerate(zip(job_ids, scores), start=1)
+    ]
+
+
+def rebuild(progress=None):
+    """
+    Recompute every user's recommendations from scratch.
+
+    Returns counts of jobs, users and stored recommendations.
+    """
+    built_at = timezone.now()
+    ids, active, maps = [], [], []
+    for job_id, title, description, category_id, working_area, type, longevity, is_active, _ in \
+            Jobs.objects.values_list(*JOB_FIELDS).iterator(chunk_size=5000):
+        ids.append(job_id)
+        active.append(is_active)
+        maps.append(job_features(title, description, category_id, working_area, type, longevity))
+
+    raw = SparseRows.from_maps(maps)
+    del maps
+    idf = inverse_document_frequencies(raw.indices, len(ids))
+    jobs = raw.weighted(idf)
+    columns = SparseColumns(jobs)
+    inactive = ~np.asarray(active, bool)
+    position = {job_id: row for row, job_id in enumerate(ids)}
+
+    users = stored = 0
+    for batch in _histories(position):
+        recommendations, profiles = [], []
+        for user_id, applied in batch:
+            features, weights = jobs.combine(applied, PROFILE_FEATURES)
+            scores = columns.dot(features, weights)
+            scores[inactive] = 0
+            scores[applied] = 0
+            best = top(scores)
+            recommendations.extend(_rank(user_id, [ids[row] for row in best], scores[best], built_at))
+            profiles.append(RecommendationProfiles(
+                user_id=user_id,
+                features=pack(features, weights),
+                threshold=float(scores[best[-1]]) if len(best) == TOP_K else 0.0,
+                built_at=built_at,
+            ))
+        _store([user_id for user_id, _ in batch], recommendations, profiles)
+        users += len(batch)
+        stored += len(recommendations)
+        if progress:
+            progress(users)
+
+    # users who no longer have any application
+    JobRecommendations.objects.filter(built_at__lt=built_at).delete()
+    RecommendationProfiles.objects.filter(built_at__lt=built_at).delete()
+    RecommendationState.objects.update_or_create(pk=1, defaults={
+        'idf': idf.tobytes(), 'jobs_count': len(ids), 'built_at': built_at, 'folded_until': built_at,
+    })
+    return {'jobs': len(ids), 'users': users, 'recommendations': stored}
+
+
+def fold_in():
+    """
+    Merge jobs posted since the last rebuild or fold-in into the recommendations.
+
+    New jobs are weighted with the IDF of the last rebuild and scored
+    against every stored profile; a job enters a user's list when it beats
+    the lowest recommendation there. Returns counts of jobs and updated users.
+    """
+    state = RecommendationState.objects.filter(pk=1).first()
+    if state is None:
+        return {'jobs': 0, 'users': 0}
+
+    rows = list(
+        Jobs.objects.filter(is_active=True, posted_at__gt=state.folded_until)
+                    .order_by('posted_at').values_list(*JOB_FIELDS)[:FOLD_IN_LIMIT]
+    )
+    if not rows:
+        return {'jobs': 0, 'users': 0}
+    folded_until = rows[-1][-1]
+
+    idf = np.frombuffer(bytes(state.idf), np.float32)
+    jobs = SparseRows.from_maps(job_features(*row[1:7]) for row in rows).weighted(idf)
+    job_ids = [row[0] for row in rows]
+
+    user_ids, thresholds, maps = [], [], []
+    for user_id, blob, threshold in RecommendationProfiles.objects.values_list('user_id', 'features', 'threshold')\
+                                                                  .iterator(chunk_size=5000):
+        features, weights = unpack(blob)
+        user_ids.append(user_id)
+        thresholds.append(threshold)
+        maps.append(dict(zip(features.tolist(), weights.tolist())))
+    if not user_ids:
+        RecommendationState.objects.filter(pk=1).update(folded_until=folded_until)
+        return {'jobs': len(rows), 'users': 0}
+    profiles = SparseColumns(SparseRows.from_maps(maps))
+    thresholds = np.asarray(thresholds, np.float32)
+
+    candidates = {}
+    for row in range(len(jobs)):
+        start, end = jobs.indptr[row], jobs.indptr[row + 1]
+        scores = profiles.dot(jobs.indices[start:end], jobs.data[start:end])
+        for user_row in np.flatnonzero((scores > thresholds) & (scores > 0)):
+            candidates.setdefault(user_ids[user_row], []).append((job_ids[row], float(scores[user_row])))
+
+    if candidates:
+        _merge(candidates, dict(zip(user_ids, thresholds.tolist())))
+    RecommendationState.objects.filter(pk=1).update(folded_until=folded_until)
+    return {'jobs': len(rows), 'users': len(candidates)}
+
+
+def _merge(candidates, thresholds):
+    built_at = timezone.now()
+    users = list(candidates)
+    for start in range(0, len(users), USER_BATCH_SIZE):
+        batch = users[start:start + USER_BATCH_SIZE]
+        current = {user_id: {} for user_id in batch}
+        for user_id, job_id, score in JobRecommendations.objects.filter(user_id__in=batch)\
+                                                                .values_list('user_id', 'job_id', 'score'):
+            current[user_id][job_id] = score
+        applied = set(
+            Applications.objects.filter(user_id__in=batch, job_id__in={job for user_id in batch for job, _ in candidates[user_id]})
+                                .values_list('user_id', 'job_id')
+        )
+        recommendations, profile_thresholds = [], {}
+        for user_id in batch:
+            scores = current[user_id]
+            for job_id, score in candidates[user_id]:
+                if (user_id, job_id) not in applied:
+                    scores[job_id] = max(score, scores.get(job_id, 0))
+            best = sorted(scores.items(), key=lambda item: -item[1])[:TOP_K]
+            recommendations.extend(_rank(user_id, [job for job, _ in best], [score for _, score in best], built_at))
+            profile_thresholds[user_id] = best[-1][1] if len(best) == TOP_K else thresholds[user_id]
+
+        with transaction.atomic():
+            JobRecommendations.objects.filter(user_id__in=batch).delete()
+            JobRecommendations.objects.bulk_create(recommendations, batch_size=5000)
+            RecommendationProfiles.objects.bulk_update(
+                [RecommendationProfiles(user_id=user_id, threshold=threshold)
+                 for user_id, threshold in profile_thresholds.items()],
+                ['threshold'], batch_size=1000,
+            )
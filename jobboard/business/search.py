@@ -0,0 +1,150 @@
+"""
+Full-text search index for job postings.
+
+The index lives next to the jobs table and is kept up to date by the
+Jobs save/delete signals:
+    - PostgreSQL: weighted tsvector stored in Jobs.search_vector (GIN indexed).
+    - SQLite: FTS5 virtual table used for development and tests.
+
+Other database backends fall back to DRF's icontains search.
+"""
+import re
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from .models import Jobs
+
+SEARCH_CONFIG = getattr(settings, 'JOB_SEARCH_CONFIG', 'english')
+FTS_TABLE = 'business_jobs_fts'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _vendor(using):
+    return connections[using].vendor
+
+
+def _tokens(terms):
+    """Split search terms into plain word tokens safe to embed in a query."""
+    tokens = []
+    for term in terms:
+        tokens.extend(TOKEN_RE.findall(term.lower()))
+    return tokens
+
+
+def search_vector():
+    """Weighted search document: title ranks above description."""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def is_supported(using='default'):
+    return _vendor(using) in ('postgresql', 'sqlite')
+
+
+def index_jobs(job_ids, using='default'):
+    """
+    (Re)index the given jobs.
+
+    Called for every saved job and by bulk paths that bypass signals.
+    """
+    job_ids = list(job_ids)
+    if not job_ids:
+        return
+    vendor = _vendor(using)
+    if vendor == 'postgresql':
+        Jobs.objects.using(using).filter(id__in=job_ids).update(search_vector=search_vector())
+    elif vendor == 'sqlite':
+        connection = connections[using]
+        pk = Jobs._meta.pk
+        db_ids = [pk.get_db_prep_value(job_id, connection) for job_id in job_ids]
+        placeholders = ', '.join(['%s'] * len(db_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE job_id IN ({placeholders})', db_ids)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (job_id, title, description) '
+                f'SELECT id, title, description FROM {Jobs._meta.db_table} WHERE id IN ({placeholders})',
+                db_ids,
+            )
+
+
+def unindex_jobs(job_ids, using='default'):
+    """
+    Drop deleted jobs from the index.
+
+    PostgreSQL keeps the vector on the row itself, so only SQLite needs work.
+    """
+    job_ids = list(job_ids)
+    if not job_ids or _vendor(using) != 'sqlite':
+        return
+    connection = connections[using]
+    pk = Jobs._meta.pk
+    db_ids = [pk.get_db_prep_value(job_id, connection) for job_id in job_ids]
+    placeholders = ', '.join(['%s'] * len(db_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE job_id IN ({placeholders})', db_ids)
+
+
+def search_jobs(queryset, terms):
+    """
+    Restrict a Jobs queryset to postings matching every term, best matches first.
+
+    Terms are treated as prefixes, so "develop" matches "developer".
+    The relevance score is exposed as the 'search_rank' annotation.
+    On other databases every term must appear in the title or the
+    description (icontains, like SearchFilter), without a rank.
+    """
+    if not is_supported(queryset.db):
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        return queryset
+
+    tokens = _tokens(terms)
+    if not tokens:
+        return queryset
+
+    vendor = _vendor(queryset.db)
+    if vendor == 'postgresql':
+        query = SearchQuery(
+            ' & '.join(f'{token}:*' for token in tokens),
+            search_type='raw',
+            config=SEARCH_CONFIG,
+        )
+        return queryset.filter(search_vector=query)\
+                       .annotate(search_rank=SearchRank(F('search_vector'), query))\
+                       .order_by('-search_rank', '-posted_at')
+
+    # sqlite
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    table = Jobs._meta.db_table
+    # bm25() is lower-is-better; column weights are (job_id, title, description).
+    rank = RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, 0.0, 10.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.job_id = "{table}"."id"',
+        (match,),
+    )
+    return queryset.filter(id__in=RawSQL(f'SELECT job_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,)))\
+                   .annotate(search_rank=rank)\
+                   .order_by('-search_rank', '-posted_at')
+
+
+class JobSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on job viewsets.
+
+    Uses the full-text index instead of icontains scans and orders
+    results by relevance. Unsupported databases keep the default behavior.
+    """
+    def filter_queryset(self, request, queryset, view):
+        if not is_supported(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_jobs(queryset, terms)
@@ -1,15 +1,21 @@
 from rest_framework import serializers
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from drf_spectacular.utils import extend_schema_field
 from .models import Categories, Jobs, Applications, Notifications
 from accounts.models import User 
+from . import duplicates
+
+# statuses a job owner can set on an application
+APPLICATION_STATUSES = ['Pending', 'Accepted', 'Rejected']
 
 class CategorySerializer(serializers.ModelSerializer):  
     """
     Serializer for the Categories model.
 
     Includes a read-only field 'jobs_count' that counts the number of jobs in the category.
+    Querysets should provide it through Categories.objects.with_jobs_count().
     """ 
-    jobs_count = serializers.IntegerField(source='jobs.count', read_only=True) 
+    jobs_count = serializers.SerializerMethodField()
     class Meta:
         model = Categories
         fields = ['id', 'name', 'description', 'created_at', 'updated_at', 'jobs_count']
@@ -20,6 +26,12 @@ class CategorySerializer(serializers.ModelSerializer):
         if Categories.objects.filter(name__iexact=value).exists():
             raise serializers.ValidationError("A category with this name already exists.")
         return value
+
+    @extend_schema_field(serializers.IntegerField())
+    def get_jobs_count(self, obj):
+        """Use the queryset annotation, counting only for freshly created instances."""
+        count = getattr(obj, 'jobs_count', None)
+        return obj.jobs.count() if count is None else count
     
     @transaction.atomic
     def create(self, validated_data):
@@ -41,11 +53,12 @@ class JobSerializer(serializers.ModelSerializer):
     Read-only fields:
         - posted_by
         - is_active
-        - applications_count: counts the number of applications for the job
+        - applications_count: counts the number of applications for the job,
+          provided by Jobs.objects.with_applications_count()
     """
     posted_by = serializers.PrimaryKeyRelatedField(read_only=True)
     is_active = serializers.BooleanField(read_only=True)
-    applications_count = serializers.IntegerField(source='applications.count', read_only=True)
+    applications_count = serializers.SerializerMethodField()
     class Meta:
         model = Jobs
         fields = [
@@ -61,28 +74,113 @@ class JobSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Remote jobs should not include a physical location.")
         return data
 
+    @extend_schema_field(serializers.IntegerField())
+    def get_applications_count(self, obj):
+        """Use the queryset annotation, counting only for freshly created instances."""
+        count = getattr(obj, 'applications_count', None)
+        return obj.applications.count() if count is None else count
+
     @transaction.atomic
     def create(self, validated_data):
-        """Check if user can post a job before creating."""
+        """
+        Check if user can post a job before creating.
+
+        A job the user already posted (same normalised title and description)
+        is rejected or merged per JOB_DUPLICATE_POLICY (see business.duplicates).
+        """
         user = self.context['request'].user
         if not getattr(user, "can_post_ajob", False):
             raise serializers.ValidationError("You are not allowed to post a job.")
-        job = Jobs.objects.create(**validated_data)
+        posted_by = validated_data.get('posted_by', user)
+        duplicate = duplicates.find(posted_by, validated_data['title'], validated_data['description'])
+        if duplicate is not None:
+            return duplicates.resolve(duplicate, validated_data)
+        try:
+            with transaction.atomic():
+                job = Jobs.objects.create(**validated_data)
+        except IntegrityError:
+            # the same job was posted by a concurrent request
+            duplicate = duplicates.find(posted_by, validated_data['title'], validated_data['description'])
+            if duplicate is None:
+                raise
+            return duplicates.resolve(duplicate, validated_data)
         return job
     
     @transaction.atomic
     def update(self, instance, validated_data):
+        """Refuse edits that turn the job into a copy of another job of the poster."""
+        title = validated_data.get('title', instance.title)
+        description = validated_data.get('description', instance.description)
+        if (title, description) != (instance.title, instance.description):
+            duplicate = duplicates.find(instance.posted_by_id, title, description, exclude=instance.pk)
+            if duplicate is not None:
+                duplicates.reject(duplicate)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        try:
+            with transaction.atomic():
+                instance.save()
+        except IntegrityError:
+            # a concurrent request stored the same text for this poster
+            duplicate = duplicates.find(instance.posted_by_id, title, description, exclude=instance.pk)
+            if duplicate is None:
+                raise
+            duplicates.reject(duplicate)
         return instance
     
+class JobImportSerializer(JobSerializer):
+    """
+    Serializer validating one row of a bulk job import (see business.imports).
+
+    The category is given by name; rows are validated with run_validation
+    and inserted by the importer, never saved through this serializer.
+    """
+    category = serializers.CharField(required=False, max_length=100)
+
+    class Meta(JobSerializer.Meta):
+        fields = ['title', 'description', 'location', 'working_area', 'longevity', 'type', 'category']
+
+
+class JobImportReportSerializer(serializers.Serializer):
+    """
+    Result of a bulk job import: the number of jobs created and failed rows,
+    with the errors of up to MAX_REPORTED_ERRORS of them.
+    """
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.DictField())
+
+
+class RecommendedJobSerializer(JobSerializer):
+    """
+    Serializer for a recommended job: the job plus its recommendation score,
+    provided by the 'score' annotation.
+    """
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['score']
+
+
+class SimilarJobSerializer(JobSerializer):
+    """
+    Serializer for a job similar to another: the job plus the estimated
+    similarity of their texts (0 to 1), set as the 'similarity' attribute.
+    """
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['similarity']
+
+
 class ApplicationSerializer(serializers.ModelSerializer):
     """
     Serializer for the Applications model.
     """
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     job = serializers.PrimaryKeyRelatedField(read_only=True)
+    # kept in blob storage, read and stored by the model's resume property
+    resume = serializers.CharField()
     class Meta:
         model = Applications
         fields = ['id', 'job', 'user', 'status', 'resume', 'cover_letter', 'applied_at', 'updated_at']
@@ -111,6 +209,30 @@ class ApplicationSerializer(serializers.ModelSerializer):
         instance.save()
         return  instance
 
+class ApplicationSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for applications in lists.
+
+    Carries a preview of the resume and cover letter, and whether they were
+    cut, provided by Applications.objects.summaries(). The full text is
+    served by the detail endpoints, with ApplicationSerializer.
+    """
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+    job = serializers.PrimaryKeyRelatedField(read_only=True)
+    resume_preview = serializers.CharField(read_only=True)
+    resume_truncated = serializers.BooleanField(read_only=True)
+    cover_letter_preview = serializers.CharField(read_only=True)
+    cover_letter_truncated = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Applications
+        fields = [
+            'id', 'job', 'user', 'status', 'resume_preview', 'resume_truncated',
+            'cover_letter_preview', 'cover_letter_truncated', 'applied_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
 class JobApplicationStatusSerializer(serializers.ModelSerializer):
     """
     Serializer to update only the status of a job application.
@@ -124,12 +246,65 @@ class JobApplicationStatusSerializer(serializers.ModelSerializer):
         read_only_fields = ['id'] 
 
     def validate_status(self, value):
-        allowed_statuses = ['Pending', 'Accepted', 'Rejected']
-        if value not in allowed_statuses:
-            raise serializers.ValidationError(f"Status must be one of {allowed_statuses}.")
+        if value not in APPLICATION_STATUSES:
+            raise serializers.ValidationError(f"Status must be one of {APPLICATION_STATUSES}.")
         return value
 
 
+class ApplicationFilterSerializer(serializers.Serializer):
+    """
+    Selects applications of a job by their current status.
+    """
+    status = serializers.CharField(required=False)
+
+
+class BulkApplicationStatusSerializer(serializers.Serializer):
+    """
+    Serializer for changing the status of many applications of one job.
+
+    Applications are selected either by 'application_ids' or by 'filter'
+    (an empty filter selects every application of the job).
+    """
+    MAX_APPLICATIONS = 10000
+
+    status = serializers.CharField()
+    application_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False, max_length=MAX_APPLICATIONS
+    )
+    filter = ApplicationFilterSerializer(required=False)
+
+    def validate_status(self, value):
+        if value not in APPLICATION_STATUSES:
+            raise serializers.ValidationError(f"Status must be one of {APPLICATION_STATUSES}.")
+        return value
+
+    def validate(self, data):
+        """Require exactly one way of selecting applications."""
+        if ('application_ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide either 'application_ids' or 'filter'.")
+        return data
+
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    """
+    Serializer for marking notifications of the user as read.
+
+    Notifications are selected either by 'ids' or with 'all' set to true.
+    """
+    MAX_NOTIFICATIONS = 1000
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False, max_length=MAX_NOTIFICATIONS
+    )
+    all = serializers.BooleanField(required=False)
+
+    def validate(self, data):
+        """Require exactly one way of selecting notifications."""
+        if ('ids' in data) == bool(data.get('all')):
+            raise serializers.ValidationError("Provide either 'ids' or 'all': true.")
+        return data
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     """
     Serializer for the Notifications model.
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from .models import Applications, Notifications
-from .tasks import send_email_notification
+from .models import Categories, Jobs, Applications, Notifications
+from . import cache, emails, facets, notifications, poster_stats, search, similarity
 
 @receiver(post_save, sender=Applications)
 def create_notification_for_job_owner(sender, instance, created, **kwargs):
@@ -10,6 +11,10 @@ def create_notification_for_job_owner(sender, instance, created, **kwargs):
 
     Triggered whenever an Applications instance is saved.
 
+    In-app notifications are queued through notifications.dispatch and
+    inserted after the transaction commits. Emails go to the outbox
+    (business.emails) and are delivered in batches.
+
     Behavior:
         - When a new application is created:
             - Create an in-app notification for the job owner.
@@ -23,74 +28,152 @@ def create_notification_for_job_owner(sender, instance, created, **kwargs):
                 - Send email to applicant about rejection.
     """
     if created:  
-        Notifications.objects.create(
-            application=instance,  
-            recipient=instance.job.posted_by,
-            message=f"{instance.user} applied to your job: {instance.job.title}",
-        )
+        notifications.dispatch([notifications.application_submitted(instance)])
 
     if not created:
-        if instance.status == "Accepted":
-            Notifications.objects.create(
-                application=instance, 
-                recipient=instance.user,
-                message=(
-                    f"Your application for the job: {instance.job.title} has been reviewed. "
-                    "The job owner accepted your application. Please wait for an email with further details. "
-                    "Thank you!"
-                ),
-            )
-            # Send email notification for applicant
-            send_email_notification.delay(
-                subject="Job Application Result",
-                message=(
-                    f"Dear {getattr(instance.user, 'username', instance.user)},\n\n"
-                    f"🎉 Congratulations! You have been accepted for the job "
-                    f"**{instance.job.title}** you applied for on {instance.applied_at}.\n\n"
-                    "Please wait patiently for the job owner to contact you.\n\n"
-                    "Thanks for choosing our platform!"
-                ),
-                recipient_list=[instance.user.email] if instance.user.email else [],
-            )
-
-            # Send email notification for job owner
-            send_email_notification.delay(
-                    subject=f"You accepted the application of {getattr(instance.user, 'username', instance.user)} for the your job {instance.job} post.",
-                    message=(
-                        f"Hello {getattr(instance.job.posted_by, 'username', instance.job.posted_by)},\n\n"
-                        f"You have accepted the application of {getattr(instance.user, 'username', instance.user)} "
-                        f"for your job: **{instance.job.title}**.\n\n"
-                        f"Applicant details:\n"
-                        f"- Name: {getattr(instance.user, 'username', instance.user)}\n"
-                        f"- Email: {instance.user.email}\n"
-                        f"- Applied at: {instance.applied_at}\n\n"
-                        "Please reach out to the applicant to proceed further.\n\n"
-                        "Thank you for using our platform!"
-                    ),
-                    recipient_list=[instance.job.posted_by.email] if instance.job.posted_by.email else [],
-                )
-            
-        elif instance.status == "Rejected":
-            Notifications.objects.create(
-                application=instance,
-                recipient=instance.user,
-                message=(
-                    f"Your application for the job: {instance.job.title} has been reviewed. "
-                    "The job owner rejected your application. We encourage you to explore other jobs. "
-                    "Thank you for using our platform!"
-                ),
-            )
-            
-            # Send rejection email for applicant
-            send_email_notification.delay(
-                subject="Job Application Result: Rejected",
-                message=(
-                    f"Dear {getattr(instance.user, 'username', instance.user)},\n\n"
-                    f"Unfortunately, your application for the job **{instance.job.title}** "
-                    f"submitted on {instance.applied_at} was not accepted.\n\n"
-                    "We encourage you to explore other opportunities on our platform.\n\n"
-                    "Thank you for using our platform!"
-                ),
-
-                recipient_list=[instance.user.email] if instance.user.email else [],
-            ) 
+        reviewed, reviewed_emails = notifications.application_reviewed(instance)
+        notifications.dispatch(reviewed)
+        emails.queue_emails(reviewed_emails)
+
+
+@receiver(post_save, sender=Jobs)
+def update_job_search_index(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep the full-text index in step with job postings.
+
+    Saves that touch neither the title nor the description are skipped.
+    """
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    search.index_jobs([instance.pk], using=kwargs.get('using', 'default'))
+
+
+@receiver(post_delete, sender=Jobs)
+def remove_job_from_search_index(sender, instance, **kwargs):
+    """Drop a deleted job from the full-text index."""
+    search.unindex_jobs([instance.pk], using=kwargs.get('using', 'default'))
+
+
+@receiver(post_save, sender=Jobs)
+def update_similar_jobs_index(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep the similar-jobs index in step with job postings.
+
+    The index is a file shared by every worker, so it is only written once
+    the change is committed. Saves that touch neither the title nor the
+    description are skipped.
+    """
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    job_id = instance.pk
+    transaction.on_commit(lambda: similarity.index_jobs([job_id]), robust=True)
+
+
+@receiver(post_delete, sender=Jobs)
+def remove_job_from_similar_jobs_index(sender, instance, **kwargs):
+    """Drop a deleted job from the similar-jobs index once the delete is committed."""
+    # the instance loses its pk once deleted
+    job_id = instance.pk
+    transaction.on_commit(lambda: similarity.unindex_jobs([job_id]), robust=True)
+
+
+@receiver(post_save, sender=Jobs)
+def count_posted_job(sender, instance, created, **kwargs):
+    if created:
+        poster_stats.add_jobs_posted(instance.posted_by_id, 1)
+
+
+@receiver(post_delete, sender=Jobs)
+def uncount_posted_job(sender, instance, **kwargs):
+    poster_stats.add_jobs_posted(instance.posted_by_id, -1)
+
+
+@receiver(pre_save, sender=Applications)
+def remember_application_status(sender, instance, update_fields=None, **kwargs):
+    """
+    Note the stored status of an application about to be updated, for the poster's hires.
+
+    Inside a transaction the row stays locked until it commits, so two
+    concurrent status changes count their hires one after the other.
+    """
+    instance._stored_status = None
+    if instance._state.adding or (update_fields is not None and 'status' not in update_fields):
+        return
+    using = kwargs.get('using', 'default')
+    stored = Applications.objects.using(using).filter(pk=instance.pk)
+    if transaction.get_connection(using).in_atomic_block:
+        stored = stored.select_for_update()
+    instance._stored_status = stored.values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Applications)
+def count_hire(sender, instance, created, **kwargs):
+    """Count an application becoming Accepted (or ceasing to be) as a hire of the job's poster."""
+    previous = None if created else getattr(instance, '_stored_status', None)
+    if created or previous is not None:
+        poster_stats.add_hires_for_job(instance.job_id, poster_stats.hires_delta(previous, instance.status))
+
+
+@receiver(post_delete, sender=Applications)
+def uncount_hire(sender, instance, **kwargs):
+    if poster_stats.is_accepted(instance.status):
+        poster_stats.add_hires_for_job(instance.job_id, -1)
+
+
+@receiver(pre_save, sender=Jobs)
+def remember_job_facets(sender, instance, update_fields=None, **kwargs):
+    """
+    Note the stored facet values of a job about to be updated, so the
+    facet rollup can move it if they change.
+    """
+    instance._stored_facets = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {*facets.FACETS, *facets.COLUMNS} & set(update_fields):
+        return
+    instance._stored_facets = Jobs.objects.using(kwargs.get('using', 'default'))\
+                                          .filter(pk=instance.pk).values_list(*facets.COLUMNS).first()
+
+
+@receiver(post_save, sender=Jobs)
+def update_job_facet_counts(sender, instance, created, **kwargs):
+    """Count a new job in the facet rollup, or move an edited one."""
+    if created:
+        facets.adjust(facets.key_of(instance), 1)
+    elif getattr(instance, '_stored_facets', None) is not None:
+        facets.move(instance._stored_facets, facets.key_of(instance))
+
+
+@receiver(post_delete, sender=Jobs)
+def remove_job_from_facet_counts(sender, instance, **kwargs):
+    facets.adjust(facets.key_of(instance), -1)
+
+
+@receiver(pre_delete, sender=Categories)
+def uncategorize_facet_counts(sender, instance, **kwargs):
+    """The category's jobs become uncategorized (SET_NULL sends no job signals)."""
+    facets.uncategorize(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Jobs)
+@receiver([post_save, post_delete], sender=Categories)
+@receiver([post_save, post_delete], sender=Applications)
+def invalidate_job_board_cache(sender, **kwargs):
+    """Retire cached job board responses whenever the data behind them changes."""
+    cache.invalidate()
+
+
+@receiver(post_save, sender=Notifications)
+def refresh_unread_count(sender, instance, created, **kwargs):
+    """
+    Keep the recipient's unread counter correct when a notification is saved.
+
+    Notifications created through notifications.create are counted there
+    (bulk_create sends no signal). Any other save may have flipped is_read,
+    so the cached counter is dropped and recounted on the next read.
+    """
+    if created:
+        transaction.on_commit(lambda: notifications.announce([instance]), robust=True)
+        return
+    notifications.forget_unread_count(instance.recipient_id)
+    transaction.on_commit(lambda: notifications.forget_unread_count(instance.recipient_id), robust=True)
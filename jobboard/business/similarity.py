@@ -0,0 +1,343 @@
+"""
+Similar-jobs index: MinHash signatures with locality-sensitive hashing.
+
+Each job's title and description are cut into word shingles and reduced to
+a MinHash signature of NUM_PERM values; the share of equal values between
+two signatures estimates the Jaccard similarity of their shingle sets.
+Signatures are split into BANDS bands; jobs sharing any band are the
+candidates a query ranks.
+
+The index lives in SIMILAR_JOBS_INDEX_DIR and is memory-mapped by every
+process that queries it, so web workers share one copy:
+
+    - records-<generation>.bin: fixed-size records (job id, alive flag,
+      signature). Saved jobs are appended and their previous record is
+      marked dead, so writes never rewrite the file.
+    - bands-<generation>.bin: for each band, the band keys of the first
+      `base` records in sorted order, then the record each key belongs to.
+      Records appended after the last compaction are scanned directly.
+    - meta.json: the current generation and its `base`.
+
+`compact` drops dead records and re-sorts the bands into a new
+generation; writers serialise on an flock. It never runs inline with a
+save: periodic Celery tasks compact once the tail passes MAX_TAIL and on a
+fixed schedule otherwise (`build_similar_jobs_index --compact` by hand).
+
+Readers open files without the lock. A new generation leaves the previous
+one on disk, so a reader that has just read meta.json can still open its
+files; a reader that loses the race anyway rereads meta.json and retries.
+The files are local to one host: every host runs its own index.
+"""
+import fcntl
+import json
+import os
+import re
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+import numpy as np
+from django.conf import settings
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2
+# estimated Jaccard similarity below which a candidate is not reported
+MIN_SIMILARITY = 0.1
+# appended records after which the periodic check compacts the index
+MAX_TAIL = 10000
+# reads of meta.json and the generation it names before giving up
+SNAPSHOT_ATTEMPTS = 3
+
+PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240917)
+_A = _rng.integers(1, 2 ** 31 - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 31 - 1, NUM_PERM, dtype=np.uint64)
+_BAND_MULTIPLIERS = _rng.integers(1, 2 ** 63 - 1, ROWS, dtype=np.uint64) | np.uint64(1)
+
+RECORD = np.dtype([('job', '<u8', (2,)), ('alive', '<u4'), ('signature', '<u4', (NUM_PERM,))])
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def shingles(title, description):
+    """crc32 of every run of SHINGLE_SIZE words in the job's text."""
+    words = WORD_RE.findall(f'{title} {description}'.lower())
+    if len(words) < SHINGLE_SIZE:
+        grams = set(words)
+    else:
+        grams = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), np.uint64, len(grams))
+
+
+def signature(title, description):
+    """MinHash signature of a job's text."""
+    hashes = shingles(title, description)
+    if not len(hashes):
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, np.uint32)
+    return ((hashes[:, None] * _A + _B) % PRIME).min(axis=0).astype(np.uint32)
+
+
+def band_keys(signatures):
+    """One 64-bit key per band of each signature; shape (len(signatures), BANDS)."""
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    return (rows * _BAND_MULTIPLIERS).sum(axis=2, dtype=np.uint64)
+
+
+def _job_key(job_id):
+    return np.frombuffer(uuid.UUID(str(job_id)).bytes, '<u8')
+
+
+def _records(jobs):
+    """Records for (id, title, description) rows."""
+    jobs = list(jobs)
+    records = np.zeros(len(jobs), RECORD)
+    for position, (job_id, title, description) in enumerate(jobs):
+        records['job'][position] = _job_key(job_id)
+        records['signature'][position] = signature(title, description)
+    records['alive'] = 1
+    return records
+
+
+def _bands(path, base):
+    """(keys, records) of a bands file: per band, sorted keys and the record holding each."""
+    if not base:
+        return np.zeros((BANDS, 0), np.uint64), np.zeros((BANDS, 0), np.uint32)
+    mapped = np.memmap(path, np.uint8, 'r')
+    keys = np.ndarray((BANDS, base), '<u8', buffer=mapped)
+    records = np.ndarray((BANDS, base), '<u4', buffer=mapped, offset=BANDS * base * 8)
+    return keys, records
+
+
+class SimilarJobsIndex:
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self._lock = threading.Lock()
+        self._state = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._path('meta.json')) as meta:
+                return json.load(meta)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, meta):
+        temporary = self._path('meta.json.tmp')
+        with open(temporary, 'w') as handle:
+            json.dump(meta, handle)
+        os.replace(temporary, self._path('meta.json'))
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive access for writers of every process; yields the current meta."""
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor = os.open(self._path('lock'), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            meta = self._read_meta()
+            if meta is None:
+                meta = self._write_generation(np.zeros(0, RECORD), generation=0)
+            yield meta
+        finally:
+            os.close(descriptor)
+
+    def _write_generation(self, records, generation):
+        keys = band_keys(records['signature']).T
+        order = np.argsort(keys, axis=1, kind='stable')
+        with open(self._path(f'bands-{generation}.bin'), 'wb') as handle:
+            handle.write(np.take_along_axis(keys, order, axis=1).astype('<u8').tobytes())
+            handle.write(order.astype('<u4').tobytes())
+        with open(self._path(f'records-{generation}.bin'), 'wb') as handle:
+            handle.write(records.tobytes())
+        meta = {'generation': generation, 'base': len(records)}
+        self._write_meta(meta)
+        # the previous generation stays for readers that read meta.json before this one
+        for name in os.listdir(self.directory):
+            if name.endswith('.bin') and int(name[:-len('.bin')].rsplit('-', 1)[1]) < generation - 1:
+                os.remove(self._path(name))
+        return meta
+
+    def _kill(self, meta, job_ids):
+        path = self._path(f"records-{meta['generation']}.bin")
+        count = os.path.getsize(path) // RECORD.itemsize
+        if not count or not job_ids:
+            return
+        records = np.memmap(path, RECORD, 'r+', shape=(count,))
+        targets = {tuple(_job_key(job_id)) for job_id in job_ids}
+        high = np.fromiter((key[0] for key in targets), np.uint64, len(targets))
+        for position in np.flatnonzero(np.isin(records['job'][:, 0], high) & (records['alive'] == 1)):
+            if tuple(records['job'][position]) in targets:
+                records['alive'][position] = 0
+        records.flush()
+        del records
+
+    def add(self, jobs):
+        """Index (id, title, description) rows, replacing earlier versions of those jobs."""
+        records = _records(jobs)
+        if not len(records):
+            return
+        with self._writing() as meta:
+            self._kill(meta, [uuid.UUID(bytes=record['job'].tobytes()) for record in records])
+            path = self._path(f"records-{meta['generation']}.bin")
+            with open(path, 'ab') as handle:
+                handle.write(records.tobytes())
+
+    def remove(self, job_ids):
+        with self._writing() as meta:
+            self._kill(meta, list(job_ids))
+
+    def rebuild(self, jobs, chunk_size=5000):
+        """Replace the whole index with the given (id, title, description) rows."""
+        chunks, chunk = [], []
+        for job in jobs:
+            chunk.append(job)
+            if len(chunk) == chunk_size:
+                chunks.append(_records(chunk))
+                chunk = []
+        chunks.append(_records(chunk))
+        records = np.concatenate(chunks)
+        with self._writing() as meta:
+            self._write_generation(records, meta['generation'] + 1)
+
+    def size(self):
+        """Number of live jobs in the index."""
+        snapshot = self._snapshot()
+        return int(np.count_nonzero(snapshot[0]['alive'])) if snapshot else 0
+
+    def compact(self, min_tail=0):
+        """
+        Write a new generation holding the live records, all in the bands.
+
+        Skipped, returning False, while fewer than `min_tail` records were
+        appended since the last compaction.
+        """
+        with self._writing() as meta:
+            path = self._path(f"records-{meta['generation']}.bin")
+            if os.path.getsize(path) // RECORD.itemsize - meta['base'] < min_tail:
+                return False
+            self._compact(meta)
+            return True
+
+    def _compact(self, meta):
+        path = self._path(f"records-{meta['generation']}.bin")
+        records = np.fromfile(path, RECORD)
+        self._write_generation(records[records['alive'] == 1], meta['generation'] + 1)
+
+    def _snapshot(self):
+        """(records, bands, base) of the current generation, memory-mapped."""
+        for attempt in range(SNAPSHOT_ATTEMPTS):
+            try:
+                return self._load_snapshot()
+            except FileNotFoundError:
+                # the generation named by meta.json was replaced and removed meanwhile
+                with self._lock:
+                    self._state = None
+                if attempt == SNAPSHOT_ATTEMPTS - 1:
+                    raise
+
+    def _load_snapshot(self):
+        try:
+            meta_stat = os.stat(self._path('meta.json'))
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            state = self._state
+            if state is None or state['meta_mtime'] != meta_stat.st_mtime_ns:
+                meta = self._read_meta()
+                bands_path = self._path(f"bands-{meta['generation']}.bin")
+                state = {
+                    'meta_mtime': meta_stat.st_mtime_ns,
+                    'generation': meta['generation'],
+                    'base': meta['base'],
+                    'bands': _bands(bands_path, meta['base']),
+                    'records': None,
+                    'size': -1,
+                }
+            path = self._path(f"records-{state['generation']}.bin")
+            size = os.path.getsize(path) // RECORD.itemsize
+            if size != state['size']:
+                # appended records are only visible through a new mapping
+                state['records'] = np.memmap(path, RECORD, 'r', shape=(size,)) if size else np.zeros(0, RECORD)
+                state['size'] = size
+            self._state = state
+        return state['records'], state['bands'], state['base']
+
+    def query(self, title, description, limit=10, exclude=None):
+        """
+        The `limit` indexed jobs most similar to the given text, best first.
+
+        Returns (job_id, estimated Jaccard similarity) pairs.
+        """
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return []
+        records, bands, base = snapshot
+        query = signature(title, description)
+        keys = band_keys(query[None])[0]
+
+        found = []
+        band_key_rows, band_record_rows = bands
+        for band in range(BANDS):
+            column = band_key_rows[band]
+            first, last = np.searchsorted(column, keys[band], 'left'), np.searchsorted(column, keys[band], 'right')
+            found.append(band_record_rows[band, first:last].astype(np.int64))
+        if len(records) > base:
+            matches = (band_keys(np.asarray(records['signature'][base:])) == keys).any(axis=1)
+            found.append(np.flatnonzero(matches) + base)
+        candidates = np.unique(np.concatenate(found)) if found else np.zeros(0, np.int64)
+        candidates = candidates[records['alive'][candidates] == 1]
+        if exclude is not None:
+            excluded = _job_key(exclude)
+            candidates = candidates[~(records['job'][candidates] == excluded).all(axis=1)]
+
+        similarities = (records['signature'][candidates] == query).mean(axis=1)
+        keep = similarities >= MIN_SIMILARITY
+        candidates, similarities = candidates[keep], similarities[keep]
+        order = np.argsort(-similarities, kind='stable')[:limit]
+        return [
+            (uuid.UUID(bytes=records['job'][candidates[i]].tobytes()), float(similarities[i]))
+            for i in order
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    directory = str(settings.SIMILAR_JOBS_INDEX_DIR)
+    with _index_lock:
+        if _index is None or _index.directory != directory:
+            _index = SimilarJobsIndex(directory)
+        return _index
+
+
+def index_jobs(job_ids):
+    """(Re)index the given jobs; called after jobs are saved and by bulk paths."""
+    from .models import Jobs
+
+    job_ids = list(job_ids)
+    if job_ids:
+        get_index().add(Jobs.objects.filter(id__in=job_ids).values_list('id', 'title', 'description'))
+
+
+def unindex_jobs(job_ids):
+    get_index().remove(job_ids)
+
+
+def rebuild():
+    """Rebuild the index from every job in the database; returns the number indexed."""
+    from .models import Jobs
+
+    get_index().rebuild(Jobs.objects.values_list('id', 'title', 'description').iterator(chunk_size=5000))
+    return get_index().size()
+
+
+def similar_jobs(job, limit=10):
+    """(job_id, similarity) of the jobs most similar to `job`, best first."""
+    return get_index().query(job.title, job.description, limit=limit, exclude=job.pk)
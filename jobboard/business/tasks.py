@@ -1,6 +1,5 @@
 from celery import shared_task
-from django.core.mail import send_mail
-from django.conf import settings
+from . import emails, notifications, recommendations, similarity
 
 @shared_task
 def send_email_notification(subject, message, recipient_list):
@@ -8,14 +7,89 @@ def send_email_notification(subject, message, recipient_list):
     Celery task to send email notifications asynchronously.
 
     Behavior:
-        - Uses Django's send_mail function with DEFAULT_FROM_EMAIL from setting as the sender.
-        - Runs asynchronously via Celery.
-        - Raises an exception if sending fails (fail_silently=False).
-    """
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        recipient_list,
-        fail_silently=False,
-    )
+        - Adds the email to the outbox (see business.emails) instead of
+          opening a connection for it.
+        - Kept so tasks queued before the outbox existed are still delivered.
+    """
+    emails.queue_email(subject, message, recipient_list)
+
+
+@shared_task
+def flush_email_outbox():
+    """
+    Celery task to deliver queued emails in batches.
+
+    Behavior:
+        - Sends every due outbox email over one reused connection per batch.
+        - Failed messages are retried with exponential backoff.
+        - Also runs periodically from CELERY_BEAT_SCHEDULE.
+    """
+    return emails.flush_outbox()
+
+
+@shared_task
+def create_notifications(rows):
+    """
+    Celery task to insert notifications queued by notifications.dispatch.
+
+    Behavior:
+        - Receives plain dicts (recipient_id, application_id, message).
+        - Inserts them with a single bulk_create.
+    """
+    notifications.create(notifications.deserialize(rows))
+
+
+@shared_task
+def purge_read_notifications():
+    """
+    Celery task to delete old read notifications.
+
+    Behavior:
+        - Removes read notifications older than NOTIFICATIONS_RETENTION_DAYS
+          in bounded batches (see notifications.purge_read).
+        - Runs periodically from CELERY_BEAT_SCHEDULE.
+    """
+    return notifications.purge_read()
+
+
+@shared_task
+def rebuild_recommendations():
+    """
+    Celery task to recompute every user's recommended jobs.
+
+    Behavior:
+        - Rebuilds the job vectors, user profiles and top jobs per user
+          (see recommendations.rebuild).
+        - Runs periodically from CELERY_BEAT_SCHEDULE.
+    """
+    return recommendations.rebuild()
+
+
+@shared_task
+def fold_in_recommendations():
+    """
+    Celery task to add newly posted jobs to existing recommendations.
+
+    Behavior:
+        - Scores jobs posted since the last run against the stored user
+          profiles (see recommendations.fold_in).
+        - Runs periodically from CELERY_BEAT_SCHEDULE, between rebuilds.
+    """
+    return recommendations.fold_in()
+
+
+@shared_task
+def compact_similar_jobs_index(min_tail=0):
+    """
+    Celery task to compact the similar-jobs index.
+
+    Behavior:
+        - Drops records of deleted or edited jobs and sorts recently added
+          jobs into the LSH bands (see similarity.SimilarJobsIndex.compact).
+        - Skipped while fewer than `min_tail` jobs were added since the last
+          compaction.
+        - Runs periodically from CELERY_BEAT_SCHEDULE on every host that
+          serves the index: hourly, and every few minutes once the
+          appended tail passes similarity.MAX_TAIL.
+    """
+    return similarity.get_index().compact(min_tail=min_tail)
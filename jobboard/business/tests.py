@@ -1,11 +1,38 @@
 # tests/test_jobs.py
+import csv
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.urls import reverse
-from django.test import TestCase
-from rest_framework.test import APIClient
-from rest_framework import status
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import serializers, status
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Jobs, Categories, Applications, Notifications
+from accounts.authentication import ClaimsRefreshToken
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import PREVIEW_LENGTH, Jobs, Categories, Applications, Notifications, OutgoingEmails, JobFacetCounts
+from . import async_views, benchmarks, blobs, cache as job_cache, duplicates, emails, facets, imports, notifications, pubsub, queryplans, recommendations, search, similarity, tasks
+from jobboard import instrumentation
 
 User = get_user_model()
 
@@ -326,3 +353,1567 @@ class JobAPITests(TestCase):
         url = reverse("delete-notification", args=[self.notification_other_user.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # Full-text search
+    def test_search_returns_ranked_matches(self):
+        title_match = Jobs.objects.create(title="Python Developer", description="Build APIs.", posted_by=self.owner_user)
+        body_match = Jobs.objects.create(title="Engineer", description="Some python scripting.", posted_by=self.owner_user)
+        Jobs.objects.create(title="Accountant", description="Spreadsheets.", posted_by=self.owner_user)
+
+        response = self.client.get(self.job_list_url, {"search": "pyth"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [job["id"] for job in response.data["results"]]
+        self.assertEqual(ids, [str(title_match.id), str(body_match.id)])
+
+    def test_search_falls_back_to_icontains_on_other_databases(self):
+        match = Jobs.objects.create(title="Python Developer", description="Build APIs.", posted_by=self.owner_user)
+        Jobs.objects.create(title="Accountant", description="Spreadsheets.", posted_by=self.owner_user)
+        with mock.patch.object(search, "_vendor", return_value="mysql"):
+            jobs = search.search_jobs(Jobs.objects.all(), ["python", "api"])
+            self.assertEqual(list(jobs), [match])
+            response = self.client.get(reverse("async-jobs-list"), {"search": "python"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([job["id"] for job in response.json()["results"]], [str(match.id)])
+
+    def test_search_index_follows_job_updates_and_deletes(self):
+        self.authenticate(self.owner_tokens)
+        self.client.patch(self.user_jobs_update_url, {"description": "Kubernetes operator"}, format="json")
+        response = self.client.get(self.job_list_url, {"search": "kubernetes"})
+        self.assertEqual([job["id"] for job in response.data["results"]], [str(self.job1.id)])
+
+        self.client.delete(self.user_jobs_delete_url)
+        response = self.client.get(self.job_list_url, {"search": "kubernetes"})
+        self.assertEqual(response.data["count"], 0)
+
+    # Annotated counts
+    def test_job_list_query_count_does_not_grow_with_page_size(self):
+        for i in range(8):
+            job = Jobs.objects.create(title=f"Extra {i}", description="Desc", posted_by=self.owner_user)
+            Applications.objects.create(user=self.normal_user, job=job, resume="R", cover_letter="C")
+
+        # one COUNT for the paginator plus one SELECT for the page
+        with self.assertNumQueries(2):
+            response = self.client.get(self.job_list_url)
+        self.assertEqual(len(response.data["results"]), 10)
+        counts = {job["id"]: job["applications_count"] for job in response.data["results"]}
+        self.assertEqual(counts[str(self.job2.id)], 2)
+
+    def test_category_list_reports_jobs_count(self):
+        self.job1.category = self.category
+        self.job1.save()
+        self.authenticate(self.admin_tokens)
+        response = self.client.get(reverse("category-list"))
+        self.assertEqual(response.data["results"][0]["jobs_count"], 1)
+
+    # Keyset pagination
+    def test_cursor_pagination_walks_jobs_without_duplicates(self):
+        for i in range(11):
+            Jobs.objects.create(title=f"Extra {i}", description="Desc", posted_by=self.owner_user)
+
+        response = self.client.get(self.job_list_url, {"pagination": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+        first_page = [job["id"] for job in response.data["results"]]
+        self.assertEqual(len(first_page), 10)
+
+        response = self.client.get(response.data["next"])
+        second_page = [job["id"] for job in response.data["results"]]
+        self.assertEqual(len(second_page), 3)
+        self.assertIsNone(response.data["next"])
+        self.assertFalse(set(first_page) & set(second_page))
+
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([job["id"] for job in response.data["results"]], first_page)
+
+    def test_cursor_pagination_counts_only_on_request(self):
+        response = self.client.get(self.job_list_url, {"pagination": "cursor", "count": "true"})
+        self.assertEqual(response.data["count"], 2)
+
+    def test_cursor_pagination_rejects_garbage_cursor(self):
+        response = self.client.get(self.job_list_url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_pagination_keeps_unread_notifications_first(self):
+        self.authenticate(self.user_tokens)
+        response = self.client.get(self.list_url, {"pagination": "cursor"})
+        self.assertEqual([n["is_read"] for n in response.data["results"]], [False, False, True])
+
+    def test_cursor_pagination_matches_offset_order_for_notifications(self):
+        for i in range(12):
+            Notifications.objects.create(recipient=self.normal_user, message=f"Extra {i}", is_read=i % 2 == 0)
+        self.authenticate(self.user_tokens)
+
+        expected = list(
+            Notifications.objects.filter(recipient=self.normal_user)
+                                 .order_by("is_read", "-created_at", "-id")
+                                 .values_list("id", flat=True)
+        )
+        seen = []
+        response = self.client.get(self.list_url, {"pagination": "cursor"})
+        seen += [n["id"] for n in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            seen += [n["id"] for n in response.data["results"]]
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+    # Job board cache
+    def test_public_job_list_is_served_from_cache(self):
+        self.client.get(self.job_list_url, {"is_active": "true", "ordering": ""})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.job_list_url, {"is_active": "true"})
+        self.assertEqual(response.data["count"], 2)
+
+    def test_job_changes_invalidate_cached_responses(self):
+        self.client.get(self.job_detail_url)
+        self.job1.title = "Renamed"
+        self.job1.save()
+        response = self.client.get(self.job_detail_url)
+        self.assertEqual(response.data["title"], "Renamed")
+
+        self.client.get(self.job_list_url)
+        Applications.objects.create(user=self.owner_user, job=self.job1, resume="R", cover_letter="C")
+        response = self.client.get(self.job_list_url)
+        counts = {job["id"]: job["applications_count"] for job in response.data["results"]}
+        self.assertEqual(counts[str(self.job1.id)], 2)
+
+    def test_admin_can_read_cache_stats(self):
+        self.client.get(self.job_detail_url)
+        self.client.get(self.job_detail_url)
+        self.authenticate(self.admin_tokens)
+        response = self.client.get(reverse("job-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(response.data["hits"], 1)
+        self.assertGreaterEqual(response.data["misses"], 1)
+
+    # Application export
+    def test_job_owner_can_export_applications_as_csv(self):
+        url = reverse("job-applications-export", args=[self.job1.id])
+        self.authenticate(self.owner_tokens)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[0], "id,user,username,email,status,applied_at")
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].startswith(f"{self.application1.id},{self.normal_user.id},normaluser,"))
+
+    def test_export_streams_selected_fields_as_ndjson(self):
+        url = reverse("job-applications-export", args=[self.job1.id])
+        self.authenticate(self.owner_tokens)
+        response = self.client.get(url, {"export_format": "ndjson", "fields": "id,cover_letter"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(json.loads(lines[0]), {"id": str(self.application1.id), "cover_letter": "Cover letter 1"})
+
+    def test_export_rejects_unknown_fields(self):
+        url = reverse("job-applications-export", args=[self.job1.id])
+        self.authenticate(self.owner_tokens)
+        response = self.client.get(url, {"fields": "id,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_owner_cannot_export_applications(self):
+        url = reverse("job-applications-export", args=[self.job1.id])
+        self.authenticate(self.user_tokens)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    # Async read path
+    def test_async_job_list_matches_drf_response(self):
+        expected = self.client.get(self.job_list_url).json()
+        response = self.client.get(reverse("async-jobs-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], expected["count"])
+        self.assertEqual(response.json()["results"], expected["results"])
+
+    def test_async_job_list_filters_and_rejects_bad_values(self):
+        self.job2.working_area = "remote"
+        self.job2.save()
+        response = self.client.get(reverse("async-jobs-list"), {"working_area": "remote"})
+        self.assertEqual([job["id"] for job in response.json()["results"]], [str(self.job2.id)])
+        response = self.client.get(reverse("async-jobs-list"), {"working_area": "moon"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_async_job_list_matches_drf_ordering_and_category_errors(self):
+        for params in [
+            {"ordering": "title"},
+            {"ordering": "-title,id"},
+            {"ordering": "password,-posted_at"},
+            {"ordering": "posted_by__password"},
+            {"category": str(uuid.uuid4())},
+            {"category": "not-a-uuid"},
+            {"category": str(self.category.id), "working_area": "moon"},
+        ]:
+            expected = self.client.get(self.job_list_url, params)
+            response = self.client.get(reverse("async-jobs-list"), params)
+            self.assertEqual(response.status_code, expected.status_code, params)
+            if expected.status_code == status.HTTP_200_OK:
+                self.assertEqual(response.json()["results"], expected.json()["results"], params)
+            else:
+                self.assertEqual(response.json(), expected.json(), params)
+
+    def test_async_job_detail(self):
+        response = self.client.get(reverse("async-jobs-detail", args=[self.job1.id]))
+        self.assertEqual(response.json(), self.client.get(self.job_detail_url).json())
+        response = self.client.get(reverse("async-jobs-detail", args=[self.category.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_feeds_match_drf_responses(self):
+        self.authenticate(self.user_tokens)
+        for drf_url, async_url in [
+            (self.list_url, reverse("async-list-notifications")),
+            (self.user_applications_list_url, reverse("async-user-applications-list")),
+        ]:
+            expected = self.client.get(drf_url).json()
+            response = self.client.get(async_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["results"], expected["results"])
+
+    def test_async_feeds_require_authentication(self):
+        response = self.client.get(reverse("async-list-notifications"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        response = self.client.get(reverse("async-user-applications-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # Unread counter and notification push
+    def test_unread_count_is_maintained_without_queries(self):
+        self.authenticate(self.user_tokens)
+        url = reverse("unread-notification-count")
+        self.assertEqual(self.client.get(url).data, {"unread_count": 2})
+        # auth user only: the counter is cached
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).data["unread_count"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.dispatch([Notifications(recipient=self.normal_user, message="New")])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).data["unread_count"], 3)
+
+        self.client.get(self.retrieve_url)
+        self.assertEqual(self.client.get(url).data["unread_count"], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("delete-notification", args=[self.notification3.id]))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).data["unread_count"], 1)
+
+    def test_poll_waits_for_a_published_notification(self):
+        self.authenticate(self.user_tokens)
+        created = Notifications.objects.create(recipient=self.normal_user, message="Pushed")
+        publisher = threading.Timer(0.2, notifications.announce, args=[[created]])
+        publisher.start()
+        try:
+            response = self.client.get(reverse("poll-notifications"), {"timeout": 5})
+        finally:
+            publisher.join()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([n["message"] for n in response.json()["results"]], ["Pushed"])
+        self.assertEqual(response.json()["cursor"], response.json()["results"][0]["created_at"])
+
+    def test_poll_catches_up_from_a_cursor(self):
+        self.authenticate(self.user_tokens)
+        cursor = self.client.get(reverse("poll-notifications"), {"timeout": 0}).json()["cursor"]
+        Notifications.objects.create(recipient=self.normal_user, message="Missed")
+        response = self.client.get(reverse("poll-notifications"), {"timeout": 0, "after": cursor})
+        self.assertEqual([n["message"] for n in response.json()["results"]], ["Missed"])
+        response = self.client.get(reverse("poll-notifications"), {"timeout": 60})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_stream_sends_unread_count_and_notifications(self):
+        token = self.user_tokens["access"]
+        headers = {"Authorization": f"Bearer {token}", "Last-Event-ID": "2000-01-01T00:00:00Z"}
+        with mock.patch.object(async_views, "STREAM_LIFETIME", 0.1):
+            response = await AsyncClient().get(reverse("stream-notifications"), headers=headers)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            body = "".join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertTrue(body.startswith("retry: "))
+        self.assertEqual(body.count("event: notification"), 3)
+        self.assertIn('event: unread_count\ndata: {"unread_count": 2}', body)
+
+    def test_notification_push_requires_authentication(self):
+        for name in ("unread-notification-count", "poll-notifications", "stream-notifications"):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_failed_publish_does_not_fail_the_request(self):
+        self.authenticate(self.user_tokens)
+        with mock.patch.object(notifications.pubsub, "publish", side_effect=ConnectionError("redis is down")) as publish:
+            with self.assertLogs("business.notifications", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+                notifications.dispatch([
+                    Notifications(recipient=self.normal_user, message="First"),
+                    Notifications(recipient=self.normal_user, message="Second"),
+                ])
+        self.assertEqual(publish.call_count, 2)
+        self.assertTrue(Notifications.objects.filter(message="Second").exists())
+        self.assertEqual(self.client.get(reverse("unread-notification-count")).data["unread_count"], 4)
+
+    def test_unread_count_taken_during_a_change_is_not_cached(self):
+        cache = job_cache.get_cache()
+        recipient_id = self.normal_user.pk
+        # a reader picks its key and counts 2 unread...
+        key = notifications._unread_key(recipient_id, notifications._unread_version(cache, recipient_id))
+        # ...a notification is created and finds no counter to adjust...
+        Notifications.objects.bulk_create([Notifications(recipient=self.normal_user, message="Racing")])
+        notifications.adjust_unread_count(recipient_id, 1)
+        # ...and the reader caches its count
+        cache.add(key, 2)
+        self.assertEqual(notifications.unread_count(recipient_id), 3)
+
+    def test_pubsub_listener_reconnects(self):
+        delivered = threading.Event()
+        stopped = threading.Event()
+
+        class PubSub:
+            connects = 0
+
+            def psubscribe(self, pattern):
+                PubSub.connects += 1
+                if PubSub.connects == 1:
+                    raise ConnectionError("connection refused")
+
+            def listen(self):
+                yield {"channel": b"jobboard:pubsub:notifications:1", "data": b'{"message": "Hi"}'}
+                stopped.wait(5)
+                yield {"channel": b"jobboard:pubsub:notifications:1", "data": b"{}"}
+
+            def close(self):
+                pass
+
+        redis = mock.Mock()
+        redis.Redis.from_url.return_value.pubsub.side_effect = lambda **kwargs: PubSub()
+        with mock.patch.dict("sys.modules", redis=redis):
+            backend = pubsub.RedisBackend("redis://example")
+        backend.RECONNECT_DELAY = 0.01
+        with self.assertLogs("business.pubsub", "WARNING"), backend.subscribe("notifications:1") as subscription:
+            subscription.deliver = lambda message: delivered.set()
+            self.assertTrue(delivered.wait(5))
+            listener = backend._listener
+            backend.stop()
+            stopped.set()
+            listener.join(5)
+        self.assertEqual(PubSub.connects, 2)
+        self.assertIsNone(backend._listener)
+
+    # Bulk mark-read and retention
+    def test_mark_selected_notifications_read_in_one_update(self):
+        self.authenticate(self.user_tokens)
+        url = reverse("mark-notifications-read")
+        self.client.get(reverse("unread-notification-count"))
+        ids = [str(self.notification1.id), str(self.notification2.id), str(self.notification_other_user.id)]
+        # auth user, UPDATE (+ savepoints)
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            response = self.client.post(url, {"ids": ids}, format="json")
+        self.assertEqual(response.data["updated"], 1)
+        self.notification_other_user.refresh_from_db()
+        self.assertFalse(self.notification_other_user.is_read)
+        self.assertEqual(self.client.get(reverse("unread-notification-count")).data["unread_count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"all": True}, format="json")
+        self.assertEqual(response.data["updated"], 1)
+        self.assertFalse(Notifications.objects.filter(recipient=self.normal_user, is_read=False).exists())
+
+    def test_mark_read_requires_a_single_selection(self):
+        self.authenticate(self.user_tokens)
+        url = reverse("mark-notifications-read")
+        for payload in ({}, {"all": False}, {"all": True, "ids": [str(self.notification1.id)]}):
+            response = self.client.post(url, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_purge_read_deletes_old_read_notifications_in_batches(self):
+        old = [
+            Notifications.objects.create(recipient=self.normal_user, message=f"Old {i}", is_read=True)
+            for i in range(3)
+        ]
+        unread_old = Notifications.objects.create(recipient=self.normal_user, message="Old unread")
+        Notifications.objects.filter(id__in=[n.id for n in [*old, unread_old]])\
+                             .update(created_at=timezone.now() - timedelta(days=200))
+
+        self.assertEqual(notifications.purge_read(batch_size=2, max_batches=1), {"deleted": 2, "complete": False})
+        self.assertEqual(notifications.purge_read(batch_size=2), {"deleted": 1, "complete": True})
+        self.assertFalse(Notifications.objects.filter(id__in=[n.id for n in old]).exists())
+        self.assertTrue(Notifications.objects.filter(id=unread_old.id).exists())
+        # recent read notifications are kept
+        self.assertTrue(Notifications.objects.filter(id=self.notification2.id).exists())
+
+    # Notification dispatch
+    def test_application_notifies_job_owner_after_commit(self):
+        self.authenticate(self.user_tokens)
+        payload = {"resume": "New Resume", "cover_letter": "New Cover Letter"}
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(self.user_application_create_url, payload, format="json")
+            self.assertFalse(Notifications.objects.filter(recipient=self.owner_user, application__resume_preview="New Resume").exists())
+
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+        self.assertTrue(Notifications.objects.filter(recipient=self.owner_user, application__resume_preview="New Resume").exists())
+
+    @override_settings(NOTIFICATIONS_DEFER_TO_CELERY=True)
+    def test_notifications_can_be_deferred_to_celery(self):
+        with mock.patch("business.tasks.create_notifications.delay") as delay, \
+             mock.patch("business.emails.schedule_flush"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.application1.status = "Rejected"
+                self.application1.save()
+        rows = delay.call_args.args[0]
+        self.assertEqual(rows[0]["recipient_id"], str(self.normal_user.id))
+        self.assertEqual(rows[0]["application_id"], str(self.application1.id))
+
+    # Email outbox
+    def test_accepted_application_emails_are_sent_in_one_batch(self):
+        self.application1.status = "Accepted"
+        self.application1.save()
+        self.assertEqual(OutgoingEmails.objects.filter(status="pending").count(), 2)
+
+        with mock.patch("business.emails.get_connection", wraps=get_connection) as connections:
+            summary = emails.flush_outbox()
+        self.assertEqual(connections.call_count, 1)
+        self.assertEqual(summary["sent"], 2)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [self.owner_user.email, self.normal_user.email])
+        self.assertFalse(OutgoingEmails.objects.filter(status="pending").exists())
+
+    def test_failed_emails_are_retried_with_backoff(self):
+        emails.queue_emails([("First", "Body", ["a@example.com"]), ("Second", "Body", ["b@example.com"])])
+        backend = "django.core.mail.backends.locmem.EmailBackend.send_messages"
+        with mock.patch(backend, side_effect=[OSError("connection reset"), 1]):
+            summary = emails.flush_outbox()
+        self.assertEqual(summary, {"sent": 1, "failed": 0, "retrying": 1})
+
+        retrying = OutgoingEmails.objects.get(status="pending")
+        self.assertEqual(retrying.attempts, 1)
+        self.assertGreater(retrying.next_attempt_at, timezone.now())
+        self.assertIn("connection reset", retrying.last_error)
+
+        retrying.attempts = emails.MAX_ATTEMPTS - 1
+        retrying.next_attempt_at = timezone.now()
+        retrying.save()
+        with mock.patch(backend, side_effect=OSError("still down")):
+            emails.flush_outbox()
+        retrying.refresh_from_db()
+        self.assertEqual(retrying.status, "failed")
+
+    def test_emails_are_claimed_before_sending(self):
+        emails.queue_emails([("Claimed", "Body", ["a@example.com"])])
+        seen = []
+
+        def send_messages(messages):
+            seen.append(OutgoingEmails.objects.get().status)
+            return len(messages)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=send_messages):
+            self.assertEqual(emails.flush_outbox()["sent"], 1)
+        self.assertEqual(seen, ["sending"])
+        self.assertEqual(OutgoingEmails.objects.get().status, "sent")
+
+    def test_expired_claims_are_sent_again(self):
+        rows = emails.queue_emails([("Fresh", "Body", ["a@example.com"]), ("Stale", "Body", ["b@example.com"])])
+        self.assertEqual(len(emails.claim_batch()), 2)
+        # a flush claimed both, then died before recording anything
+        self.assertEqual(emails.flush_outbox()["sent"], 0)
+        OutgoingEmails.objects.filter(pk=rows[1].pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(emails.flush_outbox()["sent"], 1)
+        self.assertEqual([m.subject for m in mail.outbox], ["Stale"])
+        self.assertEqual(OutgoingEmails.objects.get(pk=rows[0].pk).status, "sending")
+
+    # Bulk application status update
+    def test_job_owner_can_bulk_update_application_status(self):
+        extra = [
+            Applications.objects.create(user=self.normal_user, job=self.job1, resume=f"R{i}", cover_letter="C")
+            for i in range(3)
+        ]
+        url = reverse("job-applications-bulk-status", args=[self.job1.id])
+        self.authenticate(self.owner_tokens)
+        with mock.patch("business.emails.schedule_flush") as flush, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"status": "Rejected", "filter": {"status": "pending"}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 4)
+        self.assertEqual(Applications.objects.filter(job=self.job1, status="Rejected").count(), 4)
+        self.assertEqual(Notifications.objects.filter(application__in=[self.application1, *extra]).count(), 4)
+        self.assertEqual(OutgoingEmails.objects.count(), 4)
+        flush.assert_called_once_with(4)
+
+    def test_bulk_update_runs_a_fixed_number_of_queries(self):
+        for i in range(20):
+            Applications.objects.create(user=self.normal_user, job=self.job1, resume=f"R{i}", cover_letter="C")
+        url = reverse("job-applications-bulk-status", args=[self.job1.id])
+        self.authenticate(self.owner_tokens)
+        # auth user, job, applications, UPDATE, outbox INSERT (+ savepoints)
+        with self.assertNumQueries(7):
+            self.client.post(url, {"status": "Rejected", "filter": {}}, format="json")
+
+    def test_bulk_update_reports_each_application(self):
+        self.application1.status = "Rejected"
+        self.application1.save()
+        pending = Applications.objects.create(user=self.normal_user, job=self.job1, resume="R", cover_letter="C")
+        url = reverse("job-applications-bulk-status", args=[self.job1.id])
+        self.authenticate(self.owner_tokens)
+        ids = [str(pending.id), str(self.application1.id), str(self.application2.id)]
+        response = self.client.post(url, {"status": "Rejected", "application_ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["result"] for r in response.data["results"]], ["updated", "unchanged", "not_found"])
+        self.assertEqual(Applications.objects.get(id=self.application2.id).status, "pending")
+
+    def test_non_owner_cannot_bulk_update_application_status(self):
+        url = reverse("job-applications-bulk-status", args=[self.job1.id])
+        self.authenticate(self.user_tokens)
+        response = self.client.post(url, {"status": "Accepted", "filter": {}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Applications.objects.filter(status="Accepted").exists())
+
+    def test_bulk_update_requires_a_single_selection(self):
+        url = reverse("job-applications-bulk-status", args=[self.job1.id])
+        self.authenticate(self.owner_tokens)
+        response = self.client.post(url, {"status": "Accepted"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DuplicateJobTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="dupowner", email="dupowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.applicant = User.objects.create_user(
+            username="dupapplicant", email="dupapplicant@example.com", password="Userpass@123"
+        )
+        self.job = Jobs.objects.create(
+            title="Backend Developer", description="Build APIs and backend services.",
+            location="Addis Ababa", working_area="onsite", longevity="permanent",
+            type="full-time", posted_by=self.owner,
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.owner)['access']}")
+        self.create_url = reverse("user-crate-jobs")
+        self.payload = {
+            "title": "backend  developer!",
+            "description": "Build APIs, and backend services",
+            "location": "Adama",
+            "working_area": "onsite",
+            "longevity": "permanent",
+            "type": "part-time",
+        }
+
+    def test_fingerprint_ignores_case_spacing_and_punctuation(self):
+        self.assertEqual(
+            Jobs.compute_fingerprint("Backend Developer", "Build APIs and backend services."),
+            Jobs.compute_fingerprint("BACKEND developer", "build  APIs, and backend services"),
+        )
+        self.assertNotEqual(
+            Jobs.compute_fingerprint("Backend Developer", "Build APIs"),
+            Jobs.compute_fingerprint("Frontend Developer", "Build APIs"),
+        )
+
+    def test_duplicate_posting_is_rejected(self):
+        response = self.client.post(self.create_url, self.payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["duplicate_of"], [str(self.job.id)])
+        self.assertEqual(Jobs.objects.filter(posted_by=self.owner).count(), 1)
+
+    def test_same_posting_by_another_user_is_allowed(self):
+        other = User.objects.create_user(
+            username="dupother", email="dupother@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(other)['access']}")
+        response = self.client.post(self.create_url, self.payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(JOB_DUPLICATE_POLICY="merge")
+    def test_duplicate_posting_is_merged(self):
+        Jobs.objects.filter(id=self.job.id).update(is_active=False)
+        response = self.client.post(self.create_url, self.payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], str(self.job.id))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.location, self.job.type), ("Adama", "part-time"))
+        self.assertEqual(Jobs.objects.filter(posted_by=self.owner).count(), 1)
+
+    def test_edit_into_a_duplicate_is_rejected(self):
+        other = Jobs.objects.create(
+            title="Frontend Developer", description="Build web pages.", location="Adama",
+            working_area="onsite", longevity="permanent", type="full-time", posted_by=self.owner,
+        )
+        url = reverse("user-jobs-update", args=[other.id])
+        response = self.client.patch(url, {"title": "Backend developer", "description": self.job.description}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["duplicate_of"], [str(self.job.id)])
+
+    def test_editing_other_fields_of_an_unfingerprinted_copy(self):
+        legacy = Jobs.objects.create(
+            title="Draft", description="Draft", location="Adama",
+            working_area="onsite", longevity="permanent", type="full-time", posted_by=self.owner,
+        )
+        # a copy of self.job saved before fingerprints existed
+        Jobs.objects.filter(id=legacy.id).update(
+            title="Backend developer", description="Build APIs, and backend services", fingerprint=None,
+        )
+        url = reverse("user-jobs-update", args=[legacy.id])
+        response = self.client.patch(url, {"is_active": False}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(Jobs.objects.get(id=legacy.id).fingerprint)
+
+    def test_concurrent_edit_into_a_duplicate_is_rejected(self):
+        other = Jobs.objects.create(
+            title="Frontend Developer", description="Build web pages.", location="Adama",
+            working_area="onsite", longevity="permanent", type="full-time", posted_by=self.owner,
+        )
+        url = reverse("user-jobs-update", args=[other.id])
+        # the copy is stored between the duplicate check and the save
+        with mock.patch.object(duplicates, "find", side_effect=[None, self.job]):
+            response = self.client.patch(url, {"title": "Backend developer", "description": self.job.description}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["duplicate_of"], [str(self.job.id)])
+
+    def test_dedupe_merges_into_the_oldest_copy(self):
+        copies = [
+            Jobs.objects.create(
+                title=f"Copy {n}", description="Build APIs and backend services.", location="Adama",
+                working_area="onsite", longevity="permanent", type="full-time", posted_by=self.owner,
+            )
+            for n in range(2)
+        ]
+        Applications.objects.create(user=self.applicant, job=copies[0], resume="r", cover_letter="c")
+        Applications.objects.create(user=self.applicant, job=copies[1], resume="r", cover_letter="c")
+        # rows saved before fingerprints existed
+        Jobs.objects.filter(id__in=[job.id for job in copies]).update(title="Backend Developer")
+        Jobs.objects.update(fingerprint=None)
+
+        out = io.StringIO()
+        call_command("dedupe_jobs", "--dry-run", stdout=out)
+        self.assertIn("2 duplicate", out.getvalue())
+        self.assertEqual(Jobs.objects.count(), 3)
+
+        summary = duplicates.dedupe(batch_size=1)
+        self.assertEqual(summary, {"fingerprinted": 1, "merged": 2, "applications_moved": 1})
+        self.assertEqual(list(Jobs.objects.values_list("id", flat=True)), [self.job.id])
+        self.assertEqual(Applications.objects.get().job_id, self.job.id)
+        self.assertIsNotNone(Jobs.objects.get().fingerprint)
+
+
+class JobFacetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="facetowner", email="facetowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.it = Categories.objects.create(name="IT", description="IT Jobs")
+        self.care = Categories.objects.create(name="Care", description="Care Jobs")
+        self.remote = self.create_job("Python developer", working_area="remote", category=self.it)
+        self.onsite = self.create_job("Nurse", working_area="onsite", type="part-time", category=self.care)
+        self.closed = self.create_job("Java developer", working_area="remote", category=self.it, is_active=False)
+        self.url = reverse("jobs-facets")
+
+    def create_job(self, title, **fields):
+        fields = {"working_area": "onsite", "longevity": "permanent", "type": "full-time", **fields}
+        return Jobs.objects.create(title=title, description=f"{title} wanted", posted_by=self.owner, **fields)
+
+    def assertRollupMatchesJobs(self):
+        self.assertEqual(facets.board_counts(), facets.counts(Jobs.objects.all()))
+
+    def test_board_counts_come_from_the_rollup(self):
+        job_cache.bump_version()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(response.data["facets"]["working_area"], {"onsite": 1, "remote": 2, "hybrid": 0})
+        self.assertEqual(response.data["facets"]["type"], {"full-time": 2, "part-time": 1})
+        self.assertEqual(response.data["facets"]["category"], {str(self.it.id): 2, str(self.care.id): 1})
+        self.assertEqual(response.data["facets"]["is_active"], {"true": 2, "false": 1})
+        self.assertRollupMatchesJobs()
+
+    def test_filtered_counts_use_one_grouped_query(self):
+        job_cache.bump_version()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"working_area": "remote", "is_active": "true"})
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["facets"]["category"], {str(self.it.id): 1})
+        self.assertEqual(response.data["facets"]["longevity"], {"contractual": 0, "permanent": 1})
+
+    def test_rollup_follows_creates_edits_and_deletes(self):
+        self.create_job("Hybrid designer", working_area="hybrid")
+        self.assertRollupMatchesJobs()
+        self.closed.is_active = True
+        self.closed.save()
+        self.remote.category = self.care
+        self.remote.save(update_fields=["category"])
+        self.assertRollupMatchesJobs()
+        self.onsite.delete()
+        self.assertRollupMatchesJobs()
+        self.it.delete()
+        self.assertRollupMatchesJobs()
+        self.assertEqual(facets.board_counts()["count"], 3)
+
+    def test_rebuild_restores_the_rollup(self):
+        JobFacetCounts.objects.update(count=0)
+        call_command("rebuild_job_facets", stdout=io.StringIO())
+        self.assertRollupMatchesJobs()
+
+
+class JobImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="importowner", email="importowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.it = Categories.objects.create(name="IT", description="IT Jobs")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.owner)['access']}")
+        self.url = reverse("user-import-jobs")
+
+    def ndjson(self, count, start=0):
+        return "".join(
+            json.dumps({"title": f"Engineer {i}", "description": "Build things", "working_area": "remote",
+                        "longevity": "permanent", "type": "full-time", "category": "it"}) + "\n"
+            for i in range(start, start + count)
+        )
+
+    def test_csv_upload_reports_row_errors_without_aborting(self):
+        content = (
+            "title,description,location,working_area,longevity,type,category\n"
+            "Backend Developer,Build APIs,Addis Ababa,onsite,permanent,full-time,it\n"
+            "Remote Tester,Test apps,Addis Ababa,remote,permanent,full-time,\n"
+            "Designer,Design pages,,hybrid,contractual,part-time,Arts\n"
+            "Backend developer,Build APIs!,,onsite,permanent,full-time,\n"
+            "Data Engineer,Build pipelines,,remote,contractual,full-time,IT\n"
+        )
+        upload = io.BytesIO(content.encode())
+        upload.name = "jobs.csv"
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 3))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3, 4, 5])
+        self.assertIn("category", response.data["errors"][1]["errors"])
+        self.assertEqual(
+            set(Jobs.objects.filter(posted_by=self.owner, category=self.it).values_list("title", flat=True)),
+            {"Backend Developer", "Data Engineer"},
+        )
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.jobs_posted, 2)
+        self.assertEqual(facets.board_counts(), facets.counts(Jobs.objects.all()))
+        self.assertEqual(Jobs.objects.exclude(fingerprint=None).count(), 2)
+
+    def test_ndjson_body_is_imported_in_constant_queries_per_batch(self):
+        # creates the facet rollup row both imports update
+        self.client.post(self.url, self.ndjson(1), content_type="application/x-ndjson")
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(self.url, self.ndjson(5, start=1), content_type="application/x-ndjson")
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(self.url, self.ndjson(60, start=6), content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"], 60)
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(Jobs.objects.filter(posted_by=self.owner).count(), 66)
+
+    def test_invalid_json_lines_are_reported(self):
+        body = self.ndjson(1) + "{not json\n" + "[1, 2]\n"
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3])
+
+    def test_unreadable_stream_keeps_the_rows_read_before(self):
+        body = self.ndjson(3).encode() + b'{"title": "Caf\xe9"}\n' + self.ndjson(1, start=3).encode()
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["failed"]), (3, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 4)
+        self.assertIn("cannot be read", response.data["errors"][0]["errors"]["non_field_errors"][0])
+
+        content = (
+            "title,description,working_area,longevity,type\n"
+            "Backend Developer,Build APIs,onsite,permanent,full-time\n"
+            f"Tester,{'x' * (csv.field_size_limit() + 1)},remote,permanent,full-time\n"
+        )
+        response = self.client.post(self.url, content, content_type="text/csv")
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+
+    def test_only_posters_can_import(self):
+        user = User.objects.create_user(username="importer", email="importer@example.com", password="Userpass@123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(user)['access']}")
+        response = self.client.post(self.url, self.ndjson(1), content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as handle:
+            handle.write(self.ndjson(3))
+            handle.flush()
+            out = io.StringIO()
+            call_command("import_jobs", handle.name, "--user", self.owner.email, "--batch-size", "2", stdout=out)
+        self.assertIn("Created 3 jobs, 0 rows failed.", out.getvalue())
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.jobs_posted, 3)
+
+
+class PosterStatsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="statsowner", email="statsowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.applicants = [
+            User.objects.create_user(username=f"statsapplicant{i}", email=f"statsapplicant{i}@example.com",
+                                     password="Userpass@123")
+            for i in range(3)
+        ]
+        self.job = Jobs.objects.create(
+            title="Backend Developer", description="Build APIs", working_area="remote",
+            longevity="permanent", type="full-time", posted_by=self.owner,
+        )
+        self.applications = [
+            Applications.objects.create(user=user, job=self.job, resume="Resume", cover_letter="Cover letter")
+            for user in self.applicants
+        ]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.owner)['access']}")
+
+    def assertStats(self, jobs_posted, number_of_hires):
+        self.owner.refresh_from_db()
+        self.assertEqual((self.owner.jobs_posted, self.owner.number_of_hires), (jobs_posted, number_of_hires))
+
+    def set_status(self, application, new_status):
+        url = reverse("application-update-status", args=[application.id])
+        response = self.client.patch(url, {"status": new_status}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_jobs_posted_follows_creates_and_deletes(self):
+        self.assertStats(1, 0)
+        response = self.client.post(reverse("user-crate-jobs"), {
+            "title": "Data Engineer", "description": "Build pipelines", "working_area": "remote",
+            "longevity": "permanent", "type": "full-time",
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertStats(2, 0)
+        self.client.delete(reverse("user-jobs-delete", args=[response.data["id"]]))
+        self.assertStats(1, 0)
+
+    def test_hires_follow_status_changes(self):
+        self.set_status(self.applications[0], "Accepted")
+        self.set_status(self.applications[1], "Accepted")
+        self.assertStats(1, 2)
+        self.set_status(self.applications[1], "Rejected")
+        self.assertStats(1, 1)
+        Applications.objects.get(id=self.applications[0].id).delete()
+        self.assertStats(1, 0)
+
+    def test_bulk_status_change_counts_hires_once(self):
+        url = reverse("job-applications-bulk-status", args=[self.job.id])
+        self.client.post(url, {"status": "Accepted", "filter": {}}, format="json")
+        self.assertStats(1, 3)
+        self.client.post(url, {"status": "Rejected", "application_ids": [str(self.applications[0].id)]}, format="json")
+        self.assertStats(1, 2)
+
+    def test_status_changes_lock_the_rows_they_count(self):
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def spy(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "select_for_update", spy):
+            self.set_status(self.applications[0], "Accepted")
+            url = reverse("job-applications-bulk-status", args=[self.job.id])
+            self.client.post(url, {"status": "Accepted", "filter": {}}, format="json")
+        self.assertEqual(locked, [Applications, Applications])
+        self.assertStats(1, 3)
+
+    def test_migration_fills_existing_counters(self):
+        migration = importlib.import_module("business.migrations.0015_reconcile_poster_stats")
+        Applications.objects.filter(id=self.applications[0].id).update(status="Accepted")
+        User.objects.filter(id=self.owner.id).update(jobs_posted=0, number_of_hires=0)
+        loader = MigrationLoader(connection)
+        state = loader.project_state(("business", "0015_reconcile_poster_stats"), at_end=False)
+        migration.reconcile_poster_stats(state.apps, mock.Mock(connection=connection))
+        self.assertStats(1, 1)
+
+    def test_deleting_a_job_drops_its_hires(self):
+        self.set_status(self.applications[0], "Accepted")
+        self.job.delete()
+        self.assertStats(0, 0)
+
+    def test_reconcile_recomputes_counters(self):
+        Applications.objects.filter(id=self.applications[0].id).update(status="accepted")
+        User.objects.filter(id=self.owner.id).update(jobs_posted=7)
+        out = io.StringIO()
+        call_command("reconcile_user_stats", "--batch-size", "2", stdout=out)
+        self.assertIn("corrected 1", out.getvalue())
+        self.assertStats(1, 1)
+
+    def test_user_list_reads_stats_without_aggregates(self):
+        admin = User.objects.create_superuser(
+            username="statsadmin", email="statsadmin@example.com", password="Adminpass@123", role="admin"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(admin)['access']}")
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("list_users"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in captured if "business_" in query["sql"]])
+
+
+class FastListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="fastowner", email="fastowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.applicant = User.objects.create_user(
+            username="fastapplicant", email="fastapplicant@example.com", password="Userpass@123"
+        )
+        category = Categories.objects.create(name="IT", description="IT Jobs")
+        self.jobs = [
+            Jobs.objects.create(title="Développeur Python", description="Écrire des API\u2028vite",
+                                working_area="remote", longevity="permanent", type="full-time",
+                                category=category, posted_by=self.owner),
+            Jobs.objects.create(title="Nurse", description="Night shifts \"on call\"", location="Addis Ababa",
+                                working_area="onsite", longevity="contractual", type="part-time",
+                                posted_by=self.owner, is_active=False),
+        ]
+        application = Applications.objects.create(user=self.applicant, job=self.jobs[0],
+                                                  resume="Résumé", cover_letter="Hello\nthere")
+        Notifications.objects.create(recipient=self.applicant, application=application, message="Applied ✓")
+        Notifications.objects.create(recipient=self.applicant, message="Welcome", is_read=True)
+        self.lists = [
+            (None, reverse("jobs-list"), {}),
+            (None, reverse("jobs-list"), {"search": "python"}),
+            (None, reverse("jobs-list"), {"pagination": "cursor"}),
+            (self.owner, reverse("user-jobs-list"), {}),
+            (self.owner, reverse("job-applications-list", args=[self.jobs[0].id]), {}),
+            (self.applicant, reverse("user-applications-list"), {}),
+            (self.applicant, reverse("list-notifications"), {}),
+            (None, reverse("async-jobs-list"), {}),
+            (self.applicant, reverse("async-user-applications-list"), {}),
+            (self.applicant, reverse("async-list-notifications"), {}),
+        ]
+
+    def get(self, user, url, params):
+        if user is None:
+            self.client.credentials()
+        else:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user)["access"]}')
+        job_cache.bump_version()
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content
+
+    def test_fast_lists_match_the_serializer_byte_for_byte(self):
+        for zone in ("UTC", "Africa/Addis_Ababa"):
+            with timezone.override(zone):
+                for user, url, params in self.lists:
+                    with self.subTest(zone=zone, url=url, params=params):
+                        fast = self.get(user, url, params)
+                        with override_settings(FAST_LIST_ENABLED=False):
+                            self.assertEqual(fast, self.get(user, url, params))
+
+    def test_fast_lists_build_no_model_instances(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(self.applicant)["access"]}')
+        with mock.patch.object(Jobs, "from_db", side_effect=AssertionError("job instantiated")), \
+             mock.patch.object(Applications, "from_db", side_effect=AssertionError("application instantiated")):
+            self.assertEqual(len(self.client.get(reverse("jobs-list")).data["results"]), 2)
+            self.assertEqual(len(self.client.get(reverse("user-applications-list")).data["results"]), 1)
+
+    def test_plans_need_every_field_readable_from_the_row(self):
+        from .fastlist import get_plan
+        from .serializers import JobSerializer
+
+        class PosterSerializer(JobSerializer):
+            poster = serializers.CharField(source="posted_by.username")
+
+            class Meta(JobSerializer.Meta):
+                fields = JobSerializer.Meta.fields + ["poster"]
+
+        self.assertIsNotNone(get_plan(JobSerializer, Jobs.objects.with_applications_count()))
+        # applications_count comes from the annotation
+        self.assertIsNone(get_plan(JobSerializer, Jobs.objects.all()))
+        self.assertIsNone(get_plan(PosterSerializer, Jobs.objects.with_applications_count()))
+
+    def test_fast_renderer_matches_json_renderer(self):
+        from rest_framework.exceptions import ErrorDetail
+        from rest_framework.renderers import JSONRenderer
+        from .fastlist import FastJSONRenderer
+
+        for data in [
+            {"id": self.jobs[0].id, "at": timezone.now(), "text": "line\u2028break \u2029 é", "none": None,
+             "nested": [{"ok": True, "n": 2 ** 40}], "error": ErrorDetail("Invalid.", code="invalid")},
+            {1: "non-string key"},
+            [2 ** 70],
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_list_mode_benchmark_reports_identical_bodies(self):
+        benchmarks.seed(BenchmarkHarnessTests.VOLUMES)
+        report = benchmarks.run_list_modes(("jobs.list", "notifications.list"), page_sizes=(5, 20),
+                                           iterations=1, warmup=0)
+        self.assertEqual(set(report["scenarios"]), {"jobs.list", "notifications.list"})
+        for page_sizes in report["scenarios"].values():
+            self.assertEqual(set(page_sizes), {5, 20})
+            self.assertTrue(all(result["identical"] for result in page_sizes.values()))
+
+
+# one test process: the local-memory cache is shared by every "worker"
+@override_settings(AUTH_TOKEN_VERSION_CACHE_SHARED=True)
+class ApplicationSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="summaryowner", email="summaryowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.applicant = User.objects.create_user(
+            username="summaryapplicant", email="summaryapplicant@example.com", password="Userpass@123"
+        )
+        self.job = Jobs.objects.create(
+            title="Backend Developer", description="Build APIs", working_area="remote",
+            longevity="permanent", type="full-time", posted_by=self.owner,
+        )
+        self.application = Applications.objects.create(
+            user=self.applicant, job=self.job, resume="Experience. " * 1000, cover_letter="Hire me."
+        )
+        self.preview_length = PREVIEW_LENGTH
+
+    def authenticate(self, user):
+        token = ClaimsRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_lists_carry_previews(self):
+        for user, url in [
+            (self.owner, reverse("job-applications-list", args=[self.job.id])),
+            (self.applicant, reverse("user-applications-list")),
+            (self.applicant, reverse("async-user-applications-list")),
+        ]:
+            with self.subTest(url=url):
+                self.authenticate(user)
+                result = self.client.get(url).json()["results"][0]
+                self.assertNotIn("resume", result)
+                self.assertEqual(result["resume_preview"], self.application.resume[:self.preview_length])
+                self.assertTrue(result["resume_truncated"])
+                self.assertEqual(result["cover_letter_preview"], "Hire me.")
+                self.assertFalse(result["cover_letter_truncated"])
+
+    def test_list_size_does_not_depend_on_document_length(self):
+        self.authenticate(self.owner)
+        url = reverse("job-applications-list", args=[self.job.id])
+        size = len(self.client.get(url).content)
+        self.application.resume = "Experience. " * 100000
+        self.application.save()
+        self.assertEqual(len(self.client.get(url).content), size)
+
+    def test_detail_serves_the_full_text_to_the_job_owner(self):
+        url = reverse("job-application-detail", args=[self.job.id, self.application.id])
+        self.authenticate(self.owner)
+        self.client.get(url)  # caches the owner's token version
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["resume"], self.application.resume)
+
+        self.authenticate(self.applicant)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        other_job = Jobs.objects.create(title="Other", description="Other job", posted_by=self.owner)
+        self.authenticate(self.owner)
+        response = self.client.get(reverse("job-application-detail", args=[other_job.id, self.application.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+class BlobStorageTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="blobowner", email="blobowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.applicant = User.objects.create_user(
+            username="blobapplicant", email="blobapplicant@example.com", password="Userpass@123"
+        )
+        self.other = User.objects.create_user(
+            username="blobother", email="blobother@example.com", password="Userpass@123"
+        )
+        self.jobs = [
+            Jobs.objects.create(title=f"Job {i}", description="Build APIs", posted_by=self.owner) for i in range(2)
+        ]
+        self.resume = "Ten years of Django. Résumé available on request.\n" * 50
+        self.applications = [
+            Applications.objects.create(user=self.applicant, job=job, resume=self.resume, cover_letter="C")
+            for job in self.jobs
+        ]
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(user)['access']}")
+
+    def stored_files(self, digest):
+        directory = os.path.dirname(blobs.get_backend().path(digest))
+        return sorted(os.listdir(directory))
+
+    def test_same_resume_is_stored_once(self):
+        digest = blobs.digest_of(self.resume.encode())
+        self.assertEqual({application.resume_digest for application in self.applications}, {digest})
+        backend = blobs.get_backend()
+        self.assertEqual(os.path.relpath(backend.path(digest), backend.root), f"{digest[:2]}/{digest[2:4]}/{digest}")
+        self.assertEqual(self.stored_files(digest), [digest])
+        application = Applications.objects.get(id=self.applications[0].id)
+        self.assertEqual(application.resume_preview, self.resume[:PREVIEW_LENGTH])
+        self.assertEqual(application.resume_length, len(self.resume))
+        self.assertEqual(application.resume, self.resume)
+
+    def test_chunks_read_the_blob_in_order(self):
+        digest = self.applications[0].resume_digest
+        data = self.resume.encode()
+        self.assertEqual(blobs.read(digest), data)
+        pieces = list(blobs.chunks(digest, chunk_size=100))
+        self.assertTrue(all(len(piece) <= 100 for piece in pieces))
+        self.assertEqual(b"".join(pieces), data)
+        self.assertEqual(blobs.read(blobs.put(b"")), b"")
+        with self.assertRaises(blobs.BlobNotFound):
+            blobs.read("0" * 64)
+
+    def test_updating_a_resume_stores_a_new_blob(self):
+        self.authenticate(self.applicant)
+        application = self.applications[0]
+        url = reverse("user-applications-update", args=[application.id])
+        response = self.client.patch(url, {"resume": "Short resume"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        application.refresh_from_db()
+        self.assertEqual(application.resume_digest, blobs.digest_of(b"Short resume"))
+        self.assertEqual((application.resume, application.resume_length), ("Short resume", 12))
+        # the other application keeps its blob
+        self.assertEqual(Applications.objects.get(id=self.applications[1].id).resume, self.resume)
+
+    def test_resume_endpoint_streams_the_blob(self):
+        application = self.applications[0]
+        url = reverse("application-resume", args=[application.id])
+        for user in (self.applicant, self.owner):
+            with self.subTest(user=user.username):
+                self.authenticate(user)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+                self.assertEqual(b"".join(response.streaming_content).decode(), self.resume)
+                self.assertEqual(response["ETag"], f'"{application.resume_digest}"')
+
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.authenticate(self.other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missing_resume_blob_is_not_found(self):
+        application = self.applications[0]
+        Applications.objects.filter(id=application.id).update(resume_digest="0" * 64)
+        self.authenticate(self.applicant)
+        response = self.client.get(reverse("application-resume", args=[application.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.streaming)
+        with self.assertRaises(blobs.BlobNotFound):
+            blobs.chunks("0" * 64)
+
+    def test_export_reads_resumes_from_blobs(self):
+        self.authenticate(self.owner)
+        url = reverse("job-applications-export", args=[self.jobs[0].id])
+        response = self.client.get(url, {"export_format": "ndjson", "fields": "id,resume"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [{"id": str(self.applications[0].id), "resume": self.resume}])
+
+
+# one test process: the local-memory cache is shared by every "worker"
+@override_settings(AUTH_TOKEN_VERSION_CACHE_SHARED=True)
+class OwnershipQueryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="ownqowner", email="ownqowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.other_owner = User.objects.create_user(
+            username="ownqother", email="ownqother@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.applicant = User.objects.create_user(
+            username="ownqapplicant", email="ownqapplicant@example.com", password="Userpass@123"
+        )
+        self.admin = User.objects.create_user(
+            username="ownqadmin", email="ownqadmin@example.com", password="Adminpass@123", role="admin"
+        )
+        self.job = Jobs.objects.create(title="Backend Developer", description="Build APIs", posted_by=self.owner)
+        self.empty_job = Jobs.objects.create(title="Frontend Developer", description="Build UIs", posted_by=self.owner)
+        self.application = Applications.objects.create(
+            user=self.applicant, job=self.job, resume="Resume", cover_letter="Cover letter"
+        )
+
+    def authenticate(self, user):
+        token = ClaimsRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        # caches the user's token version
+        self.client.get(reverse("unread-notification-count"))
+
+    def test_job_applications_list_reads_applications_only(self):
+        url = reverse("job-applications-list", args=[self.job.id])
+        for user in (self.owner, self.admin):
+            with self.subTest(user=user.username):
+                self.authenticate(user)
+                # the count and the page
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual([result["id"] for result in response.data["results"]], [str(self.application.id)])
+
+    def test_job_applications_list_without_visible_applications(self):
+        self.authenticate(self.other_owner)
+        self.assertEqual(self.client.get(reverse("job-applications-list", args=[self.job.id])).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(reverse("job-applications-list", args=[uuid.uuid4()])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.authenticate(self.owner)
+        response = self.client.get(reverse("job-applications-list", args=[self.empty_job.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 0)
+
+    def test_status_update_reads_the_application_once(self):
+        url = reverse("application-update-status", args=[self.application.id])
+        self.authenticate(self.other_owner)
+        with self.assertNumQueries(1):
+            response = self.client.patch(url, {"status": "Rejected"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.authenticate(self.owner)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.patch(url, {"status": "Rejected"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        reads = [query["sql"] for query in captured.captured_queries if query["sql"].startswith("SELECT")]
+        # the application with its job, owner and applicant, and the stored status for the hires count
+        self.assertEqual(len(reads), 2)
+        self.assertIn('"business_jobs"', reads[0])
+        self.assertIn('"accounts_user"', reads[0])
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, "Rejected")
+
+    def test_apply_reads_the_job_once(self):
+        url = reverse("user-applications-create", args=[self.empty_job.id])
+        self.authenticate(self.applicant)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(url, {"resume": "Resume", "cover_letter": "Hello"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reads = [query["sql"] for query in captured.captured_queries if query["sql"].startswith("SELECT")]
+        # the job, and the applicant's name for the owner's notification
+        self.assertEqual(len(reads), 2)
+        self.assertIn('FROM "business_jobs"', reads[0])
+        self.assertNotIn('"description"', reads[0])
+
+        response = self.client.post(reverse("user-applications-create", args=[uuid.uuid4()]),
+                                    {"resume": "Resume", "cover_letter": "Hello"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="recowner", email="recowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        self.applicant = User.objects.create_user(
+            username="recapplicant", email="recapplicant@example.com", password="Userpass@123"
+        )
+        self.it = Categories.objects.create(name="IT", description="IT Jobs")
+        self.care = Categories.objects.create(name="Care", description="Care Jobs")
+
+        def job(title, description, category, **fields):
+            return Jobs.objects.create(title=title, description=description, category=category,
+                                       working_area="remote", longevity="permanent", type="full-time",
+                                       posted_by=self.owner, **fields)
+
+        self.applied = job("Python developer", "Build Django APIs in Python", self.it)
+        self.similar = job("Senior Python engineer", "Django and Python services", self.it)
+        self.inactive = job("Python backend developer", "Python APIs", self.it, is_active=False)
+        self.unrelated = job("Night nurse", "Care for patients at the clinic", self.care)
+        for i in range(6):
+            job(f"Warehouse associate {i}", "Pick and pack orders", None)
+        Applications.objects.create(user=self.applicant, job=self.applied, resume="R", cover_letter="C")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.applicant)['access']}")
+
+    def recommended(self):
+        return [job["id"] for job in self.client.get(reverse("recommended-jobs")).json()]
+
+    def test_rebuild_recommends_similar_active_jobs(self):
+        summary = recommendations.rebuild()
+        self.assertEqual(summary["users"], 1)
+        recommended = self.recommended()
+        self.assertEqual(recommended[0], str(self.similar.id))
+        self.assertNotIn(str(self.applied.id), recommended)
+        self.assertNotIn(str(self.inactive.id), recommended)
+        self.assertNotIn(str(self.unrelated.id), recommended)
+
+    def test_recommendations_are_served_with_one_query(self):
+        recommendations.rebuild()
+        # auth user, recommended jobs
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("recommended-jobs"))
+        self.assertGreater(response.json()[0]["score"], 0)
+
+    def test_new_jobs_are_folded_in(self):
+        recommendations.rebuild()
+        fresh = Jobs.objects.create(title="Python developer", description="Django APIs in Python", category=self.it,
+                                    working_area="remote", longevity="permanent", type="full-time",
+                                    posted_by=self.owner)
+        self.assertNotIn(str(fresh.id), self.recommended())
+        self.assertEqual(recommendations.fold_in(), {"jobs": 1, "users": 1})
+        self.assertEqual(self.recommended()[0], str(fresh.id))
+        self.assertEqual(recommendations.fold_in(), {"jobs": 0, "users": 0})
+
+    def test_sparse_dot_matches_dense_product(self):
+        maps = [{1: 1.0, 5: 2.0}, {5: 1.0, 7: 3.0}, {}, {1: 0.5}]
+        columns = recommendations.SparseColumns(recommendations.SparseRows.from_maps(maps))
+        dense = [[row.get(feature, 0.0) for feature in (1, 5, 7)] for row in maps]
+        scores = columns.dot(np.array([1, 5, 7], np.int32), np.array([2.0, 1.0, 0.5], np.float32))
+        expected = [sum(a * b for a, b in zip(row, (2.0, 1.0, 0.5))) for row in dense]
+        self.assertEqual(scores.tolist(), expected)
+
+    def test_recommendations_require_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse("recommended-jobs")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SimilarJobsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="simowner", email="simowner@example.com", password="Ownerpass@123", can_post_ajob=True
+        )
+        text = "We are hiring a backend developer to build REST APIs with Django and PostgreSQL for our payments team"
+        self.job = self.create_job("Backend developer", text)
+        self.near = self.create_job("Backend developer", text + " in Berlin")
+        self.inactive = self.create_job("Backend developer", text + " remotely", is_active=False)
+        self.other = self.create_job("Night nurse", "Care for patients on the night shift at the city clinic")
+        similarity.rebuild()
+        self.url = reverse("similar-jobs", args=[self.job.id])
+
+    def create_job(self, title, description, **fields):
+        fields.setdefault("posted_by", self.owner)
+        return Jobs.objects.create(title=title, description=description, working_area="remote",
+                                   longevity="permanent", type="full-time", **fields)
+
+    def test_similar_jobs_lists_near_duplicates(self):
+        # job, matching jobs
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([job["id"] for job in response.json()], [str(self.near.id)])
+        self.assertGreater(response.json()[0]["similarity"], 0.5)
+
+    def test_index_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            # the same posting from another employer
+            other = User.objects.create_user(
+                username="simother", email="simother@example.com", password="Ownerpass@123", can_post_ajob=True
+            )
+            added = self.create_job("Backend developer", self.job.description, posted_by=other)
+        self.assertEqual([job["id"] for job in self.client.get(self.url).json()][0], str(added.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added.description = "Drive a delivery van around the city"
+            added.save()
+            self.near.delete()
+        self.assertEqual(self.client.get(self.url).json(), [])
+
+    def test_compaction_keeps_live_jobs_only(self):
+        index = similarity.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.near.title = "Backend engineer"
+            self.near.save()
+        self.assertEqual(index.size(), 4)
+        index.compact()
+        records, _, base = index._snapshot()
+        self.assertEqual((len(records), base), (4, 4))
+        self.assertEqual([job["id"] for job in self.client.get(self.url).json()], [str(self.near.id)])
+
+    def test_saves_leave_compaction_to_the_periodic_task(self):
+        index = similarity.get_index()
+        generation = index._read_meta()["generation"]
+        with mock.patch.object(similarity, "MAX_TAIL", 1), self.captureOnCommitCallbacks(execute=True):
+            for position in range(3):
+                self.create_job(f"Support engineer {position}", "Answer customer tickets")
+        self.assertEqual(index._read_meta()["generation"], generation)
+        self.assertFalse(tasks.compact_similar_jobs_index(min_tail=4))
+        self.assertTrue(tasks.compact_similar_jobs_index(min_tail=3))
+        self.assertEqual(index._read_meta(), {"generation": generation + 1, "base": 7})
+
+    def test_readers_survive_a_concurrent_compaction(self):
+        index = similarity.get_index()
+        stale = index._read_meta()
+        index.compact()
+        # the previous generation stays on disk for readers that just read meta.json
+        self.assertTrue(os.path.exists(index._path(f"records-{stale['generation']}.bin")))
+        index.compact()
+        self.assertFalse(os.path.exists(index._path(f"records-{stale['generation']}.bin")))
+        fresh = index._read_meta()
+        index._state = None
+        with mock.patch.object(index, "_read_meta", side_effect=[stale, fresh]):
+            self.assertEqual(index.size(), 4)
+
+    def test_unknown_job_is_not_found(self):
+        response = self.client.get(reverse("similar-jobs", args=[self.owner.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JobBoardCacheTests(TestCase):
+    def test_waiting_reader_gets_value_filled_by_lock_holder(self):
+        key = "jobboard:jobs:test:stampede"
+        cache_backend = job_cache.get_cache()
+        cache_backend.add(f"{key}:lock", 1)
+        timer = threading.Timer(0.1, cache_backend.set, args=(key, {"filled": True}))
+        timer.start()
+
+        def producer():
+            raise AssertionError("waiting readers must not recompute")
+
+        self.assertEqual(job_cache.read_through(key, producer), {"filled": True})
+        timer.join()
+
+    def test_cached_responses_keep_status_and_headers(self):
+        calls = []
+
+        class Handler:
+            def list(self, request):
+                calls.append(request)
+                return Response({"page": 1}, status=status.HTTP_203_NON_AUTHORITATIVE_INFORMATION,
+                                headers={"Link": '<http://testserver/api/jobs/?page=2>; rel="next"'})
+
+        class View(job_cache.CachedReadMixin, Handler):
+            cache_namespace = "test"
+
+        request = Request(APIRequestFactory().get("/api/jobs/"))
+        for _ in range(2):
+            response = View().list(request)
+            self.assertEqual(response.status_code, status.HTTP_203_NON_AUTHORITATIVE_INFORMATION)
+            self.assertEqual(response["Link"], '<http://testserver/api/jobs/?page=2>; rel="next"')
+            self.assertEqual(response.data, {"page": 1})
+        self.assertEqual(len(calls), 1)
+
+
+class BenchmarkHarnessTests(TestCase):
+    VOLUMES = {'users': 10, 'categories': 2, 'jobs': 60, 'applications': 200, 'notifications': 50}
+
+    def test_seed_creates_requested_volumes(self):
+        created = benchmarks.seed(self.VOLUMES, batch_size=25)
+        self.assertEqual(created["jobs"], Jobs.objects.count())
+        self.assertEqual(Applications.objects.count(), 200)
+        self.assertEqual(Notifications.objects.count(), 50)
+        self.assertTrue(Jobs.objects.filter(posted_by__email=benchmarks.OWNER_EMAIL).exists())
+
+    def test_scenarios_cover_every_route(self):
+        self.assertEqual(benchmarks.uncovered_routes(), [])
+
+    def test_run_reports_queries_and_detects_regressions(self):
+        benchmarks.seed(self.VOLUMES)
+        scenarios = [s for s in benchmarks.SCENARIOS if s.name in ("jobs.list", "my_jobs.update")]
+        report = benchmarks.run(scenarios, iterations=2, warmup=0)
+        self.assertEqual(benchmarks.failures(report), [])
+        self.assertEqual(set(report["scenarios"]), {"jobs.list", "my_jobs.update"})
+        # an unchanged job list must not be served without touching the database
+        self.assertGreater(report["scenarios"]["jobs.list"]["queries"], 0)
+        # the update is rolled back
+        self.assertFalse(Jobs.objects.filter(title__endswith="(updated)").exists())
+
+        baseline = json.loads(json.dumps(report))
+        baseline["scenarios"]["jobs.list"]["queries"] -= 1
+        self.assertEqual(
+            benchmarks.compare(baseline, report),
+            [("jobs.list", baseline["scenarios"]["jobs.list"]["queries"], report["scenarios"]["jobs.list"]["queries"])],
+        )
+        self.assertEqual(benchmarks.compare(baseline, report, tolerance=1), [])
+
+    def test_run_benchmarks_command_fails_on_regression(self):
+        benchmarks.seed(self.VOLUMES)
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as baseline:
+            json.dump({"scenarios": {"jobs.detail": {"queries": 0}}}, baseline)
+            baseline.flush()
+            with self.assertRaisesMessage(CommandError, "jobs.detail"):
+                call_command("run_benchmarks", only=["jobs.detail"], iterations=1, warmup=0,
+                             baseline=baseline.name, stdout=io.StringIO())
+
+
+
+class QueryPlanTests(TestCase):
+    def test_list_routes_are_served_by_indexes(self):
+        benchmarks.seed(BenchmarkHarnessTests.VOLUMES)
+        report = benchmarks.run_query_plans()
+        self.assertEqual(set(report["scenarios"]), set(benchmarks.QUERY_PLAN_SCENARIOS))
+        self.assertTrue(all(report["scenarios"].values()))
+        self.assertEqual(benchmarks.plan_problems(report), [])
+
+    def test_scans_and_sorts_are_detected(self):
+        unindexed = queryplans.explain(str(Jobs.objects.order_by("updated_at").query))
+        self.assertEqual(len(queryplans.problems(unindexed)), 2)
+        indexed = queryplans.explain(str(Jobs.objects.order_by("-posted_at", "-id")[:10].query))
+        self.assertEqual(queryplans.problems(indexed), [])
+
+        plan = [
+            "Limit  (cost=0.29..0.62 rows=10 width=8)",
+            "  ->  Sort  (cost=10000000012.1..10000000012.4 rows=100 width=8)",
+            "        Sort Key: updated_at DESC",
+            "        ->  Seq Scan on business_jobs  (cost=10000000000.00..10000000011.00 rows=100 width=8)",
+        ]
+        self.assertEqual(queryplans.problems(plan, vendor="postgresql"), plan[1:2] + plan[3:])
+
+    def test_check_query_plans_command(self):
+        benchmarks.seed(BenchmarkHarnessTests.VOLUMES)
+        stdout = io.StringIO()
+        call_command("check_query_plans", only=["my_jobs.list"], stdout=stdout)
+        self.assertIn("served by indexes", stdout.getvalue())
+
+@override_settings(REQUEST_INSTRUMENTATION=True, REQUEST_INSTRUMENTATION_TOKEN="scrape-token")
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        instrumentation.registry.reset()
+        owner = User.objects.create_user(username="owner", email="owner@example.com", password="Ownerpass@123")
+        Jobs.objects.create(title="Job1", description="Desc1", posted_by=owner)
+
+    def test_response_carries_server_timing(self):
+        response = APIClient().get(reverse("jobs-list"))
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ queries", ser;dur=[\d.]+, total;dur=')
+
+    def test_metrics_are_exported_per_view(self):
+        client = APIClient()
+        client.get(reverse("jobs-list"))
+        client.get(reverse("jobs-list"))
+        response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('jobboard_request_duration_seconds_count{view="jobs-list",method="GET"} 2', body)
+        self.assertIn('jobboard_request_queries_bucket{view="jobs-list",le="+Inf"} 2', body)
+        self.assertIn('jobboard_response_size_bytes_count{view="jobs-list"} 2', body)
+
+    def test_metrics_require_the_token(self):
+        response = APIClient().get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_repeated_queries_are_fingerprinted(self):
+        metrics = instrumentation.RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            for _ in range(3):
+                list(Jobs.objects.filter(title="Job1"))
+        instrumentation.registry.record("jobs-list", "GET", metrics, 0.01, 10)
+        body = instrumentation.registry.render()
+        self.assertEqual(metrics.queries, 3)
+        self.assertRegex(body, r'jobboard_duplicate_queries_total\{view="jobs-list",fingerprint="\w+"\} 2')
+        self.assertIn(': SELECT "business_jobs"."id"', body)
+
+    async def test_async_views_are_served_without_a_thread(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(instrumentation.RequestInstrumentationMiddleware(get_response)))
+        # the test database connection was opened before the middleware was loaded
+        await sync_to_async(instrumentation.install_query_timing)()
+        response = await AsyncClient().get(reverse("async-jobs-list"))
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        body = await sync_to_async(instrumentation.registry.render)()
+        self.assertIn('jobboard_request_queries_count{view="async-jobs-list"} 1', body)
+
+    def test_duplicate_fingerprints_are_bounded(self):
+        registry = instrumentation.Registry(max_fingerprints=2)
+        for index in range(4):
+            metrics = instrumentation.RequestMetrics()
+            metrics.statements[f"SELECT {index}"] = 3
+            registry.record("jobs-list", "GET", metrics, 0.01, 10)
+        self.assertEqual(len(registry.samples), 2)
+        self.assertEqual(registry.duplicates[("jobs-list", "other")], 4)
+        self.assertIn('jobboard_duplicate_queries_total{view="jobs-list",fingerprint="other"} 4', registry.render())
+
+    @override_settings(REQUEST_INSTRUMENTATION=False)
+    def test_middleware_is_inactive_by_default(self):
+        response = APIClient().get(reverse("jobs-list"))
+        self.assertNotIn("Server-Timing", response)
+
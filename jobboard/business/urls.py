@@ -1,6 +1,7 @@
 from django.urls import path, include
-from .views import CategoryViewSet, JobReadOnlyViewSet, JobDestroyView, UserJobViewSet, UserApplicationViewSet, JobApplicationsListView, JobApplicationStatusUpdateView, NotificationListView, NotificationDetailView, NotificationDestroyView
+from .views import CategoryViewSet, JobReadOnlyViewSet, JobDestroyView, UserJobViewSet, UserApplicationViewSet, JobApplicationsListView, JobApplicationDetailView, ApplicationResumeView, JobApplicationStatusUpdateView, NotificationListView, NotificationDetailView, NotificationDestroyView, JobBoardCacheStatsView, JobApplicationBulkStatusUpdateView, JobApplicationsExportView, UnreadNotificationCountView, NotificationMarkReadView, RecommendedJobsView, SimilarJobsView, JobFacetsView, JobImportView
 from rest_framework.routers import DefaultRouter
+from . import async_views
 
 
 router = DefaultRouter()
@@ -24,11 +25,16 @@ user_applications_delete_view = UserApplicationViewSet.as_view({"delete": "destr
 urlpatterns= [
     path("jobs/", job_list, name="jobs-list"),
     path("jobs/<uuid:id>/", job_detail, name="jobs-detail"),
+    path("jobs/facets/", JobFacetsView.as_view(), name="jobs-facets"),
+    path("jobs/recommended/", RecommendedJobsView.as_view(), name="recommended-jobs"),
+    path("jobs/<uuid:id>/similar/", SimilarJobsView.as_view(), name="similar-jobs"),
     ## admin
     path("admin/jobs/<uuid:id>/delete/", JobDestroyView.as_view(), name="job-destroy"),
     path('admin/category/', include(router.urls)),
+    path("admin/cache/stats/", JobBoardCacheStatsView.as_view(), name="job-cache-stats"),
     ## User job
     path('jobs/my-jobs/create/', user_job_create, name='user-crate-jobs'),
+    path('jobs/my-jobs/import/', JobImportView.as_view(), name='user-import-jobs'),
     path("jobs/my-jobs/", user_jobs_list, name="user-jobs-list"),
     path("jobs/my-jobs/<uuid:id>/", user_jobs_retrieve, name="user-jobs-detail"),
     path("jobs/my-jobs/<uuid:id>/update/", user_jobs_update, name="user-jobs-update"),
@@ -41,9 +47,22 @@ urlpatterns= [
     path("applications/my-applications/<uuid:id>/delete/", user_applications_delete_view, name="user-applications-delete"),
     ## Job applications
     path("jobs/<uuid:job_id>/applications/", JobApplicationsListView.as_view(), name="job-applications-list"),
+    path("jobs/<uuid:job_id>/applications/<uuid:id>/", JobApplicationDetailView.as_view(), name="job-application-detail"),
+    path("jobs/<uuid:job_id>/applications/export/", JobApplicationsExportView.as_view(), name="job-applications-export"),
+    path("applications/<uuid:id>/resume/", ApplicationResumeView.as_view(), name="application-resume"),
     path("applications/<uuid:id>/update-status/", JobApplicationStatusUpdateView.as_view(), name="application-update-status"),
+    path("jobs/<uuid:job_id>/applications/bulk-status/", JobApplicationBulkStatusUpdateView.as_view(), name="job-applications-bulk-status"),
+    ## Async read path (see business/async_views.py)
+    path("async/jobs/", async_views.job_list, name="async-jobs-list"),
+    path("async/jobs/<uuid:id>/", async_views.job_detail, name="async-jobs-detail"),
+    path("async/notifications/list", async_views.notification_list, name="async-list-notifications"),
+    path("async/applications/my-applications/", async_views.my_application_list, name="async-user-applications-list"),
     ## Notifications
     path("notifications/list", NotificationListView.as_view(), name='list-notifications'),
     path("notifications/retrieve/<uuid:id>", NotificationDetailView.as_view(), name='retrieve-notification'),
     path("notifications/delete/<uuid:id>", NotificationDestroyView.as_view(), name='delete-notification'),
+    path("notifications/mark-read", NotificationMarkReadView.as_view(), name='mark-notifications-read'),
+    path("notifications/unread-count", UnreadNotificationCountView.as_view(), name='unread-notification-count'),
+    path("notifications/poll", async_views.notification_poll, name='poll-notifications'),
+    path("notifications/stream", async_views.notification_stream, name='stream-notifications'),
 ]
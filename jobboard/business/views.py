@@ -1,11 +1,24 @@
-from django.shortcuts import render
-from .serializers import CategorySerializer, JobSerializer, ApplicationSerializer,JobApplicationStatusSerializer, NotificationSerializer
+from django.shortcuts import render, get_object_or_404
+from django.db import transaction
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.db.models import F, Q
+from django.utils.http import parse_etags, quote_etag
+from django.utils import timezone
+from .serializers import CategorySerializer, JobSerializer, ApplicationSerializer, ApplicationSummarySerializer, JobApplicationStatusSerializer, NotificationSerializer, BulkApplicationStatusSerializer, NotificationMarkReadSerializer, RecommendedJobSerializer, SimilarJobSerializer, JobImportReportSerializer
 from rest_framework import generics, viewsets,  status, filters
 from django_filters.rest_framework import DjangoFilterBackend
-from accounts.permissions import IsAdmin, CanPost, IsOwnerOfApplication, IsJobOwner
+from accounts.permissions import IsAdmin, CanPost, IsOwnerOfApplication, IsJobOwner, IsJobOwnerOfApplication
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .models import Categories, Jobs, Applications, Notifications
+from .search import JobSearchFilter
+from .pagination import JobPagination, ApplicationPagination, NotificationPagination
+from .cache import CachedReadMixin, get_stats, invalidate, make_key, read_through
+from .fastlist import FastListMixin
+from .ownership import OwnedQuerysetMixin
+from . import blobs, emails, exports, facets, imports, notifications, poster_stats, similarity
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
 
 # Create your views here.
 
@@ -21,10 +34,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
     # permission_classes = [AllowAny]
     serializer_class = CategorySerializer
     lookup_field = 'id'
-    queryset = Categories.objects.all().prefetch_related('jobs')\
-                                        .order_by('created_at')
+    queryset = Categories.objects.with_jobs_count().order_by('created_at')
 
-class UserJobViewSet(viewsets.ModelViewSet):
+class UserJobViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet for users to manage their own job postings.
 
@@ -34,7 +46,7 @@ class UserJobViewSet(viewsets.ModelViewSet):
     """
     serializer_class = JobSerializer
     lookup_field = "id"
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, JobSearchFilter, filters.OrderingFilter]
 
     search_fields = ['title', 'description']
 
@@ -48,13 +60,20 @@ class UserJobViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        return Jobs.objects.filter(posted_by=user).select_related('category')\
-                                                  .prefetch_related('applications')\
-                                                  .order_by('-posted_at', '-is_active')
+        return Jobs.objects.filter(posted_by=user).with_applications_count()\
+                                                  .order_by('-posted_at', '-id')
+
+    def create(self, request, *args, **kwargs):
+        """A submission merged into an existing job answers 200 instead of 201."""
+        response = super().create(request, *args, **kwargs)
+        if self.merged:
+            response.status_code = status.HTTP_200_OK
+        return response
 
     def perform_create(self, serializer):
         user = self.request.user
         serializer.save(posted_by=user, is_active=True)
+        self.merged = getattr(serializer.instance, 'merged', False)
 
 class JobDestroyView(generics.DestroyAPIView):
     """
@@ -66,32 +85,155 @@ class JobDestroyView(generics.DestroyAPIView):
     lookup_field = 'id'
     queryset = Jobs.objects.all()
 
-class JobReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+class JobReadOnlyViewSet(CachedReadMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only viewset for all jobs available to the public.
+
+    Responses are served from the versioned job board cache (see business.cache),
+    and lists are rendered in fast list mode (see business.fastlist).
     """
+    cache_namespace = 'jobs'
     permission_classes = [AllowAny]
     serializer_class = JobSerializer
-    queryset = Jobs.objects.all().select_related('category', 'posted_by')\
-                                    .prefetch_related('applications')\
-                                    .order_by('-posted_at', '-is_active')
+    pagination_class = JobPagination
+    queryset = Jobs.objects.with_applications_count()\
+                           .order_by('-posted_at', '-id')
     lookup_field = "id"
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, JobSearchFilter, filters.OrderingFilter]
 
     search_fields = ['title', 'description']
 
     filterset_fields = ['category', 'is_active', 'working_area', 'longevity', 'type']
 
 
-class UserApplicationViewSet(viewsets.ModelViewSet):
+class JobImportView(generics.GenericAPIView):
+    """
+    Create many jobs of the user from one CSV or NDJSON file.
+
+    The file is either uploaded as the multipart 'file' field or sent as
+    the request body (Content-Type text/csv or application/x-ndjson). CSV
+    files start with a header naming the JobSerializer fields; 'category'
+    holds a category name. The format of an upload comes from the
+    'import_format' field or parameter, or else the file name.
+
+    Rows are imported in batches (see business.imports); invalid rows are
+    listed in the response and do not stop the import. A file that cannot
+    be read to the end still gets its report, with the jobs imported until
+    the unreadable row.
+    """
+    serializer_class = JobImportReportSerializer
+    permission_classes = [IsAuthenticated, CanPost]
+    parser_classes = [MultiPartParser, imports.CSVStreamParser, imports.NDJSONStreamParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.data.get('file')
+        if upload is None:
+            raise ValidationError({'file': "Upload a CSV or NDJSON file, or send one as the request body."})
+        import_format = request.data.get('import_format') or request.query_params.get('import_format')\
+                        or imports.guess_format(getattr(upload, 'name', ''))
+        if import_format not in imports.FORMATS:
+            raise ValidationError({'import_format': f"Must be one of {sorted(imports.FORMATS)}."})
+
+        report = imports.import_jobs(request.user, upload, import_format)
+        return Response(
+            self.get_serializer(report).data,
+            status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class JobFacetsView(generics.GenericAPIView):
+    """
+    Number of jobs per value of each job board filter, for the current
+    search and filters.
+
+    Accepts the query parameters of the public job list. The unfiltered
+    board is counted from the facet rollup; otherwise the matching jobs are
+    counted in one grouped query (see business.facets). Responses are
+    served from the job board cache.
+    """
+    permission_classes = [AllowAny]
+    pagination_class = None
+    queryset = Jobs.objects.all()
+    filter_backends = JobReadOnlyViewSet.filter_backends
+    search_fields = JobReadOnlyViewSet.search_fields
+    filterset_fields = JobReadOnlyViewSet.filterset_fields
+
+    def get(self, request, *args, **kwargs):
+        return Response(read_through(make_key('jobs:facets', request), self.get_counts))
+
+    def get_counts(self):
+        params = [*self.filterset_fields, JobSearchFilter.search_param]
+        if not any(self.request.query_params.get(param) for param in params):
+            return facets.board_counts()
+        return facets.counts(self.filter_queryset(self.get_queryset()))
+
+
+class RecommendedJobsView(generics.ListAPIView):
+    """
+    Jobs recommended to the authenticated user, best match first.
+
+    Recommendations are precomputed by business.recommendations; this reads
+    them with a single indexed query. Users without applications get none.
+    """
+    serializer_class = RecommendedJobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return Jobs.objects.with_applications_count()\
+                           .filter(recommendations__user=self.request.user, is_active=True)\
+                           .annotate(score=F('recommendations__score'))\
+                           .order_by('recommendations__rank')
+
+
+class SimilarJobsView(generics.GenericAPIView):
+    """
+    Active jobs whose text is most similar to the given job, best first.
+
+    Candidates come from the similar-jobs index (business.similarity), so
+    the only queries are the job itself and the matching jobs.
+    """
+    serializer_class = SimilarJobSerializer
+    permission_classes = [AllowAny]
+    LIMIT = 10
+
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(Jobs.objects.only('id', 'title', 'description'), id=self.kwargs['id'])
+        # ask for extra matches: inactive jobs stay in the index but are not listed
+        matches = similarity.similar_jobs(job, limit=self.LIMIT * 2)
+        jobs = Jobs.objects.with_applications_count().filter(is_active=True)\
+                           .in_bulk([job_id for job_id, _ in matches])
+        results = []
+        for job_id, score in matches:
+            if job_id in jobs and len(results) < self.LIMIT:
+                jobs[job_id].similarity = score
+                results.append(jobs[job_id])
+        return Response(self.get_serializer(results, many=True).data)
+
+
+class JobBoardCacheStatsView(generics.GenericAPIView):
+    """
+    Hit/miss counters of the job board cache for this process (admin only).
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_stats())
+
+
+class UserApplicationViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet for users to manage their own job applications.
 
+    Lists carry previews of the resume and cover letter
+    (ApplicationSummarySerializer); the other actions the full text.
+
     Permissions:
         - Create: Authenticated users.
         - Update/Delete: Only the applicant can modify their application.
     """
     serializer_class = ApplicationSerializer
+    pagination_class = ApplicationPagination
     lookup_field = "id"
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
@@ -105,52 +247,182 @@ class UserApplicationViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated()]
         return [IsAuthenticated(), IsOwnerOfApplication()]
 
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ApplicationSummarySerializer
+        return ApplicationSerializer
+
     def get_queryset(self):
         user = self.request.user
-        return Applications.objects.filter(user=user).prefetch_related('job')\
-                                                     .order_by('-applied_at')
+        applications = Applications.objects.filter(user=user).order_by('-applied_at')
+        if self.action == "list":
+            return applications.summaries()
+        return applications
 
     def perform_create(self, serializer):
         user = self.request.user
-        job = Jobs.objects.get(id=self.kwargs['id'])
+        # the application and its post_save signals only read these fields of the job
+        job = get_object_or_404(Jobs.objects.only('id', 'title', 'posted_by_id'), id=self.kwargs['id'])
         serializer.save(user=user, job=job)
 
-class JobApplicationsListView(generics.ListAPIView):
+class JobApplicationsListView(OwnedQuerysetMixin, FastListMixin, generics.ListAPIView):
     """
     List all applications for a specific job (job owner or admin only).
+
+    Applications carry previews of the resume and cover letter; the full
+    text is served by JobApplicationDetailView.
+
+    Ownership is part of the applications query, so the job is not
+    fetched; it is only read when no application is visible, to answer
+    404 for a missing job and 403 for someone else's.
     """
-    serializer_class = ApplicationSerializer
+    serializer_class = ApplicationSummarySerializer
+    pagination_class = ApplicationPagination
     permission_classes = [IsAuthenticated, IsJobOwner | IsAdmin]
     # permission_classes = [AllowAny]
     lookup_field = "job_id"
+    owner_field = "job__posted_by"
+
+    def get_queryset(self):
+        applications = Applications.objects.filter(job_id=self.kwargs["job_id"])
+        return self.owned(applications).summaries().order_by('-applied_at')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if not response.data['results']:
+            job = get_object_or_404(Jobs.objects.only('id', 'posted_by_id'), id=self.kwargs["job_id"])
+            self.check_object_permissions(request, job)
+        return response
+
+
+class JobApplicationDetailView(generics.RetrieveAPIView):
+    """
+    One application of a job, with its full resume and cover letter (job owner or admin only).
+    """
+    serializer_class = ApplicationSerializer
+    permission_classes = [IsAuthenticated, IsJobOwnerOfApplication | IsAdmin]
+    lookup_field = "id"
 
     def get_queryset(self):
-        job_id = self.kwargs.get("job_id")
-        job = Jobs.objects.get(id=job_id)
+        return Applications.objects.filter(job_id=self.kwargs['job_id']).select_related('job')
 
-        # Check permission
-        self.check_object_permissions(self.request, job)
 
-        return Applications.objects.filter(job=job).prefetch_related('user')\
-                                                   .order_by('-applied_at')
+class ApplicationResumeView(generics.GenericAPIView):
+    """
+    The full resume of an application, as plain text (applicant, job owner or admin).
 
-class JobApplicationStatusUpdateView(generics.UpdateAPIView):
+    The text is streamed from blob storage as it is read. Blobs never
+    change, so the resume digest is the ETag and a client holding it gets
+    a 304 without the blob being read. The blob is opened before the
+    response starts, so a missing one is a 404 rather than a broken 200.
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_field = "id"
+
+    def get_queryset(self):
+        user = self.request.user
+        applications = Applications.objects.only('id', 'resume_digest')
+        if IsAdmin().has_permission(self.request, self):
+            return applications
+        return applications.filter(Q(user=user) | Q(job__posted_by=user))
+
+    def get(self, request, *args, **kwargs):
+        application = self.get_object()
+        etag = quote_etag(application.resume_digest)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            try:
+                content = blobs.chunks(application.resume_digest)
+            except blobs.BlobNotFound:
+                raise NotFound("The resume of this application is missing from storage.")
+            response = StreamingHttpResponse(content, content_type='text/plain; charset=utf-8')
+        response['ETag'] = etag
+        return response
+
+class JobApplicationsExportView(generics.GenericAPIView):
+    """
+    Download all applications of a job as CSV or NDJSON (job owner or admin only).
+
+    Query parameters:
+        - export_format: 'csv' (default) or 'ndjson'
+        - fields: comma-separated columns, defaults to DEFAULT_FIELDS
+        - status: only export applications with this status
+
+    Rows are read with a server-side iterator and written as the response
+    streams, so memory stays flat however many applicants the job has.
+    """
+    permission_classes = [IsAuthenticated, IsJobOwner | IsAdmin]
+    # exported column -> queryset lookup
+    EXPORT_FIELDS = {
+        'id': 'id',
+        'job': 'job_id',
+        'user': 'user_id',
+        'username': 'user__username',
+        'email': 'user__email',
+        'status': 'status',
+        'resume': 'resume_digest',
+        'cover_letter': 'cover_letter',
+        'applied_at': 'applied_at',
+        'updated_at': 'updated_at',
+    }
+    # exported column -> function turning the looked up value into the exported one
+    EXPORT_CONVERTERS = {
+        'resume': blobs.read_text,
+    }
+    DEFAULT_FIELDS = ['id', 'user', 'username', 'email', 'status', 'applied_at']
+    CHUNK_SIZE = 2000
+
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(Jobs.objects.select_related('posted_by'), id=self.kwargs['job_id'])
+        self.check_object_permissions(request, job)
+
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in exports.FORMATS:
+            raise ValidationError({'export_format': f"Must be one of {sorted(exports.FORMATS)}."})
+        names = [name for name in request.query_params.get('fields', '').split(',') if name]
+        names = names or self.DEFAULT_FIELDS
+        unknown = [name for name in names if name not in self.EXPORT_FIELDS]
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}."})
+
+        applications = Applications.objects.filter(job=job)
+        if 'status' in request.query_params:
+            applications = applications.filter(status=request.query_params['status'])
+        rows = applications.order_by('applied_at', 'id')\
+                           .values_list(*(self.EXPORT_FIELDS[name] for name in names))\
+                           .iterator(chunk_size=self.CHUNK_SIZE)
+        converters = [self.EXPORT_CONVERTERS.get(name) for name in names]
+        if any(converters):
+            rows = exports.convert(rows, converters)
+
+        response = StreamingHttpResponse(
+            exports.stream(export_format, names, rows), content_type=exports.FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="applications-{job.id}.{export_format}"'
+        return response
+
+
+class JobApplicationStatusUpdateView(OwnedQuerysetMixin, generics.UpdateAPIView):
     """
     Update the status of an application (job owner only).
+
+    Applications of other owners' jobs are not found (404).
     """
     serializer_class = JobApplicationStatusSerializer
     permission_classes = [IsAuthenticated]
     lookup_field = "id"
+    owner_field = "job__posted_by"
+    owner_bypass_permissions = []
 
     def get_queryset(self):
         # return Applications.objects.all()
-        return Applications.objects.filter(job__posted_by=self.request.user)
+        # the post_save signal reads the job, its owner and the applicant
+        return self.owned(Applications.objects.select_related('job__posted_by', 'user'))
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
 
-        self.check_object_permissions(request, instance.job)
-
         status_value = request.data.get("status")
         if not status_value:
             return Response(
@@ -159,17 +431,98 @@ class JobApplicationStatusUpdateView(generics.UpdateAPIView):
             )
         
         instance.status = status_value
-        instance.save()
+        with transaction.atomic():
+            # the hires signal locks the row it reads the previous status from
+            instance.save(update_fields=['status', 'updated_at'])
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class NotificationListView(generics.ListAPIView):
+class JobApplicationBulkStatusUpdateView(generics.GenericAPIView):
+    """
+    Update the status of many applications of a job at once (job owner or admin).
+
+    Ownership is checked once, the applications are locked while the change
+    is applied with a single UPDATE and the notifications and emails for
+    every affected applicant are queued as one batch. The response reports
+    the outcome for each application.
+    """
+    serializer_class = BulkApplicationStatusSerializer
+    permission_classes = [IsAuthenticated, IsJobOwner | IsAdmin]
+
+    def post(self, request, *args, **kwargs):
+        job = get_object_or_404(Jobs.objects.select_related('posted_by'), id=self.kwargs['job_id'])
+        self.check_object_permissions(request, job)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+        requested_ids = serializer.validated_data.get('application_ids')
+
+        applications = Applications.objects.filter(job=job).select_related('user')\
+                                           .only('id', 'status', 'applied_at', 'job_id',
+                                                 'user__id', 'user__username', 'user__email')
+        if requested_ids is not None:
+            applications = applications.filter(id__in=requested_ids)
+        elif 'status' in serializer.validated_data['filter']:
+            applications = applications.filter(status=serializer.validated_data['filter']['status'])
+
+        with transaction.atomic():
+            # locked, so a concurrent update cannot count the same status change again
+            applications = list(applications.select_for_update(of=('self',)))
+            changed = [application for application in applications if application.status != new_status]
+            Applications.objects.filter(id__in=[application.id for application in changed])\
+                                .update(status=new_status, updated_at=timezone.now())
+            # a queryset update sends no post_save
+            poster_stats.add_hires(job.posted_by_id, sum(
+                poster_stats.hires_delta(application.status, new_status) for application in changed
+            ))
+
+            batch_notifications, batch_emails = [], []
+            for application in changed:
+                application.status = new_status
+                application.job = job
+                reviewed, reviewed_emails = notifications.application_reviewed(application)
+                batch_notifications.extend(reviewed)
+                batch_emails.extend(reviewed_emails)
+            notifications.dispatch(batch_notifications)
+            emails.queue_emails(batch_emails)
+            if changed:
+                # a queryset update sends no post_save, so retire cached board pages here
+                invalidate()
+
+        changed_ids = {application.id for application in changed}
+        found_ids = [application.id for application in applications]
+        found = set(found_ids)
+        # keep the caller's order, reporting ids that do not belong to the job
+        ordered_ids = list(dict.fromkeys(requested_ids)) if requested_ids is not None else found_ids
+
+        results = []
+        for application_id in ordered_ids:
+            if application_id not in found:
+                result = 'not_found'
+            elif application_id in changed_ids:
+                result = 'updated'
+            else:
+                result = 'unchanged'
+            results.append({'id': application_id, 'result': result})
+
+        return Response({
+            'status': new_status,
+            'updated': len(changed_ids),
+            'unchanged': len(found) - len(changed_ids),
+            'not_found': len(ordered_ids) - len(found),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
+class NotificationListView(FastListMixin, generics.ListAPIView):
     """
     List notifications for the authenticated user.
     """
     serializer_class = NotificationSerializer
+    pagination_class = NotificationPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
@@ -203,6 +556,39 @@ class NotificationDetailView(generics.RetrieveAPIView):
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+class UnreadNotificationCountView(generics.GenericAPIView):
+    """
+    Number of unread notifications of the authenticated user.
+
+    Served from a counter maintained as notifications are created and read,
+    so polling it does not touch the notifications table.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({'unread_count': notifications.unread_count(request.user.pk)})
+
+
+class NotificationMarkReadView(generics.GenericAPIView):
+    """
+    Mark the selected (or all) notifications of the authenticated user as read.
+
+    Runs as one UPDATE however many notifications are selected.
+    """
+    serializer_class = NotificationMarkReadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            updated = notifications.mark_read(request.user.pk, serializer.validated_data.get('ids'))
+        return Response({
+            'updated': updated,
+            'unread_count': notifications.unread_count(request.user.pk),
+        }, status=status.HTTP_200_OK)
+
+
 class NotificationDestroyView(generics.DestroyAPIView):
     """
     Delete a notification (recipient only).
@@ -213,3 +599,8 @@ class NotificationDestroyView(generics.DestroyAPIView):
 
     def get_queryset(self):
         return Notifications.objects.filter(recipient=self.request.user)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.is_read:
+            transaction.on_commit(lambda: notifications.adjust_unread_count(instance.recipient_id, -1), robust=True)
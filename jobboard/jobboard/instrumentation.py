@@ -0,0 +1,297 @@
+"""
+Per-request SQL and timing instrumentation.
+
+Enabled with REQUEST_INSTRUMENTATION. For every request the middleware
+records, under the resolved URL name (e.g. 'jobs-list'):
+
+    - total duration
+    - number of SQL queries and time spent in the database
+    - time spent producing serializer data
+    - response size
+    - queries executed more than once with the same SQL (N+1 candidates)
+
+Values are aggregated in-process into fixed-bucket histograms and exposed
+in the Prometheus text format by the `metrics` view. Responses also carry a
+Server-Timing header. The per-query cost is a clock read and a dict update,
+so it is cheap enough to leave enabled in production.
+
+The middleware serves sync and async views alike. Queries are counted by
+one execute wrapper on every database connection opened once the
+middleware is loaded (and on those already open in the loading thread).
+It charges them to the request found in a context variable, which follows
+the request into the threads that run its queries for async views, where
+a wrapper added to the connections of the middleware's own thread would
+not.
+
+Duplicate-query fingerprints are kept for at most
+REQUEST_INSTRUMENTATION_MAX_FINGERPRINTS (view, fingerprint) pairs; once
+full, repeats of new statements are counted under fingerprint "other".
+"""
+import hashlib
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# longest SQL sample kept per duplicate-query fingerprint
+SQL_SAMPLE_LENGTH = 300
+MAX_FINGERPRINTS = getattr(settings, 'REQUEST_INSTRUMENTATION_MAX_FINGERPRINTS', 1000)
+OVERFLOW_FINGERPRINT = 'other'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Thread-safe, in-process store of every recorded request."""
+
+    HISTOGRAMS = {
+        'jobboard_request_duration_seconds': ('Request duration.', DURATION_BUCKETS),
+        'jobboard_request_queries': ('SQL queries per request.', QUERY_BUCKETS),
+        'jobboard_request_db_seconds': ('Time spent in the database per request.', DURATION_BUCKETS),
+        'jobboard_request_serializer_seconds': ('Time spent producing serializer data per request.', DURATION_BUCKETS),
+        'jobboard_response_size_bytes': ('Response body size.', SIZE_BUCKETS),
+    }
+
+    def __init__(self, max_fingerprints=MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self.lock = threading.Lock()
+        self.histograms = {name: {} for name in self.HISTOGRAMS}
+        self.duplicates = Counter()
+        self.samples = {}
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {name: {} for name in self.HISTOGRAMS}
+            self.duplicates.clear()
+            self.samples.clear()
+
+    def observe(self, name, labels, value):
+        histograms = self.histograms[name]
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = Histogram(self.HISTOGRAMS[name][1])
+        histogram.observe(value)
+
+    def record(self, view, method, metrics, duration, size):
+        duplicates = metrics.duplicates()
+        with self.lock:
+            self.observe('jobboard_request_duration_seconds', (view, method), duration)
+            self.observe('jobboard_request_queries', (view,), metrics.queries)
+            self.observe('jobboard_request_db_seconds', (view,), metrics.db_time)
+            self.observe('jobboard_request_serializer_seconds', (view,), metrics.serializer_time)
+            if size is not None:
+                self.observe('jobboard_response_size_bytes', (view,), size)
+            for sql, executions in duplicates:
+                fingerprint = hashlib.sha1(sql.encode()).hexdigest()[:12]
+                if (view, fingerprint) not in self.duplicates and len(self.duplicates) >= self.max_fingerprints:
+                    self.duplicates[(view, OVERFLOW_FINGERPRINT)] += executions - 1
+                    continue
+                self.duplicates[(view, fingerprint)] += executions - 1
+                self.samples.setdefault(fingerprint, sql[:SQL_SAMPLE_LENGTH])
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets) in self.HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    label_text = _labels(name, labels)
+                    cumulative = 0
+                    for bound, count in zip((*buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{label_text}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{label_text}}} {histogram.count}')
+
+            name = 'jobboard_duplicate_queries_total'
+            lines.append(f'# HELP {name} Repeated executions of the same SQL within one request.')
+            lines.append(f'# TYPE {name} counter')
+            for (view, fingerprint), count in sorted(self.duplicates.items()):
+                lines.append(f'{name}{{view="{_escape(view)}",fingerprint="{fingerprint}"}} {count}')
+            for fingerprint, sql in sorted(self.samples.items()):
+                lines.append(f'# fingerprint {fingerprint}: {" ".join(sql.split())}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(name, values):
+    keys = ('view', 'method') if name == 'jobboard_request_duration_seconds' else ('view',)
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in zip(keys, values))
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Counters for the request being served."""
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializer_depth', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        return [(sql, count) for sql, count in self.statements.items() if count > 1]
+
+
+def _execute(execute, sql, params, many, context):
+    """Execute wrapper of every connection; counts the query for the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def _wrap_connection(connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+def install_query_timing():
+    """Wrap the connections of this thread now and every connection opened later."""
+    connection_created.connect(_wrap_connection, dispatch_uid='jobboard.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(connection)
+
+
+def _timed_serializer_data(fget):
+    def data(serializer):
+        metrics = _current.get()
+        if metrics is None or metrics.serializer_depth:
+            return fget(serializer)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return fget(serializer)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializer_depth -= 1
+    return property(data)
+
+
+def install_serializer_timing():
+    """Time `serializer.data` for every DRF serializer, once per process."""
+    from rest_framework.serializers import BaseSerializer
+
+    if not getattr(BaseSerializer.data.fget, 'instrumented', False):
+        timed = _timed_serializer_data(BaseSerializer.data.fget)
+        timed.fget.instrumented = True
+        BaseSerializer.data = timed
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Record query count, DB time, serializer time and response size per view.
+
+    Inactive unless REQUEST_INSTRUMENTATION is set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.server_timing = getattr(settings, 'REQUEST_INSTRUMENTATION_SERVER_TIMING', True)
+        install_query_timing()
+        install_serializer_timing()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    def finish(self, request, response, metrics, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        registry.record(view, request.method, metrics, duration, size)
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries", '
+                f'ser;dur={metrics.serializer_time * 1000:.1f}, '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        return response
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint.
+
+    Requires `Authorization: Bearer <REQUEST_INSTRUMENTATION_TOKEN>` when a
+    token is configured; without one it is only served in DEBUG.
+    """
+    token = getattr(settings, 'REQUEST_INSTRUMENTATION_TOKEN', None)
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
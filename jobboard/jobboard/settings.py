@@ -43,13 +43,20 @@ DATABASES = {
 
 ## Edit this for setting up email
 # EMAIL
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL')
+# outbox batching (see business/emails.py)
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 100))
+EMAIL_BATCH_MAX_WAIT = int(os.environ.get('EMAIL_BATCH_MAX_WAIT', 10))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+EMAIL_RETRY_BACKOFF = int(os.environ.get('EMAIL_RETRY_BACKOFF', 60))
+# seconds a batch claimed by a flush stays reserved to it; an expired claim is sent again
+EMAIL_SEND_LEASE = int(os.environ.get('EMAIL_SEND_LEASE', 300))
 
 
 
@@ -86,6 +93,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # inactive unless REQUEST_INSTRUMENTATION is set
+    'jobboard.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -156,12 +165,16 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# keeps the on-disk stores written by tests in a temporary directory (see jobboard/test_runner.py)
+TEST_RUNNER = 'jobboard.test_runner.TestRunner'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication, minus the user lookup for tokens with claims
+        'accounts.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
@@ -186,6 +199,25 @@ SIMPLE_JWT = {
 
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+## Cache
+# Local memory by default; set REDIS_CACHE_URL to share the cache between workers.
+REDIS_CACHE_URL = os.environ.get('REDIS_CACHE_URL')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# seconds a public job board response stays cached (see business/cache.py)
+JOB_BOARD_CACHE_TIMEOUT = int(os.environ.get('JOB_BOARD_CACHE_TIMEOUT', 300))
+
 
 
 # CELERY_TASK_ALWAYS_EAGER = True
@@ -198,6 +230,75 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 
+CELERY_BEAT_SCHEDULE = {
+    # safety net for the outbox: picks up retries and anything left unflushed
+    'flush-email-outbox': {
+        'task': 'business.tasks.flush_email_outbox',
+        'schedule': 30.0,
+    },
+    # keeps the notifications table from growing without bound
+    'purge-read-notifications': {
+        'task': 'business.tasks.purge_read_notifications',
+        'schedule': 60 * 60.0,
+    },
+    # recommended jobs: full rebuild daily, new postings folded in meanwhile
+    'rebuild-recommendations': {
+        'task': 'business.tasks.rebuild_recommendations',
+        'schedule': 24 * 60 * 60.0,
+    },
+    'fold-in-recommendations': {
+        'task': 'business.tasks.fold_in_recommendations',
+        'schedule': 10 * 60.0,
+    },
+    'compact-similar-jobs-index': {
+        'task': 'business.tasks.compact_similar_jobs_index',
+        'schedule': 60 * 60.0,
+    },
+    # saves only append to the index; compact early once the tail passes similarity.MAX_TAIL
+    'compact-similar-jobs-index-tail': {
+        'task': 'business.tasks.compact_similar_jobs_index',
+        'schedule': 5 * 60.0,
+        'kwargs': {'min_tail': 10000},
+    },
+}
+
+## Observability (see jobboard/instrumentation.py)
+# per-view query counts, DB/serializer time and response size, scraped from /metrics/
+REQUEST_INSTRUMENTATION = os.environ.get('REQUEST_INSTRUMENTATION', 'False').lower() in ('true', '1', 'yes')
+REQUEST_INSTRUMENTATION_SERVER_TIMING = os.environ.get('REQUEST_INSTRUMENTATION_SERVER_TIMING', 'True').lower() in ('true', '1', 'yes')
+# bearer token required by /metrics/; without one the endpoint is only served in DEBUG
+REQUEST_INSTRUMENTATION_TOKEN = os.environ.get('REQUEST_INSTRUMENTATION_TOKEN')
+# (view, statement) pairs tracked for duplicate queries; further repeats are counted as "other"
+REQUEST_INSTRUMENTATION_MAX_FINGERPRINTS = int(os.environ.get('REQUEST_INSTRUMENTATION_MAX_FINGERPRINTS', 1000))
+
+# create in-app notifications from a Celery task instead of after the request commits
+NOTIFICATIONS_DEFER_TO_CELERY = os.environ.get('NOTIFICATIONS_DEFER_TO_CELERY', 'False').lower() in ('true', '1', 'yes')
+# delivery of new notifications to the stream/long-poll endpoints (see business/pubsub.py);
+# use business.pubsub.RedisBackend with several web processes or deferred notifications
+NOTIFICATIONS_PUBSUB_BACKEND = os.environ.get('NOTIFICATIONS_PUBSUB_BACKEND', 'business.pubsub.LocalBackend')
+NOTIFICATIONS_PUBSUB_URL = os.environ.get('NOTIFICATIONS_PUBSUB_URL', 'redis://127.0.0.1:6379/1')
+# seconds a per-user unread counter stays cached before it is recounted
+NOTIFICATIONS_UNREAD_COUNT_TIMEOUT = int(os.environ.get('NOTIFICATIONS_UNREAD_COUNT_TIMEOUT', 3600))
+NOTIFICATIONS_POLL_TIMEOUT = int(os.environ.get('NOTIFICATIONS_POLL_TIMEOUT', 25))
+NOTIFICATIONS_STREAM_LIFETIME = int(os.environ.get('NOTIFICATIONS_STREAM_LIFETIME', 300))
+# read notifications older than this many days are deleted, a bounded number of batches per run
+NOTIFICATIONS_RETENTION_DAYS = int(os.environ.get('NOTIFICATIONS_RETENTION_DAYS', 90))
+NOTIFICATIONS_RETENTION_BATCH_SIZE = int(os.environ.get('NOTIFICATIONS_RETENTION_BATCH_SIZE', 5000))
+NOTIFICATIONS_RETENTION_MAX_BATCHES = int(os.environ.get('NOTIFICATIONS_RETENTION_MAX_BATCHES', 100))
+
+# recommended jobs stored per user (see business/recommendations.py)
+RECOMMENDATIONS_TOP_K = int(os.environ.get('RECOMMENDATIONS_TOP_K', 20))
+# what posting a job the poster already posted does: 'reject' it or 'merge' it into the existing job
+JOB_DUPLICATE_POLICY = os.environ.get('JOB_DUPLICATE_POLICY', 'reject')
+# memory-mapped MinHash/LSH index of job texts, shared by the workers of a host (see business/similarity.py)
+SIMILAR_JOBS_INDEX_DIR = os.environ.get('SIMILAR_JOBS_INDEX_DIR', str(BASE_DIR / 'var' / 'similar_jobs'))
+# content-addressed store of application resumes (see business/blobs.py); use business.blobs.S3Backend with
+# BLOB_STORAGE_BUCKET (and BLOB_STORAGE_ENDPOINT_URL for non-AWS services) to keep them in object storage
+BLOB_STORAGE_BACKEND = os.environ.get('BLOB_STORAGE_BACKEND', 'business.blobs.FileSystemBackend')
+BLOB_STORAGE_DIR = os.environ.get('BLOB_STORAGE_DIR', str(BASE_DIR / 'var' / 'blobs'))
+BLOB_STORAGE_BUCKET = os.environ.get('BLOB_STORAGE_BUCKET', '')
+BLOB_STORAGE_ENDPOINT_URL = os.environ.get('BLOB_STORAGE_ENDPOINT_URL') or None
+
 
 ## Swagger
 SPECTACULAR_SETTINGS = {
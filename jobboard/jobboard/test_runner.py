@@ -0,0 +1,57 @@
+"""
+Test runner keeping the on-disk stores of the tests out of the project tree.
+
+The settings in STORAGE_SETTINGS name directories the code writes to (the
+similar-jobs index, resume blobs). For a test run they point into a
+temporary directory removed afterwards; with --parallel every worker gets
+a subdirectory of its own, so tests of different workers never share an
+index. The paths are exported to the environment as well, for workers
+started with the spawn method, which read the settings afresh.
+"""
+import os
+import tempfile
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner, ParallelTestSuite, _init_worker
+import django.test.runner
+
+# setting -> subdirectory of the run's temporary directory
+STORAGE_SETTINGS = {
+    'SIMILAR_JOBS_INDEX_DIR': 'similar_jobs',
+    'BLOB_STORAGE_DIR': 'blobs',
+}
+
+
+def _init_storage_worker(counter, *args, **kwargs):
+    _init_worker(counter, *args, **kwargs)
+    worker = django.test.runner._worker_id
+    override_settings(**{
+        name: os.path.join(getattr(settings, name), f'worker-{worker}') for name in STORAGE_SETTINGS
+    }).enable()
+
+
+class StorageParallelTestSuite(ParallelTestSuite):
+    init_worker = _init_storage_worker
+
+
+class TestRunner(DiscoverRunner):
+    parallel_test_suite = StorageParallelTestSuite
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._storage = tempfile.TemporaryDirectory(prefix='jobboard-tests-')
+        paths = {name: os.path.join(self._storage.name, directory) for name, directory in STORAGE_SETTINGS.items()}
+        self._saved_environ = {name: os.environ.get(name) for name in paths}
+        os.environ.update(paths)
+        self._storage_settings = override_settings(**paths)
+        self._storage_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._storage_settings.disable()
+        for name, value in self._saved_environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self._storage.cleanup()
+        super().teardown_test_environment(**kwargs)
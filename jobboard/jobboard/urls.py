@@ -22,6 +22,7 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 from .views import landing
+from .instrumentation import metrics
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
@@ -34,5 +35,6 @@ urlpatterns = [
 
     # ReDoc UI
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('metrics/', metrics, name='metrics'),
     path('', landing),
 ]